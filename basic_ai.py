@@ -1,6 +1,7 @@
 from __future__ import annotations
-from cards import Card, Rank, Suit
+from cards import Card
 from player import Player
+from bitboard import highest_index
 
 
 class BasicAIPlayer(Player):
@@ -37,16 +38,9 @@ class BasicAIPlayer(Player):
         Return the card that is removed.
         """
 
-        sorted_hand_cards = sorted(self.hand)
-
-        # play the first card that is valid
-        for i in range(len(sorted_hand_cards)):
-            card = sorted_hand_cards[i]
-            if self.check_valid_play(card, trick, broken_hearts)[0]:
-                # delete the card from list before returning
-                del sorted_hand_cards[i]
-                self.hand = sorted_hand_cards
-                return card
+        card = self.lowest_legal(trick, broken_hearts)
+        self.remove_card(card)
+        return card
 
     def pass_cards(self) -> list[Card]:
         """
@@ -54,12 +48,10 @@ class BasicAIPlayer(Player):
         Return the 3 highest cards that is removed as list.
         """
 
-        # sort in decending order
-        sorted_hand_cards = sorted(self.hand)[::-1]
-        
-        # pass the three largest card and remove them from hand
-        result = sorted_hand_cards[:3]
-        del sorted_hand_cards[:3]
-        self.hand = sorted_hand_cards
+        # pass the three largest card (the highest bits) and remove them
+        result = []
+        while len(result) < 3 and self.hand_mask:
+            card = Card.from_index(highest_index(self.hand_mask))
+            self.remove_card(card)
+            result.append(card)
         return result
-
@@ -0,0 +1,509 @@
+from __future__ import annotations
+import argparse
+import gc
+import json
+import platform
+import random
+from itertools import count, cycle
+from time import perf_counter
+from cards import Card, Rank, Suit
+from basic_ai import BasicAIPlayer
+from better_ai import BetterAIPlayer
+from bitboard import cards_from_mask
+from dealing import deal_hands
+from decision_table import random_state
+from engine import play_game, play_round
+from hearts import Hearts
+from seeding import GameStreams
+
+# the version of the results file layout
+RESULTS_VERSION = 1
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Takes in sorted values and a percentage.
+    Return the percentile, interpolated between the closest values.
+    """
+
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+class BenchmarkResult:
+    """
+    DESCRIPTION:
+        The timings of one benchmark.
+        Every sample runs the operation a number of times, its time per
+        operation is one value of the distribution the percentiles are
+        taken from.
+
+    ATTRIBUTES:
+        name: str, the name of the benchmark
+        operations: int, the operations run over every sample
+        seconds: float, the time of every sample together
+        sample_times: list of float, the seconds per operation of each
+          sample, sorted
+
+    OPERATIONS AVAILABLE:
+        ops_per_sec(), percentile(), to_dict() and
+        BenchmarkResult.from_dict() for the results file
+    """
+
+    name: str
+    operations: int
+    seconds: float
+    sample_times: list[float]
+
+    def __init__(self, name: str, operations: int, seconds: float,
+                 sample_times: list[float]) -> None:
+        """
+        Initialise the result.
+        """
+
+        self.name = name
+        self.operations = operations
+        self.seconds = seconds
+        self.sample_times = sorted(sample_times)
+
+    def ops_per_sec(self) -> float:
+        """
+        Return the mean number of operations per second.
+        """
+
+        return self.operations / self.seconds
+
+    def percentile(self, q: float) -> float:
+        """
+        Return the percentile q of the seconds per operation.
+        """
+
+        return percentile(self.sample_times, q)
+
+    def to_dict(self) -> dict:
+        """
+        Return the result as a JSON compatible dict.
+        """
+
+        data = {"operations": self.operations, "seconds": self.seconds,
+                "ops_per_sec": self.ops_per_sec(),
+                "sample_times": self.sample_times}
+        for q in PERCENTILES:
+            data[f"p{q}"] = self.percentile(q)
+        return data
+
+    @staticmethod
+    def from_dict(name: str, data: dict) -> BenchmarkResult:
+        """
+        Return the result stored by to_dict.
+        """
+
+        return BenchmarkResult(name, data["operations"], data["seconds"],
+                               data["sample_times"])
+
+
+# Every setup takes in the random stream of the benchmark and returns
+# the operation to time (a function without arguments). Inputs are
+# prepared in the setup and cycled through, so the operation only does
+# the work being measured (and the cycling).
+
+def setup_card_construction(rng: random.Random):
+    """
+    Card(rank, suit), the lookup of the flyweight card.
+    """
+
+    pairs = [(rank, suit) for suit in Suit for rank in Rank]
+    rng.shuffle(pairs)
+    pairs = cycle(pairs)
+    return lambda: Card(*next(pairs))
+
+
+def setup_card_comparison(rng: random.Random):
+    """
+    Card < Card.
+    """
+
+    cards = [Card.from_index(i) for i in range(52)]
+    pairs = cycle([(rng.choice(cards), rng.choice(cards))
+                   for _ in range(1000)])
+
+    def operation():
+        first, second = next(pairs)
+        return first < second
+
+    return operation
+
+
+def setup_check_valid_play(rng: random.Random):
+    """
+    Player.check_valid_play of a card in hand.
+    """
+
+    checks = []
+    for _ in range(1000):
+        hand, trick, hearts_broken = random_state(rng)
+        player = BasicAIPlayer("Player 1")
+        player.hand = cards_from_mask(hand)
+        checks.append((player, rng.choice(player.hand),
+                       [Card.from_index(card) for card in trick],
+                       hearts_broken))
+    checks = cycle(checks)
+
+    def operation():
+        player, card, trick, hearts_broken = next(checks)
+        return player.check_valid_play(card, trick, hearts_broken)
+
+    return operation
+
+
+def _play_card_setup(rng: random.Random, player_class):
+    """
+    Return the operation setting a hand and playing a card from it.
+    """
+
+    states = []
+    for _ in range(1000):
+        hand, trick, hearts_broken = random_state(rng)
+        states.append((cards_from_mask(hand),
+                       [Card.from_index(card) for card in trick],
+                       hearts_broken))
+    states = cycle(states)
+    player = player_class("Player 1")
+
+    def operation():
+        hand, trick, hearts_broken = next(states)
+        player.hand = hand
+        return player.play_card(trick, hearts_broken)
+
+    return operation
+
+
+def _pass_cards_setup(rng: random.Random, player_class):
+    """
+    Return the operation setting a dealt hand and passing from it.
+    """
+
+    players = [player_class(f"Player {i + 1}") for i in range(4)]
+    hands = []
+    for _ in range(250):
+        deal_hands(players, rng)
+        hands += [player.hand for player in players]
+    hands = cycle(hands)
+    player = players[0]
+
+    def operation():
+        player.hand = next(hands)
+        return player.pass_cards()
+
+    return operation
+
+
+def setup_basic_play_card(rng: random.Random):
+    """
+    BasicAIPlayer.play_card, including setting the hand.
+    """
+
+    return _play_card_setup(rng, BasicAIPlayer)
+
+
+def setup_better_play_card(rng: random.Random):
+    """
+    BetterAIPlayer.play_card, including setting the hand.
+    """
+
+    return _play_card_setup(rng, BetterAIPlayer)
+
+
+def setup_basic_pass_cards(rng: random.Random):
+    """
+    BasicAIPlayer.pass_cards, including setting the hand.
+    """
+
+    return _pass_cards_setup(rng, BasicAIPlayer)
+
+
+def setup_better_pass_cards(rng: random.Random):
+    """
+    BetterAIPlayer.pass_cards, including setting the hand.
+    """
+
+    return _pass_cards_setup(rng, BetterAIPlayer)
+
+
+def setup_dealt_card(rng: random.Random):
+    """
+    Hearts.dealt_card of a 4 player game, each call deals the next round.
+    """
+
+    # the game is not run (that reads from standard input),
+    # only what dealt_card uses is set
+    game = Hearts.__new__(Hearts)
+    game.player_count = 4
+    game.players = [BasicAIPlayer(f"Player {i + 1}") for i in range(4)]
+    game.streams = GameStreams(rng.getrandbits(64))
+    game.round_number = 0
+
+    def operation():
+        game.round_number += 1
+        game.dealt_card()
+
+    return operation
+
+
+def setup_round(rng: random.Random):
+    """
+    A headless round of 4 players (deal, pass and every trick).
+    """
+
+    players = [(BasicAIPlayer, BetterAIPlayer)[i % 2](f"Player {i + 1}")
+               for i in range(4)]
+    rounds = cycle(range(1, 5))
+
+    def operation():
+        for player in players:
+            player.round_score = 0
+        return play_round(players, rng, next(rounds))
+
+    return operation
+
+
+def _game_setup(rng: random.Random, player_count: int):
+    """
+    Return the operation playing a full game to 100 points.
+    """
+
+    master_seed = rng.getrandbits(64)
+    game_ids = count()
+
+    def operation():
+        players = [(BasicAIPlayer, BetterAIPlayer)[i % 2](f"Player {i + 1}")
+                   for i in range(player_count)]
+        return play_game(players, 100,
+                         GameStreams(master_seed, next(game_ids)))
+
+    return operation
+
+
+def setup_game_3(rng: random.Random):
+    """
+    A full 3 player game to 100 points.
+    """
+
+    return _game_setup(rng, 3)
+
+
+def setup_game_4(rng: random.Random):
+    """
+    A full 4 player game to 100 points.
+    """
+
+    return _game_setup(rng, 4)
+
+
+def setup_game_5(rng: random.Random):
+    """
+    A full 5 player game to 100 points.
+    """
+
+    return _game_setup(rng, 5)
+
+
+# name -> (setup, if every sample is a single operation)
+BENCHMARKS = {
+    "card_construction": (setup_card_construction, False),
+    "card_comparison": (setup_card_comparison, False),
+    "check_valid_play": (setup_check_valid_play, False),
+    "basic_play_card": (setup_basic_play_card, False),
+    "better_play_card": (setup_better_play_card, False),
+    "basic_pass_cards": (setup_basic_pass_cards, False),
+    "better_pass_cards": (setup_better_pass_cards, False),
+    "hearts_dealt_card": (setup_dealt_card, False),
+    "round_4_players": (setup_round, True),
+    "game_3_players": (setup_game_3, True),
+    "game_4_players": (setup_game_4, True),
+    "game_5_players": (setup_game_5, True),
+}
+
+
+def _time(operation, number: int) -> float:
+    """
+    Return the seconds taken by running operation number times,
+    with the garbage collector off as in timeit.
+    """
+
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = perf_counter()
+        for _ in range(number):
+            operation()
+        return perf_counter() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def run_benchmark(name: str, samples: int = 20, min_time: float = 0.02,
+                  seed: int = 0) -> BenchmarkResult:
+    """
+    Takes in the name of a benchmark (see BENCHMARKS).
+    Run it for the given number of samples. Samples of micro benchmarks
+    repeat the operation until they take at least min_time, samples of
+    the others are a single operation.
+    Return the BenchmarkResult.
+    """
+
+    setup, single = BENCHMARKS[name]
+    operation = setup(random.Random(seed))
+
+    # warm up, and find how many operations fill a sample
+    number = 1
+    elapsed = _time(operation, number)
+    while not single and elapsed < min_time:
+        number *= 2 if elapsed * 10 > min_time else 10
+        elapsed = _time(operation, number)
+
+    seconds = 0.0
+    sample_times = []
+    for _ in range(samples):
+        elapsed = _time(operation, number)
+        seconds += elapsed
+        sample_times.append(elapsed / number)
+    return BenchmarkResult(name, samples * number, seconds, sample_times)
+
+
+def save_results(path: str, results: list[BenchmarkResult]) -> None:
+    """
+    Write the results and the interpreter they ran on to a JSON file.
+    """
+
+    data = {"version": RESULTS_VERSION,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "results": {result.name: result.to_dict() for result in results}}
+    with open(path, "w") as file:
+        json.dump(data, file, indent=2)
+
+
+def load_results(path: str) -> dict[str, BenchmarkResult]:
+    """
+    Read a results file written by save_results.
+    Return the results by benchmark name.
+    Raise ValueError if it is not a results file.
+    """
+
+    with open(path) as file:
+        data = json.load(file)
+    if not isinstance(data, dict) or data.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path} is not a benchmark results file")
+    return {name: BenchmarkResult.from_dict(name, result)
+            for name, result in data["results"].items()}
+
+
+def compare(results: list[BenchmarkResult],
+            baseline: dict[str, BenchmarkResult],
+            threshold: float) -> list[tuple[str, float, float, float, bool]]:
+    """
+    Takes in results, baseline results by name and the allowed slowdown
+    (e.g. 0.1 for 10%).
+    Compare the operations per second of the benchmarks in both.
+    Return a list of (name, baseline ops/s, ops/s, change, regressed)
+    tuples, change is relative to the baseline (negative is slower).
+    """
+
+    rows = []
+    for result in results:
+        if result.name not in baseline:
+            continue
+        old = baseline[result.name].ops_per_sec()
+        new = result.ops_per_sec()
+        change = new / old - 1
+        rows.append((result.name, old, new, change, change < -threshold))
+    return rows
+
+
+def format_results(results: list[BenchmarkResult]) -> str:
+    """
+    Return the results as a table, times in microseconds per operation.
+    """
+
+    lines = [f"{'benchmark':<20}  {'ops/s':>12}  {'p50 us':>10}"
+             + f"  {'p90 us':>10}  {'p99 us':>10}"]
+    for result in results:
+        lines.append(f"{result.name:<20}  {result.ops_per_sec():>12,.0f}"
+                     + "".join(f"  {result.percentile(q) * 1e6:>10.2f}"
+                               for q in PERCENTILES))
+    return "\n".join(lines)
+
+
+def main(argv: list[str] = None) -> None:
+    """
+    Run the benchmarks, print the table, save the results and compare
+    them with a baseline. Exit with status 1 when a benchmark is slower
+    than the baseline by more than the threshold.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the hearts engine and the AI players.")
+    parser.add_argument("names", nargs="*", metavar="NAME",
+                        help="benchmarks to run (default: all): "
+                        + ", ".join(BENCHMARKS))
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--min-time", type=float, default=0.02,
+                        help="seconds a micro benchmark sample takes at"
+                        + " least")
+    parser.add_argument("--quick", action="store_true",
+                        help="5 short samples per benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, metavar="PATH",
+                        help="save the results as JSON")
+    parser.add_argument("--baseline", default=None, metavar="PATH",
+                        help="results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="allowed slowdown against the baseline"
+                        + " (default: 0.1 for 10%%)")
+    args = parser.parse_args(argv)
+
+    names = args.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"Unknown benchmark '{name}', available: "
+                         + ", ".join(BENCHMARKS))
+    samples, min_time = args.samples, args.min_time
+    if args.quick:
+        samples, min_time = 5, min_time / 4
+    baseline = None
+    if args.baseline is not None:
+        try:
+            baseline = load_results(args.baseline)
+        except (OSError, ValueError) as err:
+            parser.error(str(err))
+
+    results = [run_benchmark(name, samples, min_time, args.seed)
+               for name in names]
+    print(format_results(results))
+    if args.output is not None:
+        save_results(args.output, results)
+
+    if baseline is None:
+        return
+    rows = compare(results, baseline, args.threshold)
+    print(f"\n{'benchmark':<20}  {'baseline':>12}  {'ops/s':>12}"
+          + f"  {'change':>8}")
+    for name, old, new, change, regressed in rows:
+        print(f"{name:<20}  {old:>12,.0f}  {new:>12,.0f}  {change:>+8.1%}"
+              + ("  REGRESSION" if regressed else ""))
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than the baseline"
+              + f" by more than {args.threshold:.0%}: "
+              + ", ".join(regressions))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from cards import Card, Rank, Suit
 from player import Player
+from bitboard import card_bit, highest_index
 
 
 class BetterAIPlayer(Player):
@@ -11,9 +12,12 @@ class BetterAIPlayer(Player):
 
         When playing a card, it plays according to scenarios.
         When passing card, it prioritises king/ace of spades then largest cards.
+        In compiled mode the same play strategy is looked up in
+        precomputed tables (see decision_table.py).
     
     ATTRIBUTES:
         Inherit the attributes of base player.
+        compiled: bool, if cards are played with the compiled tables
 
     OPERATIONS AVAILABLE:
         str conversion will return the player name
@@ -21,22 +25,31 @@ class BetterAIPlayer(Player):
         (Inherited from Player)
     """
 
+    compiled: bool
+
+    def __init__(self, name: str, compiled: bool = False) -> None:
+        """
+        Initialise the player, interpreting the play strategy unless
+        compiled.
+        """
+
+        super().__init__(name)
+        self.compiled = compiled
+        if compiled:
+            # only load (and compile) the tables when they are used
+            from decision_table import compiled_policy
+            self._compiled_policy = compiled_policy
+
     def play_lowest_card(self, trick: list[Card], broken_hearts: bool) -> Card:
         """
         Takes in the game context including the trick (list of Card) and if hearts broken (bool) status.
         Removes and returns the lowest valid card to play from hand.
         """
 
-        sorted_hand_cards = sorted(self.hand)
-
-        # play the first card that is valid
-        for i in range(len(sorted_hand_cards)):
-            card = sorted_hand_cards[i]
-            if self.check_valid_play(card, trick, broken_hearts)[0]:
-                # delete card from hand before returning
-                del sorted_hand_cards[i]
-                self.hand = sorted_hand_cards
-                return card
+        card = self.lowest_legal(trick, broken_hearts)
+        # delete card from hand before returning
+        self.remove_card(card)
+        return card
 
     def play_card(self, trick: list[Card], broken_hearts: bool) -> Card:
         '''
@@ -56,54 +69,54 @@ class BetterAIPlayer(Player):
         to the scenario.
         '''
         
+        if self.compiled:
+            card = Card.from_index(self._compiled_policy(
+                self.hand_mask, [card.ordinal for card in trick],
+                broken_hearts))
+            self.remove_card(card)
+            return card
+
         # if player leads
         if not trick:
             return self.play_lowest_card(trick, broken_hearts)
 
-        # filter out the valid cards
-        valid_cards = list(filter(
-            lambda card: self.check_valid_play(card, trick, broken_hearts)[0],
-            self.hand))
-
         # extract the first card's suit as leading suit
         leading_suit = trick[0].suit
 
-        # filter out all the card in leading suit.
-        same_suits = sorted(list(filter(
-            lambda card: card.suit == leading_suit,
-            valid_cards)))[::-1]
-
         # if player has leading card suit,
         # play largest card in hand that < largest card in trick
-        if same_suits:
+        lowest = self.lowest_in_suit(leading_suit)
+        if lowest is not None:
             largest_card = trick[0]
             for card in trick:
                 if card > largest_card and card.suit == largest_card.suit:
                     largest_card = card
 
-            # if player has no card lesser than the largest_card
-            if all(i < largest_card for i in same_suits):
+            # if every card of the suit is lesser than the largest_card
+            if self.highest_in_suit(leading_suit) < largest_card:
                 # play the smallest
-                self.hand.remove(same_suits[-1])
-                return same_suits[-1]
+                self.remove_card(lowest)
+                return lowest
+
+            card = self.highest_below(largest_card)
+            if card is not None:
+                self.remove_card(card)
+                return card
 
-            for card in same_suits:
-                if card < largest_card:
-                    self.hand.remove(card)
-                    return card
+            # only cards of the leading suit are valid,
+            # hearts are valid when hearts lead
+            if leading_suit != Suit.Hearts:
+                self.remove_card(lowest)
+                return lowest
 
         # if player has no leading suit, play the largest heart
-        # if no heart card, play the largest card
-        hearts = sorted(list(filter(
-            lambda card: card.suit == Suit.Hearts,
-            valid_cards)))[::-1]
-        if hearts:
-            self.hand.remove(hearts[0])
-            return hearts[0]
-
-        card = sorted(valid_cards)[::-1][-1]
-        self.hand.remove(card)
-        return card
+        # if no heart card, play the smallest card
+        card = self.highest_in_suit(Suit.Hearts)
+        if card is not None:
+            self.remove_card(card)
+            return card
+
+        return self.play_lowest_card(trick, broken_hearts)
 
     def pass_cards(self) -> list[Card]:
         """
@@ -122,21 +135,18 @@ class BetterAIPlayer(Player):
         selected = []
 
         # prioritise K of spades and A of spades
-        if k_of_spades in self.hand:
+        if self.hand_mask & card_bit(k_of_spades):
             selected.append(k_of_spades)
-            self.hand.remove(k_of_spades)
+            self.remove_card(k_of_spades)
 
-        if a_of_spades in self.hand:
+        if self.hand_mask & card_bit(a_of_spades):
             selected.append(a_of_spades)
-            self.hand.remove(a_of_spades)
-
-        # prioritse on largest hearts for the rest
-        sorted_hand = sorted(self.hand)[::-1]
-        for card in sorted_hand:
-            if len(selected) >= 3:
-                break
+            self.remove_card(a_of_spades)
 
+        # prioritse on largest cards (the highest bits) for the rest
+        while len(selected) < 3 and self.hand_mask:
+            card = Card.from_index(highest_index(self.hand_mask))
             selected.append(card)
-            self.hand.remove(card)
+            self.remove_card(card)
 
         return selected
@@ -0,0 +1,138 @@
+from __future__ import annotations
+from cards import Card, Rank, Suit
+
+
+# each card owns one bit of a 52-bit integer,
+# bit index = Card.ordinal = suit value * 13 + (rank value - 2),
+# so ascending bit order is the same as ascending card order (Card.__lt__)
+SUIT_SIZE = 13
+SUIT_MASKS = [((1 << SUIT_SIZE) - 1) << (suit.value * SUIT_SIZE)
+              for suit in Suit]
+FULL_MASK = (1 << (SUIT_SIZE * len(SUIT_MASKS))) - 1
+HEARTS_MASK = SUIT_MASKS[Suit.Hearts.value]
+NON_HEARTS_MASK = FULL_MASK & ~HEARTS_MASK
+TWO_OF_CLUBS_BIT = 1 << (Suit.Clubs.value * SUIT_SIZE + Rank.Two.value - 2)
+QUEEN_OF_SPADES_BIT = 1 << (Suit.Spades.value * SUIT_SIZE
+                            + Rank.Queen.value - 2)
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # python < 3.10
+    def popcount(mask: int) -> int:
+        """
+        Return the number of set bits (cards) in a mask as integer.
+        """
+
+        return bin(mask).count("1")
+
+
+def card_index(card: Card) -> int:
+    """
+    Return the bit index (0 to 51) of a card as integer.
+    """
+
+    return card.ordinal
+
+
+def card_bit(card: Card) -> int:
+    """
+    Return the single bit mask of a card as integer.
+    """
+
+    return 1 << card.ordinal
+
+
+def card_from_index(index: int) -> Card:
+    """
+    Return the card represented by a bit index.
+    """
+
+    return Card.from_index(index)
+
+
+def mask_from_cards(cards: list[Card]) -> int:
+    """
+    Takes in a list of cards.
+    Return the bitboard holding all of the cards as integer.
+    """
+
+    mask = 0
+    for card in cards:
+        mask |= 1 << card.ordinal
+    return mask
+
+
+def cards_from_mask(mask: int) -> list[Card]:
+    """
+    Takes in a bitboard.
+    Return the cards in the mask as a list in ascending order.
+    """
+
+    cards = []
+    while mask:
+        low_bit = mask & -mask
+        cards.append(Card.from_index(low_bit.bit_length() - 1))
+        mask ^= low_bit
+    return cards
+
+
+def suit_mask(mask: int, suit: Suit) -> int:
+    """
+    Return the part of a bitboard that is in the given suit as integer.
+    """
+
+    return mask & SUIT_MASKS[suit.value]
+
+
+def suit_count(mask: int, suit: Suit) -> int:
+    """
+    Return the number of cards of a suit in a bitboard as integer.
+    """
+
+    return popcount(mask & SUIT_MASKS[suit.value])
+
+
+def lowest_index(mask: int) -> int:
+    """
+    Return the bit index of the lowest card in a non-empty bitboard.
+    Raise ValueError for an empty bitboard.
+    """
+
+    if not mask:
+        raise ValueError("An empty bitboard has no lowest card")
+    return (mask & -mask).bit_length() - 1
+
+
+def highest_index(mask: int) -> int:
+    """
+    Return the bit index of the highest card in a non-empty bitboard.
+    Raise ValueError for an empty bitboard.
+    """
+
+    if not mask:
+        raise ValueError("An empty bitboard has no highest card")
+    return mask.bit_length() - 1
+
+
+def legal_mask(hand_mask: int, lead_suit: int, broken_hearts: bool) -> int:
+    """
+    Takes in a hand, the suit value of the leading card (None when leading)
+    and if hearts broken (bool).
+    Following the rules of Player.check_valid_play:
+    - a follower must play the leading suit if they have it
+    - the leader must play Two of Clubs if they have it
+    - the leader can not play hearts before hearts are broken,
+      unless they only have hearts
+    Return the bitboard of every card that is valid to play.
+    """
+
+    if lead_suit is not None:
+        return hand_mask & SUIT_MASKS[lead_suit] or hand_mask
+
+    if hand_mask & TWO_OF_CLUBS_BIT:
+        return TWO_OF_CLUBS_BIT
+
+    if broken_hearts:
+        return hand_mask
+
+    return hand_mask & NON_HEARTS_MASK or hand_mask
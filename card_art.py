@@ -0,0 +1,99 @@
+from __future__ import annotations
+from cards import Card
+
+
+def index_label(number: int) -> str:
+    """
+    Return the label printed below a card of a pretty hand,
+    right aligned under the card (e.g. "   1   ").
+    """
+
+    return " " * (4 - len(str(number))) + str(number) + "   "
+
+
+def render_cards(cards: list[Card], numbered: bool = False) -> str:
+    """
+    Takes in a list of cards.
+    Combine the art of the cards (see Card.art_lines) horizontally, with a
+    row of their numbers (starting from 1) below when numbered.
+    Return the combined art as a string.
+    """
+
+    art = "\n".join("".join(line) for line in zip(*[card.art_lines()
+                                                    for card in cards]))
+    if numbered:
+        art += "\n" + "".join(index_label(i + 1) for i in range(len(cards)))
+    return art
+
+
+class HandRenderer:
+    """
+    DESCRIPTION:
+        Renders a hand (see render_cards) and keeps the rows of the last
+        render. The next pretty hand only re-renders from the first card
+        that changed: the rows before it are reused (every card art has
+        the same width), so playing the last cards of a hand, or showing
+        the same hand again, costs little.
+
+    ATTRIBUTES:
+        cards: list of Cards, the cards of the last render
+        renders: int, the number of renders
+        reused: int, the number of card arts taken from the last render
+    """
+
+    cards: list[Card]
+    renders: int
+    reused: int
+
+    def __init__(self) -> None:
+        """
+        Initialise a renderer without a last render.
+        """
+
+        self.cards = []
+        self.renders = 0
+        self.reused = 0
+        self._style = None
+        self._rows = []
+        self._labels = [""]
+
+    def render(self, cards: list[Card], numbered: bool = False) -> str:
+        """
+        Takes in a list of cards.
+        Return their combined art (see render_cards).
+        """
+
+        self.renders += 1
+        style = bool(Card.settings["pretty_print"])
+        old = self.cards
+        same = 0
+        if style and self._style and self._rows:
+            limit = min(len(old), len(cards))
+            while same < limit and old[same] is cards[same]:
+                same += 1
+        self.reused += same
+
+        if same:
+            # the art of the unchanged cards is the start of every row
+            width = len(self._rows[0]) // len(old)
+            head = [row[:same * width] for row in self._rows]
+        else:
+            head = None
+        tail = [card.art_lines() for card in cards[same:]]
+        if head is None:
+            rows = ["".join(line) for line in zip(*tail)]
+        elif tail:
+            rows = [head[i] + "".join(line[i] for line in tail)
+                    for i in range(len(head))]
+        else:
+            rows = head
+
+        self.cards = list(cards)
+        self._style = style
+        self._rows = rows
+        if not numbered:
+            return "\n".join(rows)
+        while len(self._labels) <= len(cards):
+            self._labels.append(self._labels[-1]
+                                + index_label(len(self._labels)))
+        return "\n".join(rows) + "\n" + self._labels[len(cards)]
@@ -0,0 +1,195 @@
+from __future__ import annotations
+import random
+from bitboard import (HEARTS_MASK, QUEEN_OF_SPADES_BIT, mask_from_cards,
+                      popcount)
+from cards import Card
+from dealing import generate_deck
+
+# attempts at a deal that respects every known void before ignoring them
+SAMPLE_ATTEMPTS = 20
+
+
+class CardTracker:
+    """
+    DESCRIPTION:
+        What one player has seen of a round: the cards it passed (held by
+        the receiving player until they are played), the cards played,
+        the suits each player has shown to be void in (by not following
+        the leading suit) and the points each player took.
+        Used to sample the hidden hands of the other players so that they
+        fit everything observed.
+
+    ATTRIBUTES:
+        seat: int, the index of the observing player
+        player_count: int, the number of players
+        deck_mask: int, bitboard of the deck in play
+        played_mask: int, bitboard of the cards of completed tricks
+        known: list of int, for each player a bitboard of the cards they
+          are known to hold (the cards passed to them by the observer)
+        voids: list of int, for each player a bit set of the suit values
+          they are known to be void in
+        round_scores: list of int, the points each player took so far
+        tricks_played: int, the number of completed tricks
+
+    OPERATIONS AVAILABLE:
+        start_round() to reset, observe_pass() for the cards passed,
+        observe_trick() after every trick, sample() to draw the hidden
+        hands
+    """
+
+    seat: int
+    player_count: int
+    deck_mask: int
+    played_mask: int
+    known: list[int]
+    voids: list[int]
+    round_scores: list[int]
+    tricks_played: int
+
+    def __init__(self, seat: int = 0, player_count: int = 4) -> None:
+        """
+        Initialise the tracker for the start of a round.
+        """
+
+        self.start_round(seat, player_count)
+
+    def start_round(self, seat: int, player_count: int) -> None:
+        """
+        Forget the previous round.
+        """
+
+        self.seat = seat
+        self.player_count = player_count
+        self.deck_mask = mask_from_cards(generate_deck(player_count))
+        self.played_mask = 0
+        self.known = [0] * player_count
+        self.voids = [0] * player_count
+        self.round_scores = [0] * player_count
+        self.tricks_played = 0
+
+    def observe_pass(self, target: int, cards: list[Card]) -> None:
+        """
+        Takes in the index of the player the observer passed cards to and
+        the cards passed.
+        Record that the player holds them.
+        """
+
+        self.known[target] |= mask_from_cards(cards)
+
+    def observe_trick(self, trick: list[Card], leader: int,
+                      taker: int) -> None:
+        """
+        Takes in a complete trick, the index of its leader and of its taker.
+        Record the cards, the voids shown and the points taken.
+        """
+
+        ordinals = [card.ordinal for card in trick]
+        self._observe_voids(ordinals, leader, self.voids)
+        points = 0
+        for card in ordinals:
+            bit = 1 << card
+            self.played_mask |= bit
+            if bit & HEARTS_MASK:
+                points += 1
+            elif bit & QUEEN_OF_SPADES_BIT:
+                points += 13
+        self.round_scores[taker] += points
+        self.tricks_played += 1
+        for seat in range(self.player_count):
+            self.known[seat] &= ~self.played_mask
+
+    def _observe_voids(self, trick: list[int], leader: int,
+                       voids: list[int]) -> None:
+        """
+        Mark the players of a (possibly incomplete) trick who did not
+        follow the leading suit as void in it.
+        """
+
+        lead_suit = trick[0] // 13
+        for i in range(1, len(trick)):
+            if trick[i] // 13 != lead_suit:
+                voids[(leader + i) % self.player_count] |= 1 << lead_suit
+
+    def sample(self, rng: random.Random, hand_mask: int, trick: list[int],
+               leader: int) -> list[int]:
+        """
+        Takes in a random stream, the observer's hand (bitboard), the
+        ordinals of the current trick and the index of its leader.
+        Give the other players the cards they are known to hold and deal
+        the rest of the unseen cards so that everyone holds the right
+        number of cards and nobody gets a suit they are void in.
+        When no such deal is found after a few attempts the voids are
+        ignored, and the known cards are ignored when a player would hold
+        too many (only possible if the observations are inconsistent).
+        Return the hands of every player as bitboards.
+        """
+
+        player_count = self.player_count
+        voids = list(self.voids)
+        if trick:
+            self._observe_voids(trick, leader, voids)
+
+        # the players who already played in this trick hold one card less
+        hand_size = popcount(hand_mask)
+        counts = [hand_size] * player_count
+        for i in range(len(trick)):
+            counts[(leader + i) % player_count] -= 1
+        counts[self.seat] = 0
+
+        unseen = self.deck_mask & ~self.played_mask & ~hand_mask
+        for card in trick:
+            unseen &= ~(1 << card)
+
+        # the passed cards not played yet stay with their receiver
+        fixed = [known & unseen for known in self.known]
+        fixed[self.seat] = 0
+        if all(popcount(fixed[seat]) <= counts[seat]
+               for seat in range(player_count)):
+            for seat in range(player_count):
+                counts[seat] -= popcount(fixed[seat])
+                unseen &= ~fixed[seat]
+        else:
+            fixed = [0] * player_count
+        cards = [card for card in range(52) if unseen >> card & 1]
+
+        others = [seat for seat in range(player_count) if seat != self.seat]
+        for _ in range(SAMPLE_ATTEMPTS):
+            hands = self._deal(rng, cards, counts, voids, others, fixed)
+            if hands is not None:
+                break
+        else:
+            hands = self._deal(rng, cards, counts, [0] * player_count,
+                               others, fixed)
+
+        hands[self.seat] = hand_mask
+        return hands
+
+    def _deal(self, rng: random.Random, cards: list[int], counts: list[int],
+              voids: list[int], others: list[int],
+              fixed: list[int]) -> list[int]:
+        """
+        Deal cards at random on top of the fixed cards of each player, the
+        cards with the fewest possible holders first, each to a player
+        with room picked in proportion to the room left.
+        Return the hands as bitboards, or None on a dead end.
+        """
+
+        hands = list(fixed)
+        left = list(counts)
+        holders = {}
+        for card in cards:
+            suit_bit = 1 << (card // 13)
+            holders[card] = [seat for seat in others
+                             if not voids[seat] & suit_bit]
+
+        order = list(cards)
+        rng.shuffle(order)
+        order.sort(key=lambda card: len(holders[card]))
+        for card in order:
+            seats = [seat for seat in holders[card] if left[seat]]
+            if not seats:
+                return None
+            seat = rng.choices(seats, [left[seat] for seat in seats])[0]
+            hands[seat] |= 1 << card
+            left[seat] -= 1
+        return hands
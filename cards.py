@@ -70,33 +70,71 @@ class Card:
         A card that can be found in a regular set of playing card.
         Only capable of general cards (rank and number),
         and incapable of special cards (Joker cards).
+        Cards are interned: there is exactly one object for each of the
+        52 cards, Card(rank, suit) returns the existing object.
 
     ATTRIBUTES:
         rank: the rank of the card representing
         suit: the suit of the card representing
+        ordinal: int, suit * 13 + (rank - 2), the position of the card
+          in a sorted deck (0 to 51), used for ordering, equality and hashing
         settings: STATIC, a dictionary for card settings across all cards.
           - pretty_print: bool, pretty text art when copnverting to str.
 
     OPERATIONS AVAILABLE:
         The less than order comparison operator (>) to compare between cards.
         The equality comparison operator (==) to compare between cards.
+        The hash() function, so cards can be used in sets and as dict keys.
         The repr or str conversion to convert into readable format.
+        art_lines() to get the lines of the str conversion.
+        (Both styles of every card are rendered once, when the module is
+        loaded)
     """
 
+    __slots__ = ("rank", "suit", "ordinal")
+
     # static variable for settings
     settings: bool = {
         "pretty_print": False
     }
     rank: Rank
     suit: Suit
+    ordinal: int
+
+    def __new__(cls, rank: Rank, suit: Suit) -> Card:
+        """
+        Return the interned card with rank and suit.
+        (_value_ is read directly to skip the Enum value property)
+        """
 
-    def __init__(self, rank: Rank, suit: Suit) -> None:
+        return _CARDS[suit._value_ * 13 + rank._value_ - 2]
+
+    @staticmethod
+    def of(rank: Rank, suit: Suit) -> Card:
         """
-        Initialise the object with rank and suit.
+        Return the interned card with rank and suit.
+        (Same as Card(rank, suit))
         """
 
-        self.rank = rank
-        self.suit = suit
+        return _CARDS[suit._value_ * 13 + rank._value_ - 2]
+
+    @staticmethod
+    def from_index(index: int) -> Card:
+        """
+        Return the interned card with the given ordinal (0 to 51).
+        Raise ValueError for an ordinal out of range.
+        """
+
+        if not 0 <= index < 52:
+            raise ValueError(f"No card has the ordinal {index}")
+        return _CARDS[index]
+
+    def __reduce__(self) -> tuple:
+        """
+        Pickle a card as its ordinal so unpickling returns the interned card.
+        """
+
+        return Card.from_index, (self.ordinal,)
 
     def __repr__(self) -> str:
         """
@@ -129,7 +167,24 @@ class Card:
         (the __repr__() invokes this method).
         """
 
-        if not Card.settings["pretty_print"]:
+        return _RENDERED[bool(Card.settings["pretty_print"])][self.ordinal]
+
+    def art_lines(self) -> tuple[str]:
+        """
+        Return the lines of the str conversion as a tuple
+        (one line unless pretty_print is enabled).
+        """
+
+        return _RENDERED_LINES[bool(Card.settings["pretty_print"])][
+            self.ordinal]
+
+    def _render(self, pretty: bool) -> str:
+        """
+        Takes in if the art should be pretty.
+        Return the str conversion of the card in that style.
+        """
+
+        if not pretty:
             return f"{self.rank.name} of {self.suit.name}"
 
         suit_symbols = {
@@ -176,22 +231,54 @@ class Card:
     def __eq__(self, other: Card) -> bool:
         """
         Override the == operator.
-        Compare suit and rank if they are equivalent.
+        Compare suit and rank if they are equivalent (by ordinal).
         Return result as boolean.
         """
 
-        return self.rank == other.rank and self.suit == other.suit
+        return self.ordinal == other.ordinal
+
+    def __hash__(self) -> int:
+        """
+        Override the hash() function.
+        Return the ordinal of the card.
+        """
+
+        return self.ordinal
 
     def __lt__(self, other: Card) -> bool:
         """
         Override the < operator.
         Compare suit, if suit is the same, compare rank.
+        (the ordinal orders by suit first, then rank)
         Return result as boolean.
         """
 
-        # If same suit, compare rank
-        if self.suit == other.suit:
-            return self.rank < other.rank
+        return self.ordinal < other.ordinal
+
+    def __gt__(self, other: Card) -> bool:
+        """
+        Override the > operator.
+        Compare suit, if suit is the same, compare rank.
+        Return result as boolean.
+        """
 
-        # if different suit, compare suit
-        return self.suit < other.suit
\ No newline at end of file
+        return self.ordinal > other.ordinal
+
+
+# the table of interned cards, in ordinal order
+_CARDS: list[Card] = []
+for _suit in Suit:
+    for _rank in Rank:
+        _card = object.__new__(Card)
+        _card.rank = _rank
+        _card.suit = _suit
+        _card.ordinal = len(_CARDS)
+        _CARDS.append(_card)
+del _suit, _rank, _card
+
+# the str conversion of every card by style (plain, pretty) and ordinal,
+# and the same split into lines
+_RENDERED = tuple(tuple(card._render(pretty) for card in _CARDS)
+                  for pretty in (False, True))
+_RENDERED_LINES = tuple(tuple(tuple(text.split("\n")) for text in style)
+                        for style in _RENDERED)
@@ -0,0 +1,258 @@
+from __future__ import annotations
+import argparse
+import random
+from math import comb
+from time import perf_counter
+from cards import Card, Rank, Suit
+from player import Player
+
+
+def generate_deck(player_count: int) -> list[Card]:
+    """
+    Generate a deck based on player_count.
+    Remove specific cards if the necessary.
+    Return the list of cards unshuffled.
+    """
+
+    deck = [Card(rank, suit) for suit in Suit for rank in Rank]
+
+    # remove cards based on game settings
+    if player_count == 5:
+        deck.remove(Card(Rank.Two, Suit.Diamonds))
+        deck.remove(Card(Rank.Two, Suit.Spades))
+
+    if player_count == 3:
+        deck.remove(Card(Rank.Two, Suit.Diamonds))
+
+    return deck
+
+
+def is_penalty_card(card: Card) -> bool:
+    """
+    Return True if the card is a heart or Queen of Spades,
+    the cards that can not make a hand valid on their own.
+    """
+
+    return card.suit == Suit.Hearts or (card.suit == Suit.Spades
+                                        and card.rank == Rank.Queen)
+
+
+def validate_card_segment(cards: list[Card]) -> bool:
+    """
+    Validate if a segment is valid for a player to receive as hand cards,
+    a segment is only invalid when it holds nothing but hearts and
+    Queen of Spades.
+    Return the result as a boolean.
+    """
+
+    for card in cards:
+        # if encounter atleast one non-heart card, return True
+        if not is_penalty_card(card):
+            return True
+
+    return False
+
+
+class DealSampler:
+    """
+    DESCRIPTION:
+        Deals valid hands for a player count without ever reshuffling.
+        A deal is valid when every hand holds at least one "safe" card
+        (not a heart or Queen of Spades).
+
+        The number of deals where player i gets k_i safe cards is
+        proportional to the product of comb(hand_size, k_i), so the
+        sampler first draws the safe card counts (every count at least 1)
+        with those weights, using a table of suffix sums, then deals
+        shuffled safe and penalty cards by the counts.
+        The result is uniform over valid deals, the same distribution as
+        reshuffling until valid.
+
+    ATTRIBUTES:
+        player_count: int, the number of players dealt to
+        hand_size: int, the number of cards in each hand
+        safe_cards: tuple of Cards, cards of the deck that are not penalty
+          cards
+        penalty_cards: tuple of Cards, hearts and Queen of Spades
+        weights: list of int, weights[k] = comb(hand_size, k)
+        ways: list of list of int, ways[i][r] is the weighted number of
+          ways players i and after can share r safe cards
+        legacy_rejection_rate: float, the probability that a plain shuffle
+          is an invalid deal
+        deals: int, the number of deals sampled
+
+    OPERATIONS AVAILABLE:
+        deal() to get the hands of a valid deal,
+        expected_legacy_rejections() to get how many reshuffles the
+        reshuffle until valid method would have needed on average
+    """
+
+    player_count: int
+    hand_size: int
+    safe_cards: tuple[Card]
+    penalty_cards: tuple[Card]
+    weights: list[int]
+    ways: list[list[int]]
+    legacy_rejection_rate: float
+    deals: int
+
+    def __init__(self, player_count: int) -> None:
+        """
+        Build the deck template and the table of count weights.
+        """
+
+        deck = generate_deck(player_count)
+        self.player_count = player_count
+        self.hand_size = len(deck) // player_count
+        self.safe_cards = tuple(card for card in deck
+                                if not is_penalty_card(card))
+        self.penalty_cards = tuple(card for card in deck
+                                   if is_penalty_card(card))
+        self.deals = 0
+
+        safe_count = len(self.safe_cards)
+        self.weights = weights = [comb(self.hand_size, k)
+                                  for k in range(self.hand_size + 1)]
+        # the last row: no players left, only 0 safe cards can be shared
+        self.ways = [[0] * (safe_count + 1)
+                     for _ in range(player_count + 1)]
+        self.ways[player_count][0] = 1
+        for i in range(player_count - 1, -1, -1):
+            for remaining in range(safe_count + 1):
+                self.ways[i][remaining] = sum(
+                    weights[k] * self.ways[i + 1][remaining - k]
+                    for k in range(1, min(self.hand_size, remaining) + 1))
+
+        valid_deals = self.ways[0][safe_count]
+        all_deals = comb(len(deck), safe_count)
+        self.legacy_rejection_rate = 1 - valid_deals / all_deals
+
+    def deal(self, rng: random.Random = random) -> list[list[Card]]:
+        """
+        Sample a valid deal with rng.
+        Return the hands as a list of list of Cards, one list per player.
+        """
+
+        safe_cards = list(self.safe_cards)
+        penalty_cards = list(self.penalty_cards)
+        rng.shuffle(safe_cards)
+        rng.shuffle(penalty_cards)
+
+        hands = []
+        remaining = len(safe_cards)
+        safe_start = penalty_start = 0
+        for i in range(self.player_count):
+            # pick the safe card count k with weight
+            # comb(hand_size, k) * ways[i + 1][remaining - k]
+            pick = rng.randrange(self.ways[i][remaining])
+            k = 1
+            while True:
+                weight = self.weights[k] * self.ways[i + 1][remaining - k]
+                if pick < weight:
+                    break
+                pick -= weight
+                k += 1
+
+            hand = (safe_cards[safe_start:safe_start + k]
+                    + penalty_cards[penalty_start:
+                                    penalty_start + self.hand_size - k])
+            rng.shuffle(hand)
+            hands.append(hand)
+            safe_start += k
+            penalty_start += self.hand_size - k
+            remaining -= k
+
+        self.deals += 1
+        return hands
+
+    def expected_legacy_rejections(self) -> float:
+        """
+        Return the expected number of invalid shuffles the reshuffle until
+        valid method would have thrown away for the deals sampled so far.
+        """
+
+        valid_rate = 1 - self.legacy_rejection_rate
+        return self.deals * self.legacy_rejection_rate / valid_rate
+
+
+# one sampler (deck template and weight table) per player count
+_samplers: dict[int, DealSampler] = {}
+
+
+def get_sampler(player_count: int) -> DealSampler:
+    """
+    Return the cached DealSampler for a player count,
+    creating it on first use.
+    """
+
+    sampler = _samplers.get(player_count)
+    if sampler is None:
+        sampler = _samplers[player_count] = DealSampler(player_count)
+    return sampler
+
+
+def deal_hands(players: list[Player], rng: random.Random = random) -> None:
+    """
+    Deal a valid deal, sampled with rng, to players evenly.
+    The player will hold the cards after this function.
+    """
+
+    hands = get_sampler(len(players)).deal(rng)
+    for i in range(len(players)):
+        players[i].hand = hands[i]
+
+
+def legacy_deal(player_count: int,
+                rng: random.Random = random) -> tuple[list[list[Card]], int]:
+    """
+    Deal by reshuffling the whole deck until every segment is valid,
+    the method used before DealSampler.
+    Return the hands and the number of rejected shuffles.
+    """
+
+    rejections = 0
+    while True:
+        cards = generate_deck(player_count)
+        rng.shuffle(cards)
+        hand_size = len(cards) // player_count
+        hands = [cards[i * hand_size:(i + 1) * hand_size]
+                 for i in range(player_count)]
+        if all(validate_card_segment(hand) for hand in hands):
+            return hands, rejections
+        rejections += 1
+
+
+def main(argv: list[str] = None) -> None:
+    """
+    Compare DealSampler with reshuffling until valid for each player count.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Compare the deal sampler with reshuffling until valid.")
+    parser.add_argument("--deals", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for player_count in (3, 4, 5):
+        rng = random.Random(args.seed)
+        start = perf_counter()
+        rejections = 0
+        for _ in range(args.deals):
+            rejections += legacy_deal(player_count, rng)[1]
+        legacy_time = perf_counter() - start
+
+        sampler = get_sampler(player_count)
+        start = perf_counter()
+        for _ in range(args.deals):
+            sampler.deal(rng)
+        sampler_time = perf_counter() - start
+
+        print(f"{player_count} players: reshuffle {legacy_time:.2f}s"
+              + f" ({rejections} rejections), sampler {sampler_time:.2f}s"
+              + f" (expected rejections avoided:"
+              + f" {sampler.expected_legacy_rejections():.1f},"
+              + f" rate {sampler.legacy_rejection_rate:.3e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+from __future__ import annotations
+import argparse
+import random
+from time import perf_counter
+from cards import Suit
+from bitboard import SUIT_SIZE, legal_mask, lowest_index
+
+HEARTS = Suit.Hearts.value
+SUIT_BITS = (1 << SUIT_SIZE) - 1
+# index of FOLLOW: hearts lead flag, our cards of the leading suit
+# (13 bits), rank index of the highest card of the leading suit
+# in the trick (4 bits)
+TOP_BITS = 4
+HEARTS_LEAD_SHIFT = SUIT_SIZE + TOP_BITS
+
+
+def _highest_rank(bits: int) -> int:
+    """
+    Return the rank index of the highest card of a non-empty suit mask.
+    """
+
+    return bits.bit_length() - 1
+
+
+def _lowest_rank(bits: int) -> int:
+    """
+    Return the rank index of the lowest card of a non-empty suit mask.
+    """
+
+    return (bits & -bits).bit_length() - 1
+
+
+def compile_tables() -> tuple[bytes, bytes]:
+    """
+    Compile the rules BetterAIPlayer follows over the cards of one suit:
+    - FOLLOW: the rank index to play when following with cards of the
+      leading suit, for every set of cards of the suit, highest card of
+      the suit in the trick and if hearts lead
+    - HIGHEST: the rank index of the highest card of every set of cards
+      (the heart to play when void in the leading suit)
+    Return FOLLOW and HIGHEST.
+    """
+
+    follow = bytearray(2 << HEARTS_LEAD_SHIFT)
+    highest = bytearray(1 << SUIT_SIZE)
+    for bits in range(1, 1 << SUIT_SIZE):
+        high = _highest_rank(bits)
+        low = _lowest_rank(bits)
+        highest[bits] = high
+        for top in range(SUIT_SIZE):
+            below = bits & ((1 << top) - 1)
+            index = bits << TOP_BITS | top
+            if below == bits:
+                # every card is lower than the highest card, play the lowest
+                follow[index] = follow[index | 1 << HEARTS_LEAD_SHIFT] = low
+            elif below:
+                # the highest card lower than the highest card
+                follow[index] = follow[index | 1 << HEARTS_LEAD_SHIFT] = (
+                    _highest_rank(below))
+            else:
+                # every card is higher: the lowest card,
+                # the highest heart when hearts lead
+                follow[index] = low
+                follow[index | 1 << HEARTS_LEAD_SHIFT] = high
+    return bytes(follow), bytes(highest)
+
+
+FOLLOW, HIGHEST = compile_tables()
+
+
+def compiled_policy(hand: int, trick: list[int], hearts_broken: bool) -> int:
+    """
+    Takes in a hand (bitboard), the ordinals of the current trick and if
+    hearts broken (bool).
+    Play like BetterAIPlayer.play_card (see rollout.better_policy) with
+    the compiled tables.
+    Return the ordinal of the card.
+    """
+
+    if not trick:
+        return lowest_index(legal_mask(hand, None, hearts_broken))
+
+    suit = trick[0] // SUIT_SIZE
+    base = suit * SUIT_SIZE
+    bits = hand >> base & SUIT_BITS
+    if bits:
+        top = trick[0]
+        for card in trick:
+            if card > top and card // SUIT_SIZE == suit:
+                top = card
+        return base + FOLLOW[(suit == HEARTS) << HEARTS_LEAD_SHIFT
+                             | bits << TOP_BITS | top - base]
+
+    hearts = hand >> HEARTS * SUIT_SIZE
+    if hearts:
+        return HEARTS * SUIT_SIZE + HIGHEST[hearts]
+    return lowest_index(hand)
+
+
+def random_state(rng: random.Random) -> tuple[int, list[int], bool]:
+    """
+    Return a random hand (bitboard), trick (ordinals) and if hearts
+    broken, with the hand and the trick drawn from a 3, 4 or 5 player
+    deck.
+    """
+
+    # local import, the deck is only needed by the harness
+    from dealing import generate_deck
+
+    player_count = rng.choice((3, 4, 5))
+    deck = [card.ordinal for card in generate_deck(player_count)]
+    rng.shuffle(deck)
+    hand_size = rng.randint(1, len(deck) // player_count)
+    trick_size = rng.randrange(player_count)
+    hand = 0
+    for card in deck[:hand_size]:
+        hand |= 1 << card
+    trick = deck[hand_size:hand_size + trick_size]
+    return hand, trick, rng.random() < 0.5
+
+
+def find_mismatches(states: list[tuple[int, list[int], bool]]
+                    ) -> list[tuple[int, list[int], bool, int, int]]:
+    """
+    Takes in states made by random_state().
+    Play every state with BetterAIPlayer.play_card, rollout.better_policy
+    and the compiled policy.
+    Return (hand, trick, hearts broken, interpreted card, compiled card)
+    for every state where they do not play the same card.
+    """
+
+    # local imports, the players are only needed by the harness
+    from better_ai import BetterAIPlayer
+    from bitboard import cards_from_mask
+    from cards import Card
+    from rollout import better_policy
+
+    mismatches = []
+    for hand, trick, hearts_broken in states:
+        player = BetterAIPlayer("Check")
+        player.hand = cards_from_mask(hand)
+        interpreted = player.play_card(
+            [Card.from_index(card) for card in trick], hearts_broken).ordinal
+        compiled = compiled_policy(hand, trick, hearts_broken)
+        if (compiled != interpreted
+                or compiled != better_policy(hand, trick, hearts_broken)):
+            mismatches.append((hand, trick, hearts_broken, interpreted,
+                               compiled))
+    return mismatches
+
+
+def main(argv: list[str] = None) -> None:
+    """
+    Check that the compiled policy plays the same card as
+    BetterAIPlayer.play_card and rollout.better_policy on random states,
+    and print the mismatches and the timings.
+    """
+
+    # local import, the policy is only needed by the harness
+    from rollout import better_policy
+
+    parser = argparse.ArgumentParser(
+        description="Check the compiled BetterAIPlayer policy.")
+    parser.add_argument("--states", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    states = [random_state(rng) for _ in range(args.states)]
+    mismatches = find_mismatches(states)
+    for hand, trick, hearts_broken, interpreted, compiled in mismatches[:10]:
+        print(f"mismatch: hand {hand:#x}, trick {trick},"
+              + f" hearts broken {hearts_broken}: interpreted"
+              + f" {interpreted}, compiled {compiled}")
+    print(f"{len(states)} states, {len(mismatches)} mismatches")
+
+    for name, policy in (("interpreted", better_policy),
+                         ("compiled", compiled_policy)):
+        start = perf_counter()
+        for hand, trick, hearts_broken in states:
+            policy(hand, trick, hearts_broken)
+        elapsed = perf_counter() - start
+        print(f"{name}: {len(states) / elapsed:,.0f} decisions/s")
+    if mismatches:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+from __future__ import annotations
+import argparse
+import mmap
+import os
+import random
+import struct
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+from time import perf_counter
+from bitboard import QUEEN_OF_SPADES_BIT, lowest_index
+from game_state import GameState
+from solver import Solver, random_position
+
+QUEEN_OF_SPADES = lowest_index(QUEEN_OF_SPADES_BIT)
+# file layout: magic, entry count, the sorted keys (8 bytes each),
+# then the values (1 byte each) in the same order
+ENDGAME_MAGIC = b"HEG1"
+ENDGAME_HEADER = struct.Struct("<4sI")
+
+
+def canonical_key(seat: int, hands: list[int], leader: int,
+                  trick: list[int], hearts_broken: bool,
+                  round_scores: list[int]) -> int:
+    """
+    Takes in the seat the value is for and a position (see Solver.solve).
+    Encode the position so that positions with the same solution get the
+    same key:
+    - seats are counted from the leader of the current trick
+    - only the order of the cards left in a suit matters, so each card is
+      replaced by its rank among the cards of its suit still in play
+      (with the position of Queen of Spades kept)
+    Return the 64-bit key.
+    """
+
+    player_count = len(hands)
+    holder = {}
+    for other in range(player_count):
+        hand = hands[other]
+        while hand:
+            card = lowest_index(hand)
+            hand &= hand - 1
+            holder[card] = (other - leader) % player_count
+    for i in range(len(trick)):
+        holder[trick[i]] = player_count + i
+
+    suits = []
+    queen = -1
+    for suit in range(4):
+        cards = sorted(card for card in holder if card // 13 == suit)
+        if QUEEN_OF_SPADES in cards:
+            queen = cards.index(QUEEN_OF_SPADES)
+        suits.append(tuple(holder[card] for card in cards))
+
+    scores = tuple(round_scores[(leader + i) % player_count]
+                   for i in range(player_count))
+    data = repr((player_count, (seat - leader) % player_count,
+                 hearts_broken, 0 in holder, scores, queen, suits))
+    digest = blake2b(data.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class EndgameCache:
+    """
+    DESCRIPTION:
+        The exact values of endgame positions (see Solver), cached by
+        canonical_key so a position is solved once.
+        A cache can be saved to a file of sorted keys and values, which
+        is memory mapped read-only when opened: pool workers opening the
+        same file share its pages. Positions missing from the file are
+        solved and kept in memory, save() merges them into the file.
+
+    ATTRIBUTES:
+        path: str or None, the file of the cache
+        max_tricks: int, positions with more cards in a hand are not
+          covered
+        hits, misses: int, lookups found in the cache and solved
+
+    OPERATIONS AVAILABLE:
+        covers() to check the hand size, value() for the value of a
+        seat, best_move() for the move of the player to play,
+        len() to get the number of entries, save(), close()
+    """
+
+    path: str
+    max_tricks: int
+    hits: int
+    misses: int
+
+    def __init__(self, path: str = None, max_tricks: int = 3,
+                 solver: Solver = None) -> None:
+        """
+        Open the cache file if it exists.
+        """
+
+        self.path = path
+        self.max_tricks = max_tricks
+        self.hits = 0
+        self.misses = 0
+        self._solver = solver if solver is not None else Solver(1 << 16)
+        self._new = {}
+        self._file = None
+        self._map = None
+        self._keys = ()
+        self._values = b""
+        if path is not None and os.path.exists(path):
+            self._open(path)
+
+    def _open(self, path: str) -> None:
+        """
+        Memory map a cache file.
+        Raise ValueError if it is not one.
+        """
+
+        file = open(path, "rb")
+        mapping = None
+        try:
+            size = os.fstat(file.fileno()).st_size
+            if size < ENDGAME_HEADER.size:
+                raise ValueError(f"{path} is not an endgame cache")
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count = ENDGAME_HEADER.unpack_from(mapping)
+            end = ENDGAME_HEADER.size + count * 9
+            if magic != ENDGAME_MAGIC or size != end:
+                raise ValueError(f"{path} is not an endgame cache")
+        except BaseException:
+            if mapping is not None:
+                mapping.close()
+            file.close()
+            raise
+        self._file = file
+        self._map = mapping
+        view = memoryview(self._map)
+        self._keys = view[ENDGAME_HEADER.size:end - count].cast("Q")
+        self._values = view[end - count:end]
+
+    def __len__(self) -> int:
+        """
+        Return the number of entries.
+        """
+
+        return len(self._keys) + len(self._new)
+
+    def covers(self, hand_size: int) -> bool:
+        """
+        Return if positions where the player to play holds hand_size
+        cards are small enough for the cache.
+        """
+
+        return hand_size <= self.max_tricks
+
+    def value(self, seat: int, hands: list[int], leader: int,
+              trick: list[int], hearts_broken: bool,
+              round_scores: list[int]) -> int:
+        """
+        Takes in a seat and a position (see Solver.solve).
+        Return the score change of the seat, from the cache or solved and
+        added to it (with the values of every other seat, which the same
+        search gives).
+        """
+
+        key = canonical_key(seat, hands, leader, trick, hearts_broken,
+                            round_scores)
+        value = self._new.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        keys = self._keys
+        index = bisect_left(keys, key)
+        if index < len(keys) and keys[index] == key:
+            self.hits += 1
+            return self._values[index]
+
+        self.misses += 1
+        values = self._solver.solve(hands, leader, trick, hearts_broken,
+                                    round_scores)
+        for other in range(len(hands)):
+            if other != seat:
+                self._new[canonical_key(other, hands, leader, trick,
+                                        hearts_broken, round_scores)] = (
+                    values[other])
+        self._new[key] = values[seat]
+        return values[seat]
+
+    def best_move(self, hands: list[int], leader: int, trick: list[int],
+                  hearts_broken: bool,
+                  round_scores: list[int]) -> tuple[int, int]:
+        """
+        Takes in a position (see Solver.solve).
+        Find the valid card of the player to play with the lowest value
+        for them (the lowest card on a tie).
+        Return the ordinal of the card and its value.
+        """
+
+        seat = (leader + len(trick)) % len(hands)
+        state = GameState(hands, leader, trick, hearts_broken, round_scores)
+        legal = state.legal_moves()
+        best_move = -1
+        best_value = 0
+        while legal:
+            move = lowest_index(legal)
+            legal &= legal - 1
+            state.apply(move)
+            value = self.value(seat, state.hands, state.leader, state.trick,
+                               state.hearts_broken, state.round_scores)
+            state.undo()
+            if best_move < 0 or value < best_value:
+                best_move = move
+                best_value = value
+        return best_move, best_value
+
+    def save(self, path: str = None) -> None:
+        """
+        Write every entry, from the file and solved since, sorted by key
+        to path (the cache's own file when None) and map the new file.
+        Raise ValueError when neither path nor the cache has a file.
+        """
+
+        path = path if path is not None else self.path
+        if path is None:
+            raise ValueError("The cache has no file, give a path to save to")
+        entries = dict(zip(self._keys, self._values))
+        entries.update(self._new)
+        keys = array("Q", sorted(entries))
+        values = bytes(entries[key] for key in keys)
+
+        # write next to the target and rename, readers keep the old file
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(ENDGAME_HEADER.pack(ENDGAME_MAGIC, len(keys)))
+            file.write(keys.tobytes())
+            file.write(values)
+        self.close()
+        os.replace(temporary, path)
+        self.path = path
+        self._new = {}
+        self._open(path)
+
+    def close(self) -> None:
+        """
+        Unmap the cache file, the entries solved since saving are kept.
+        """
+
+        if self._map is not None:
+            self._keys.release()
+            self._values.release()
+            self._map.close()
+            self._file.close()
+            self._map = None
+            self._file = None
+        self._keys = ()
+        self._values = b""
+
+
+_shared = {}
+
+
+def open_shared(path: str, max_tricks: int = 3) -> EndgameCache:
+    """
+    Return the cache of a file, opened once per process so the players
+    of every game played by a process (e.g. a pool worker) use the same
+    mapping.
+    """
+
+    if path not in _shared:
+        _shared[path] = EndgameCache(path, max_tricks)
+    return _shared[path]
+
+
+def main(argv: list[str] = None) -> None:
+    """
+    Fill a cache file with the positions met when playing random
+    endgames with the cache, and print its size and timings.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Build or extend an endgame cache file.")
+    parser.add_argument("path", help="cache file")
+    parser.add_argument("--players", type=int, default=4, choices=(3, 4, 5))
+    parser.add_argument("--tricks", type=int, default=3,
+                        help="tricks left in the endgames")
+    parser.add_argument("--deals", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    cache = EndgameCache(args.path, max_tricks=args.tricks)
+    start = perf_counter()
+    for _ in range(args.deals):
+        hands, leader, hearts_broken, scores = random_position(
+            args.players, args.tricks, rng)
+        state = GameState(hands, leader, None, hearts_broken, scores)
+        # every player plays the best move for them until the end
+        while not state.is_over():
+            move, _ = cache.best_move(state.hands, state.leader, state.trick,
+                                      state.hearts_broken, state.round_scores)
+            state.apply(move)
+
+    elapsed = perf_counter() - start
+    print(f"{args.deals} endgames in {elapsed:.2f}s, {cache.hits} hits,"
+          + f" {cache.misses} solved")
+    cache.save()
+    print(f"{len(cache)} entries in {args.path}"
+          + f" ({os.path.getsize(args.path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
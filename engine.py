@@ -0,0 +1,555 @@
+from __future__ import annotations
+import random
+from cards import Card
+from player import Player
+from bitboard import TWO_OF_CLUBS_BIT
+from game_state import GameState
+from dealing import deal_hands
+from seeding import GameStreams
+
+
+class RoundObserver:
+    """
+    DESCRIPTION:
+        Receives notifications of what happens during a round.
+        Every method does nothing by default, an observer only overrides
+        the notifications it needs (e.g. printing them to the console).
+
+    OPERATIONS AVAILABLE:
+        cards_dealt, cards_passed, turn_started, card_played, hearts_broken,
+        trick_taken and round_ended are called by the engine in game order.
+        round_started, moon_shot, round_scored and game_won are called by
+        the games (play_game, Hearts) around the rounds.
+    """
+
+    def cards_dealt(self, players: list[Player]) -> None:
+        """
+        Called after every player has been dealt their hand.
+        """
+
+    def cards_passed(
+      self, source: Player, target: Player, cards: list[Card]) -> None:
+        """
+        Called after source has passed cards to target.
+        """
+
+    def turn_started(self, player: Player) -> None:
+        """
+        Called before a player chooses a card to play.
+        """
+
+    def card_played(self, player: Player, card: Card, leading: bool) -> None:
+        """
+        Called after a player played a card,
+        leading is True when the card is the first card of the trick.
+        """
+
+    def hearts_broken(self, player: Player) -> None:
+        """
+        Called when a player breaks hearts.
+        """
+
+    def trick_taken(self, player: Player, penalty: int) -> None:
+        """
+        Called after a player takes a trick with the penalty received.
+        """
+
+    def round_ended(self, result: RoundResult) -> None:
+        """
+        Called after the last trick of a round is taken.
+        """
+
+    def round_started(self, round_number: int) -> None:
+        """
+        Called before a round is dealt.
+        """
+
+    def moon_shot(self, player: Player) -> None:
+        """
+        Called when a player shot the moon, before the scores are added.
+        """
+
+    def round_scored(self, round_number: int, players: list[Player]) -> None:
+        """
+        Called after the points of a round are added to total_score.
+        """
+
+    def game_won(self, player: Player, players: list[Player]) -> None:
+        """
+        Called when the game is over with its winner.
+        """
+
+
+class ObserverGroup(RoundObserver):
+    """
+    DESCRIPTION:
+        Passes every notification on to several observers in order,
+        e.g. a GameRecorder and the stats of a tournament.
+
+    ATTRIBUTES:
+        observers: list of RoundObserver, the observers notified
+    """
+
+    observers: list[RoundObserver]
+
+    def __init__(self, observers: list[RoundObserver]) -> None:
+        """
+        Initialise the group with its observers.
+        """
+
+        self.observers = list(observers)
+
+    def cards_dealt(self, players: list[Player]) -> None:
+        """
+        Notify every observer.
+        """
+
+        for observer in self.observers:
+            observer.cards_dealt(players)
+
+    def cards_passed(
+      self, source: Player, target: Player, cards: list[Card]) -> None:
+        """
+        Notify every observer.
+        """
+
+        for observer in self.observers:
+            observer.cards_passed(source, target, cards)
+
+    def turn_started(self, player: Player) -> None:
+        """
+        Notify every observer.
+        """
+
+        for observer in self.observers:
+            observer.turn_started(player)
+
+    def card_played(self, player: Player, card: Card, leading: bool) -> None:
+        """
+        Notify every observer.
+        """
+
+        for observer in self.observers:
+            observer.card_played(player, card, leading)
+
+    def hearts_broken(self, player: Player) -> None:
+        """
+        Notify every observer.
+        """
+
+        for observer in self.observers:
+            observer.hearts_broken(player)
+
+    def trick_taken(self, player: Player, penalty: int) -> None:
+        """
+        Notify every observer.
+        """
+
+        for observer in self.observers:
+            observer.trick_taken(player, penalty)
+
+    def round_ended(self, result: RoundResult) -> None:
+        """
+        Notify every observer.
+        """
+
+        for observer in self.observers:
+            observer.round_ended(result)
+
+    def round_started(self, round_number: int) -> None:
+        """
+        Notify every observer.
+        """
+
+        for observer in self.observers:
+            observer.round_started(round_number)
+
+    def moon_shot(self, player: Player) -> None:
+        """
+        Notify every observer.
+        """
+
+        for observer in self.observers:
+            observer.moon_shot(player)
+
+    def round_scored(self, round_number: int, players: list[Player]) -> None:
+        """
+        Notify every observer.
+        """
+
+        for observer in self.observers:
+            observer.round_scored(round_number, players)
+
+    def game_won(self, player: Player, players: list[Player]) -> None:
+        """
+        Notify every observer.
+        """
+
+        for observer in self.observers:
+            observer.game_won(player, players)
+
+
+class RoundResult:
+    """
+    DESCRIPTION:
+        The outcome of a round, returned by RoundEngine.execute_round and
+        play_round.
+
+    ATTRIBUTES:
+        penalties: list of int, the points each player took in this round
+          (by player index)
+        tricks: list of list of Cards, every trick in the order played
+        takers: list of int, the index of the player who took each trick
+        moon_shooter: int or None, the index of the player who took all
+          26 points
+        score_changes: list of int, the points added to each player's
+          total_score, after the shoot the moon rule is applied
+    """
+
+    penalties: list[int]
+    tricks: list[list[Card]]
+    takers: list[int]
+    moon_shooter: int
+    score_changes: list[int]
+
+    def __init__(self, penalties: list[int], tricks: list[list[Card]],
+                 takers: list[int]) -> None:
+        """
+        Initialise the result and apply the shoot the moon rule.
+        """
+
+        self.penalties = penalties
+        self.tricks = tricks
+        self.takers = takers
+        self.moon_shooter = None
+        self.score_changes = list(penalties)
+
+        # shoot the moon, everyone else receives 26 points
+        for i in range(len(penalties)):
+            if penalties[i] == 26:
+                self.moon_shooter = i
+                self.score_changes = [0 if j == i else 26
+                                      for j in range(len(penalties))]
+                break
+
+
+class RoundEngine:
+    """
+    DESCRIPTION:
+        A headless round of hearts. Does not print or sleep, anything that
+        happens is reported to an optional observer (see RoundObserver).
+        The rules are the same as Round: the player holding Two of Clubs
+        leads the first trick, the taker of a trick leads the next one,
+        the penalty of a trick is added to round_score of the taker.
+        Unlike Round, the engine does not run when created,
+        execute_round() has to be called.
+        The rules state lives in a GameState, the engine asks the players
+        for their cards, applies them to the state and reports them.
+
+    ATTRIBUTES:
+        players: list of Players, a ordered list of the player playing
+        observer: RoundObserver or None, receives the round notifications
+        state: GameState, the hands, trick, leader and points of the round
+        hearts_broken: boolean, if hearts are broken in this round
+          (read from state)
+        starting_player_index: int, the index of the player who holds Two of
+        clubs
+        current_trick: list of Cards, the trick of the current iteration
+        current_starting_player_index: the index of leading player of the
+        current iteration
+
+    OPERATIONS AVAILABLE:
+        execute_round() plays every trick and returns a RoundResult
+    """
+
+    players: list[Player]
+    observer: RoundObserver
+    state: GameState
+    starting_player_index: int
+    current_trick: list[Card]
+    current_starting_player_index: int
+
+    def __init__(
+      self, players: list[Player], observer: RoundObserver = None) -> None:
+        """
+        Initialise the round without executing it.
+        """
+
+        self.players = players
+        self.observer = observer
+        self.starting_player_index = self.determine_first_player()
+        self.state = GameState([player.hand_mask for player in players],
+                               self.starting_player_index)
+        self.current_trick = []
+        self.current_starting_player_index = self.starting_player_index
+
+    @property
+    def hearts_broken(self) -> bool:
+        """
+        If hearts are broken in this round.
+        """
+
+        return self.state.hearts_broken
+
+    def determine_first_player(self) -> int:
+        """
+        Determine the index of the player holding Two of Clubs.
+        Return the index as integer.
+        """
+
+        for player_index in range(len(self.players)):
+            if self.players[player_index].hand_mask & TWO_OF_CLUBS_BIT:
+                return player_index
+
+    def get_absolute_player_index(self, index: int) -> int:
+        """
+        Take in an integer and wrap it around the player list.
+        Return absolute player index as integer.
+        """
+
+        return index % len(self.players)
+
+    def determine_taker_index(self) -> int:
+        """
+        Determine player index of the taker (player who takes the trick)
+        of the trick just completed, as taken by the state.
+        Return taker index as integer.
+        """
+
+        return self.state.last_move().taker
+
+    def determine_penalty(self) -> int:
+        """
+        Determine the points the taker of the trick just completed gets,
+        as taken by the state.
+        Return penalty score as integer.
+        """
+
+        return self.state.last_move().points
+
+    def prepare_new_iteration(self, new_player_starting_index: int) -> None:
+        """
+        Takes in the player index (int) who leads the next trick.
+        Clear up the trick and assign the new leading player index.
+        """
+
+        self.current_starting_player_index = new_player_starting_index
+        self.current_trick = []
+
+    def execute_player_turn(self, player_index: int) -> Card:
+        """
+        Execute a player turn in an iteration.
+        Take in the index of a player (int).
+        Return card played by player.
+        """
+
+        player = self.players[player_index]
+        observer = self.observer
+        state = self.state
+
+        if observer is not None:
+            observer.turn_started(player)
+
+        hearts_broken = state.hearts_broken
+        card_played = player.play_card(self.current_trick, hearts_broken)
+
+        if observer is not None:
+            observer.card_played(player, card_played, not self.current_trick)
+
+        state.apply(card_played.ordinal)
+        if state.hearts_broken and not hearts_broken and observer is not None:
+            observer.hearts_broken(player)
+        self.current_trick.append(card_played)
+
+        return card_played
+
+    def execute_iteration(self) -> None:
+        """
+        Execute an iteration.
+        Players execute their turns in ascending index order,
+        starting from the leading player.
+        """
+
+        starting_index = self.current_starting_player_index
+        player_length = len(self.players)
+        # each player play their cards
+        for i in range(starting_index, starting_index + player_length):
+            self.execute_player_turn(self.get_absolute_player_index(i))
+
+    def execute_round(self) -> RoundResult:
+        """
+        Execute a round until players finish playing all of their cards.
+        The taker of each trick leads the next one.
+        Return the outcome as a RoundResult.
+        """
+
+        observer = self.observer
+        penalties = [0] * len(self.players)
+        tricks = []
+        takers = []
+
+        for seat in range(len(self.players)):
+            self.players[seat].start_round(seat, len(self.players))
+
+        # execute round until player has no cards
+        while not self.state.is_over():
+            self.execute_iteration()
+            penalty = self.determine_penalty()
+            taker_index = self.determine_taker_index()
+            taker = self.players[taker_index]
+            taker.round_score += penalty
+            penalties[taker_index] += penalty
+            tricks.append(self.current_trick)
+            takers.append(taker_index)
+            for player in self.players:
+                player.observe_trick(self.current_trick,
+                                     self.current_starting_player_index,
+                                     taker_index)
+            if observer is not None:
+                observer.trick_taken(taker, penalty)
+            self.prepare_new_iteration(taker_index)
+
+        result = RoundResult(penalties, tricks, takers)
+        if observer is not None:
+            observer.round_ended(result)
+        return result
+
+
+def pass_hands(players: list[Player], round_number: int,
+               observer: RoundObserver = None) -> None:
+    """
+    Every player passes 3 cards to the (round_number % player count)-th
+    player to the right, no cards are passed when the offset is 0.
+    Players are asked with pass_cards() without arguments.
+    """
+
+    player_count = len(players)
+    player_offset = round_number % player_count
+    if not player_offset:
+        return
+
+    # collect every pass first so nobody receives cards before passing
+    passed = []
+    for i in range(player_count):
+        target_index = (i + player_offset) % player_count
+        cards = players[i].pass_cards()
+        players[i].observe_pass(target_index, cards)
+        passed.append((target_index, cards))
+        if observer is not None:
+            observer.cards_passed(players[i], players[target_index], cards)
+
+    for target_index, cards in passed:
+        players[target_index].add_cards(cards)
+
+
+def play_round(players: list[Player], rng: random.Random = random,
+               round_number: int = 1,
+               observer: RoundObserver = None) -> RoundResult:
+    """
+    Play a full headless round: deal with rng, pass cards according to
+    round_number and play every trick.
+    Penalties are added to each player's round_score as in Round,
+    total_score is left untouched.
+    Return the outcome as a RoundResult.
+    """
+
+    deal_hands(players, rng)
+    if observer is not None:
+        observer.cards_dealt(players)
+    pass_hands(players, round_number, observer)
+    return RoundEngine(players, observer).execute_round()
+
+
+class GameResult:
+    """
+    DESCRIPTION:
+        The outcome of a full game, returned by play_game.
+
+    ATTRIBUTES:
+        total_scores: list of int, the final total score of each player
+        winner: int, the index of the player with the lowest total score
+        rounds: int, the number of rounds played
+        moon_shots: list of int, how many times each player shot the moon
+    """
+
+    total_scores: list[int]
+    winner: int
+    rounds: int
+    moon_shots: list[int]
+
+    def __init__(self, total_scores: list[int], rounds: int,
+                 moon_shots: list[int]) -> None:
+        """
+        Initialise the result and determine the winner.
+        """
+
+        self.total_scores = total_scores
+        self.winner = total_scores.index(min(total_scores))
+        self.rounds = rounds
+        self.moon_shots = moon_shots
+
+
+def end_of_game(total_scores: list[int], target_score: int) -> bool:
+    """
+    Check if at least one player reached target_score and
+    there is only one winner with minimum score.
+    Return the result as boolean.
+    """
+
+    if max(total_scores) < target_score:
+        return False
+
+    return total_scores.count(min(total_scores)) == 1
+
+
+def calculate_points(players: list[Player], result: RoundResult) -> None:
+    """
+    Move the round scores to total_score with the shoot the moon rule,
+    the same way as Hearts.calculate_points.
+    """
+
+    for i in range(len(players)):
+        players[i].total_score += result.score_changes[i]
+        players[i].round_score = 0
+
+
+def play_game(players: list[Player], target_score: int,
+              streams: GameStreams = None,
+              observer: RoundObserver = None) -> GameResult:
+    """
+    Play headless rounds (see play_round) until end_of_game is reached.
+    Each player gets its own rng from streams and each round is dealt from
+    its own stream, so a game is reproducible from its seed pair alone.
+    After each round the round scores are moved to total_score with the
+    shoot the moon rule, the same way as Hearts.calculate_points.
+    Return the outcome as a GameResult.
+    """
+
+    if streams is None:
+        streams = GameStreams()
+    for seat in range(len(players)):
+        players[seat].rng = streams.player(seat)
+
+    moon_shots = [0] * len(players)
+    round_number = 1
+    while True:
+        if observer is not None:
+            observer.round_started(round_number)
+        result = play_round(players, streams.deal(round_number),
+                            round_number, observer)
+        if result.moon_shooter is not None:
+            moon_shots[result.moon_shooter] += 1
+            if observer is not None:
+                observer.moon_shot(players[result.moon_shooter])
+        calculate_points(players, result)
+        if observer is not None:
+            observer.round_scored(round_number, players)
+
+        total_scores = [player.total_score for player in players]
+        if end_of_game(total_scores, target_score):
+            game = GameResult(total_scores, round_number, moon_shots)
+            if observer is not None:
+                observer.game_won(players[game.winner], players)
+            return game
+
+        round_number += 1
@@ -0,0 +1,765 @@
+from __future__ import annotations
+import struct
+import sys
+from time import sleep
+from cards import Card
+from player import Player
+from engine import RoundObserver
+
+
+class Event:
+    """
+    DESCRIPTION:
+        Something that happened in a game, sent by an EventStream to its
+        sinks. Events hold seats and cards, they are only turned into text
+        by the sinks that display them.
+
+    ATTRIBUTES:
+        code: int, the type of the event in binary recordings
+        seat: int, the index of the player the event is about,
+          -1 when unknown or not about a player
+        player: Player or None, that player, None when decoded from a
+          recording
+
+    OPERATIONS AVAILABLE:
+        pack() to encode the event (see BinaryRecorder)
+    """
+
+    code = -1
+    seat: int
+    player: Player
+
+    __slots__ = ("seat", "player")
+
+    def pack(self) -> bytes:
+        """
+        Return the event encoded as bytes, starting with its code.
+        """
+
+        return struct.pack("<Bb", self.code, self.seat)
+
+    def __repr__(self) -> str:
+        """
+        Override the repr() conversion.
+        Return the type and the fields of the event.
+        """
+
+        fields = ", ".join(f"{name}={getattr(self, name)!r}"
+                           for cls in type(self).__mro__
+                           for name in getattr(cls, "__slots__", ())
+                           if name != "player")
+        return f"{type(self).__name__}({fields})"
+
+
+class RoundStarted(Event):
+    """
+    DESCRIPTION:
+        A round is about to be dealt.
+
+    ATTRIBUTES:
+        round_number: int, the number of the round, starting from 1
+    """
+
+    code = 0
+    round_number: int
+
+    __slots__ = ("round_number",)
+
+    def __init__(self, round_number: int) -> None:
+        """
+        Initialise the event.
+        """
+
+        self.seat = -1
+        self.player = None
+        self.round_number = round_number
+
+    def pack(self) -> bytes:
+        """
+        Return the event encoded as bytes, starting with its code.
+        """
+
+        return struct.pack("<BbH", self.code, self.seat, self.round_number)
+
+
+class TurnStarted(Event):
+    """
+    DESCRIPTION:
+        A player is about to choose a card.
+    """
+
+    code = 1
+
+    __slots__ = ()
+
+    def __init__(self, seat: int, player: Player = None) -> None:
+        """
+        Initialise the event.
+        """
+
+        self.seat = seat
+        self.player = player
+
+
+class CardPlayed(Event):
+    """
+    DESCRIPTION:
+        A player played a card.
+
+    ATTRIBUTES:
+        card: Card, the card played
+        leading: bool, if the card is the first card of the trick
+    """
+
+    code = 2
+    card: Card
+    leading: bool
+
+    __slots__ = ("card", "leading")
+
+    def __init__(self, seat: int, card: Card, leading: bool,
+                 player: Player = None) -> None:
+        """
+        Initialise the event.
+        """
+
+        self.seat = seat
+        self.player = player
+        self.card = card
+        self.leading = leading
+
+    def pack(self) -> bytes:
+        """
+        Return the event encoded as bytes, starting with its code.
+        """
+
+        return struct.pack("<BbBB", self.code, self.seat, self.card.ordinal,
+                           self.leading)
+
+
+class HeartsBroken(Event):
+    """
+    DESCRIPTION:
+        A player broke hearts.
+    """
+
+    code = 3
+
+    __slots__ = ()
+
+    def __init__(self, seat: int, player: Player = None) -> None:
+        """
+        Initialise the event.
+        """
+
+        self.seat = seat
+        self.player = player
+
+
+class TrickTaken(Event):
+    """
+    DESCRIPTION:
+        A player took a trick.
+
+    ATTRIBUTES:
+        penalty: int, the points in the trick
+    """
+
+    code = 4
+    penalty: int
+
+    __slots__ = ("penalty",)
+
+    def __init__(self, seat: int, penalty: int,
+                 player: Player = None) -> None:
+        """
+        Initialise the event.
+        """
+
+        self.seat = seat
+        self.player = player
+        self.penalty = penalty
+
+    def pack(self) -> bytes:
+        """
+        Return the event encoded as bytes, starting with its code.
+        """
+
+        return struct.pack("<BbB", self.code, self.seat, self.penalty)
+
+
+class MoonShot(Event):
+    """
+    DESCRIPTION:
+        A player took every point of a round, everyone else receives them.
+        Sent right after the RoundEnded event of the round, which shows
+        it, so it has no text of its own.
+    """
+
+    code = 5
+
+    __slots__ = ()
+
+    def __init__(self, seat: int, player: Player = None) -> None:
+        """
+        Initialise the event.
+        """
+
+        self.seat = seat
+        self.player = player
+
+
+class RoundEnded(Event):
+    """
+    DESCRIPTION:
+        A round is over and its points are added to the total scores.
+        Its seat is the player who shot the moon in the round, -1 when
+        nobody did: the moon shot is shown between the end of round
+        banner and the scores (the MoonShot event follows this one).
+
+    ATTRIBUTES:
+        round_number: int, the number of the round
+        total_scores: list of int, the total score of each player
+        players: list of Players or None, the players by seat
+    """
+
+    code = 6
+    round_number: int
+    total_scores: list[int]
+    players: list[Player]
+
+    __slots__ = ("round_number", "total_scores", "players")
+
+    def __init__(self, round_number: int, total_scores: list[int],
+                 players: list[Player] = None, seat: int = -1,
+                 player: Player = None) -> None:
+        """
+        Initialise the event, seat and player being the moon shooter.
+        """
+
+        self.seat = seat
+        self.player = player
+        self.round_number = round_number
+        self.total_scores = total_scores
+        self.players = players
+
+    def pack(self) -> bytes:
+        """
+        Return the event encoded as bytes, starting with its code.
+        """
+
+        return (struct.pack("<BbHB", self.code, self.seat, self.round_number,
+                            len(self.total_scores))
+                + struct.pack(f"<{len(self.total_scores)}i",
+                              *self.total_scores))
+
+
+class GameWon(Event):
+    """
+    DESCRIPTION:
+        The game is over, the player with the lowest total score won.
+
+    ATTRIBUTES:
+        total_scores: list of int, the final total score of each player
+    """
+
+    code = 7
+    total_scores: list[int]
+
+    __slots__ = ("total_scores",)
+
+    def __init__(self, seat: int, total_scores: list[int],
+                 player: Player = None) -> None:
+        """
+        Initialise the event.
+        """
+
+        self.seat = seat
+        self.player = player
+        self.total_scores = total_scores
+
+    def pack(self) -> bytes:
+        """
+        Return the event encoded as bytes, starting with its code.
+        """
+
+        return (struct.pack("<BbB", self.code, self.seat,
+                            len(self.total_scores))
+                + struct.pack(f"<{len(self.total_scores)}i",
+                              *self.total_scores))
+
+
+class GameStarted(Event):
+    """
+    DESCRIPTION:
+        A game is about to ask for its settings and start.
+    """
+
+    code = 8
+
+    __slots__ = ()
+
+    def __init__(self, seat: int = -1, player: Player = None) -> None:
+        """
+        Initialise the event.
+        """
+
+        self.seat = seat
+        self.player = player
+
+
+def decode_events(data: bytes) -> list[Event]:
+    """
+    Takes in the bytes of a binary recording (see BinaryRecorder).
+    Return the events in order, without their players.
+    Raise ValueError if the data is not a sequence of events.
+    """
+
+    events = []
+    position = 0
+    try:
+        while position < len(data):
+            code, seat = struct.unpack_from("<Bb", data, position)
+            position += 2
+            if code == RoundStarted.code:
+                (round_number,) = struct.unpack_from("<H", data, position)
+                position += 2
+                events.append(RoundStarted(round_number))
+            elif code == CardPlayed.code:
+                card, leading = struct.unpack_from("<BB", data, position)
+                position += 2
+                events.append(CardPlayed(seat, Card.from_index(card),
+                                         bool(leading)))
+            elif code == TrickTaken.code:
+                (penalty,) = struct.unpack_from("<B", data, position)
+                position += 1
+                events.append(TrickTaken(seat, penalty))
+            elif code in (RoundEnded.code, GameWon.code):
+                round_number = None
+                if code == RoundEnded.code:
+                    (round_number,) = struct.unpack_from("<H", data, position)
+                    position += 2
+                (count,) = struct.unpack_from("<B", data, position)
+                scores = list(struct.unpack_from(f"<{count}i", data,
+                                                 position + 1))
+                position += 1 + 4 * count
+                if code == RoundEnded.code:
+                    events.append(RoundEnded(round_number, scores,
+                                             seat=seat))
+                else:
+                    events.append(GameWon(seat, scores))
+            elif code in _SEAT_EVENTS:
+                events.append(_SEAT_EVENTS[code](seat))
+            else:
+                raise ValueError(f"Unknown event code {code}")
+    except struct.error:
+        raise ValueError("Truncated event recording")
+    return events
+
+
+# code -> events holding only a seat
+_SEAT_EVENTS = {event.code: event
+                for event in (TurnStarted, HeartsBroken, MoonShot,
+                              GameStarted)}
+
+
+class EventSink:
+    """
+    DESCRIPTION:
+        Receives the events of an EventStream.
+        handle() does nothing by default.
+
+    OPERATIONS AVAILABLE:
+        handle() for every event, close() when the stream is done
+    """
+
+    def handle(self, event: Event) -> None:
+        """
+        Called with every event in game order.
+        """
+
+    def close(self) -> None:
+        """
+        Called when no more events will come.
+        """
+
+
+class NullSink(EventSink):
+    """
+    DESCRIPTION:
+        A sink that ignores every event. An EventStream does not keep
+        null sinks, so a stream with only null sinks creates no events.
+    """
+
+
+def player_name(player: Player, seat: int) -> str:
+    """
+    Return the name of a player, named after the seat when the player is
+    not known (e.g. a decoded event): "Player 1" for seat 0, "A player"
+    without a seat.
+    """
+
+    if player is not None:
+        return str(player)
+    return f"Player {seat + 1}" if seat >= 0 else "A player"
+
+
+def score_lines(total_scores: list[int], players: list[Player]) -> list[str]:
+    """
+    Return the lines showing the total score of every player
+    (players None to name them after their seats).
+    """
+
+    lines = []
+    for seat in range(len(total_scores)):
+        player = players[seat] if players is not None else None
+        lines.append(f"{player_name(player, seat)}'s total score:"
+                     + f" {total_scores[seat]}")
+    return lines
+
+
+def render(event: Event) -> str:
+    """
+    Return the console text of an event, None for an event that is not
+    displayed.
+    """
+
+    if isinstance(event, CardPlayed):
+        name = player_name(event.player, event.seat)
+        if event.leading:
+            return f"{name} leads the trick with \n{event.card}"
+        return f"{name} plays \n{event.card}"
+    if isinstance(event, TurnStarted):
+        return f"It is {player_name(event.player, event.seat)}'s turn"
+    if isinstance(event, TrickTaken):
+        return (f"{player_name(event.player, event.seat)} takes the trick."
+                + f" Points received: {event.penalty}")
+    if isinstance(event, HeartsBroken):
+        return "Hearts have been broken!"
+    if isinstance(event, RoundStarted):
+        return f"========= Starting round {event.round_number} ========="
+    if isinstance(event, RoundEnded):
+        lines = [f"========= End of round {event.round_number} ========="]
+        if event.seat >= 0:
+            lines.append(f"{player_name(event.player, event.seat)} has shot"
+                         + " the moon! Everyone else receives 26 points")
+        return "\n".join(lines
+                         + score_lines(event.total_scores, event.players))
+    if isinstance(event, GameStarted):
+        return "Welcome to ♥ HEARTS ♥"
+    if isinstance(event, GameWon):
+        return f"{player_name(event.player, event.seat)} is the winner!"
+    return None
+
+
+class ConsoleSink(EventSink):
+    """
+    DESCRIPTION:
+        Prints the events to the console as they come.
+        Optionally pauses after each card and each trick so a human player
+        can follow the game.
+
+    ATTRIBUTES:
+        turn_delay: float, seconds to sleep before announcing a card played
+        trick_delay: float, seconds to sleep after a trick is taken
+    """
+
+    turn_delay: float
+    trick_delay: float
+
+    def __init__(self, turn_delay: float = 0, trick_delay: float = 0) -> None:
+        """
+        Initialise the sink with the pacing delays.
+        """
+
+        self.turn_delay = turn_delay
+        self.trick_delay = trick_delay
+
+    def handle(self, event: Event) -> None:
+        """
+        Print the event, sleeping turn_delay seconds before a card and
+        trick_delay seconds after a trick.
+        """
+
+        if self.turn_delay and isinstance(event, CardPlayed):
+            sleep(self.turn_delay)
+        text = render(event)
+        if text is not None:
+            print(text)
+        if self.trick_delay and isinstance(event, TrickTaken):
+            sleep(self.trick_delay)
+
+
+class BufferedSink(EventSink):
+    """
+    DESCRIPTION:
+        Writes the console text of the events to a file in batches,
+        without pauses: lines are collected and written together once
+        batch_size lines are waiting, at the end of a game and on close.
+
+    ATTRIBUTES:
+        file: text file, where the lines are written
+        batch_size: int, the number of waiting lines that triggers a write
+    """
+
+    batch_size: int
+
+    def __init__(self, file=None, batch_size: int = 256) -> None:
+        """
+        Initialise the sink, writing to standard output when file is None.
+        """
+
+        self.file = file if file is not None else sys.stdout
+        self.batch_size = batch_size
+        self._lines = []
+
+    def handle(self, event: Event) -> None:
+        """
+        Collect the text of the event and write the batch when full.
+        """
+
+        text = render(event)
+        if text is not None:
+            self._lines.append(text)
+        if len(self._lines) >= self.batch_size or isinstance(event, GameWon):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the waiting lines.
+        """
+
+        if self._lines:
+            self.file.write("\n".join(self._lines) + "\n")
+            self._lines.clear()
+        self.file.flush()
+
+    def close(self) -> None:
+        """
+        Write the waiting lines, the file is left open.
+        """
+
+        self.flush()
+
+
+class BinaryRecorder(EventSink):
+    """
+    DESCRIPTION:
+        Appends the events to a file in their binary form (see
+        Event.pack and decode_events), buffered in memory and written in
+        bulk once the buffer reaches buffer_size bytes and when flushed
+        or closed.
+
+    ATTRIBUTES:
+        path: str, the recording file
+        buffer_size: int, the number of buffered bytes that triggers a write
+    """
+
+    path: str
+    buffer_size: int
+
+    def __init__(self, path: str, buffer_size: int = 1 << 16) -> None:
+        """
+        Open the recording file for appending.
+        """
+
+        self.path = path
+        self.buffer_size = buffer_size
+        self._file = open(path, "ab")
+        self._buffer = bytearray()
+
+    def handle(self, event: Event) -> None:
+        """
+        Buffer the encoded event.
+        """
+
+        self._buffer += event.pack()
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered events to the file.
+        """
+
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self) -> None:
+        """
+        Flush and close the file.
+        """
+
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class EventStream(RoundObserver):
+    """
+    DESCRIPTION:
+        An observer turning the notifications of a game into typed events
+        for its sinks. Nothing is created when there is no sink, so a
+        stream with no sink (or only null sinks) costs one check per
+        notification.
+        Pass it as the observer of a round or of engine.play_game, the
+        game notifications (round_started, moon_shot, round_scored and
+        game_won) are sent by Hearts and play_game, game_started by
+        Hearts. A moon shot is held back until the round is scored, to
+        go out with (and after) the RoundEnded event.
+
+    ATTRIBUTES:
+        sinks: list of EventSink, the sinks receiving the events
+        players: list of Players, the players by seat, set when cards are
+          dealt (or by set_players)
+
+    OPERATIONS AVAILABLE:
+        add_sink(), set_players(), emit(), close(), game_started(),
+        the notifications of RoundObserver
+    """
+
+    sinks: list[EventSink]
+    players: list[Player]
+
+    def __init__(self, sinks: list[EventSink] = None,
+                 players: list[Player] = None) -> None:
+        """
+        Initialise the stream with its sinks.
+        """
+
+        self.sinks = []
+        for sink in sinks or []:
+            self.add_sink(sink)
+        self.set_players(players or [])
+        self._moon_shooter = None
+
+    def add_sink(self, sink: EventSink) -> None:
+        """
+        Register a sink, null sinks are dropped.
+        """
+
+        if not isinstance(sink, NullSink):
+            self.sinks.append(sink)
+
+    def set_players(self, players: list[Player]) -> None:
+        """
+        Set the players, whose index is the seat of their events.
+        """
+
+        self.players = players
+        self._seats = {id(players[seat]): seat
+                       for seat in range(len(players))}
+
+    def emit(self, event: Event) -> None:
+        """
+        Send an event to every sink.
+        """
+
+        for sink in self.sinks:
+            sink.handle(event)
+
+    def close(self) -> None:
+        """
+        Close every sink.
+        """
+
+        for sink in self.sinks:
+            sink.close()
+
+    def _seat(self, player: Player) -> int:
+        """
+        Return the seat of a player, -1 when the players are not known.
+        """
+
+        return self._seats.get(id(player), -1)
+
+    def cards_dealt(self, players: list[Player]) -> None:
+        """
+        Learn the seats of the dealt players.
+        """
+
+        self.set_players(players)
+
+    def turn_started(self, player: Player) -> None:
+        """
+        Emit a TurnStarted event.
+        """
+
+        if self.sinks:
+            self.emit(TurnStarted(self._seat(player), player))
+
+    def card_played(self, player: Player, card: Card, leading: bool) -> None:
+        """
+        Emit a CardPlayed event.
+        """
+
+        if self.sinks:
+            self.emit(CardPlayed(self._seat(player), card, leading, player))
+
+    def hearts_broken(self, player: Player) -> None:
+        """
+        Emit a HeartsBroken event.
+        """
+
+        if self.sinks:
+            self.emit(HeartsBroken(self._seat(player), player))
+
+    def trick_taken(self, player: Player, penalty: int) -> None:
+        """
+        Emit a TrickTaken event.
+        """
+
+        if self.sinks:
+            self.emit(TrickTaken(self._seat(player), penalty, player))
+
+    def round_started(self, round_number: int) -> None:
+        """
+        Emit a RoundStarted event.
+        """
+
+        if self.sinks:
+            self.emit(RoundStarted(round_number))
+
+    def moon_shot(self, player: Player) -> None:
+        """
+        Keep the player for the RoundEnded and MoonShot events of
+        round_scored.
+        """
+
+        self._moon_shooter = player
+
+    def round_scored(self, round_number: int, players: list[Player]) -> None:
+        """
+        Emit a RoundEnded event with the total scores, followed by the
+        MoonShot event of the round if the moon was shot.
+        """
+
+        shooter = self._moon_shooter
+        self._moon_shooter = None
+        if self.sinks:
+            seat = self._seat(shooter) if shooter is not None else -1
+            self.emit(RoundEnded(round_number,
+                                 [player.total_score for player in players],
+                                 players, seat, shooter))
+            if shooter is not None:
+                self.emit(MoonShot(seat, shooter))
+
+    def game_started(self) -> None:
+        """
+        Emit a GameStarted event.
+        """
+
+        if self.sinks:
+            self.emit(GameStarted())
+
+    def game_won(self, player: Player, players: list[Player]) -> None:
+        """
+        Emit a GameWon event.
+        """
+
+        if self.sinks:
+            self.emit(GameWon(self._seat(player),
+                              [other.total_score for other in players],
+                              player))
@@ -0,0 +1,312 @@
+from __future__ import annotations
+from bitboard import (HEARTS_MASK, QUEEN_OF_SPADES_BIT, TWO_OF_CLUBS_BIT,
+                      cards_from_mask, legal_mask)
+from cards import Card
+
+
+class AppliedMove:
+    """
+    DESCRIPTION:
+        A card applied to a GameState, with what undo() needs to take it
+        back: the fields of the trick before the card and, when the card
+        completed the trick, the trick, its leader, its taker and the
+        points taken.
+
+    ATTRIBUTES:
+        seat: int, the index of the player who played the card
+        bit: int, the bit of the card in the hand bitboard
+        hearts_broken: bool, if hearts were broken before the card
+        winning_index, trick_points: int, the fields of the trick before
+          the card
+        trick: list of int or None, the completed trick, None when the
+          card did not complete it
+        leader: int or None, the leader of the completed trick
+        taker: int or None, the index of the player who took the trick
+        points: int, the points of the completed trick
+    """
+
+    seat: int
+    bit: int
+    hearts_broken: bool
+    winning_index: int
+    trick_points: int
+    trick: list[int]
+    leader: int
+    taker: int
+    points: int
+
+    __slots__ = ("seat", "bit", "hearts_broken", "winning_index",
+                 "trick_points", "trick", "leader", "taker", "points")
+
+    def __init__(self, seat: int, bit: int, hearts_broken: bool,
+                 winning_index: int, trick_points: int) -> None:
+        """
+        Initialise the record of a card that did not complete a trick.
+        """
+
+        self.seat = seat
+        self.bit = bit
+        self.hearts_broken = hearts_broken
+        self.winning_index = winning_index
+        self.trick_points = trick_points
+        self.trick = None
+        self.leader = None
+        self.taker = None
+        self.points = 0
+
+
+class GameState:
+    """
+    DESCRIPTION:
+        The state of a round as plain integers: a bitboard per hand, the
+        ordinals of the current trick, the leader, hearts broken and the
+        points taken. Player objects are not part of it, so branching a
+        search costs a few list copies.
+        The rules are the ones of RoundEngine: legality as
+        Player.check_valid_play, the highest card of the leading suit
+        takes the trick, hearts count 1 and Queen of Spades 13.
+        apply() plays a card and takes the trick when it is complete,
+        undo() takes back the last applied card, both in constant time:
+        the winning card and the points of the current trick are kept up
+        to date as cards are played, so taking a trick does not rescan it.
+
+    ATTRIBUTES:
+        player_count: int, the number of players
+        hands: list of int, bitboard of each player's hand
+        trick: list of int, the ordinals of the cards in the current trick
+        leader: int, the index of the player leading the current trick
+        hearts_broken: bool, if hearts are broken in this round
+        round_scores: list of int, the points each player took so far
+        tricks_played: int, the number of completed tricks
+        winning_index: int, the position in the trick of the card taking
+          it so far
+        trick_points: int, the points in the current trick
+
+    OPERATIONS AVAILABLE:
+        apply() and undo() for moves, play() to apply a move after
+        checking it, last_move() for the last card applied (and the
+        trick it completed), clone() to copy, current_player(),
+        legal_moves(), is_over(), hand_cards() to get a hand as Cards,
+        == compares the positions (not the undo history) and key()
+        returns the position as a hashable tuple: the state itself
+        changes, so it is not hashable
+    """
+
+    player_count: int
+    hands: list[int]
+    trick: list[int]
+    leader: int
+    hearts_broken: bool
+    round_scores: list[int]
+    tricks_played: int
+    winning_index: int
+    trick_points: int
+
+    __slots__ = ("player_count", "hands", "trick", "leader", "hearts_broken",
+                 "round_scores", "tricks_played", "winning_index",
+                 "trick_points", "_history")
+
+    def __init__(self, hands: list[int], leader: int = None,
+                 trick: list[int] = None, hearts_broken: bool = False,
+                 round_scores: list[int] = None,
+                 tricks_played: int = 0) -> None:
+        """
+        Initialise the state before the first card, the holder of
+        Two of Clubs leads.
+        A state in the middle of a round (e.g. a sampled deal for a
+        search) is set up by giving the leader of the current trick and
+        the rest of the progress.
+        """
+
+        self.player_count = len(hands)
+        self.hands = list(hands)
+        self.trick = list(trick) if trick else []
+        self.hearts_broken = hearts_broken
+        self.round_scores = (list(round_scores) if round_scores is not None
+                             else [0] * len(hands))
+        self.tricks_played = tricks_played
+        self.leader = leader
+        if leader is None:
+            self.leader = 0
+            for seat in range(len(hands)):
+                if hands[seat] & TWO_OF_CLUBS_BIT:
+                    self.leader = seat
+        self.winning_index = 0
+        self.trick_points = 0
+        for i in range(len(self.trick)):
+            self._add_to_trick(i)
+        self._history = []
+
+    def clone(self) -> GameState:
+        """
+        Return a copy of the position with an empty undo history.
+        """
+
+        state = GameState.__new__(GameState)
+        state.player_count = self.player_count
+        state.hands = list(self.hands)
+        state.trick = list(self.trick)
+        state.leader = self.leader
+        state.hearts_broken = self.hearts_broken
+        state.round_scores = list(self.round_scores)
+        state.tricks_played = self.tricks_played
+        state.winning_index = self.winning_index
+        state.trick_points = self.trick_points
+        state._history = []
+        return state
+
+    def current_player(self) -> int:
+        """
+        Return the index of the player who plays the next card.
+        """
+
+        return (self.leader + len(self.trick)) % self.player_count
+
+    def legal_moves(self) -> int:
+        """
+        Return the bitboard of the cards the current player can play.
+        """
+
+        trick = self.trick
+        return legal_mask(self.hands[self.current_player()],
+                          trick[0] // 13 if trick else None,
+                          self.hearts_broken)
+
+    def is_over(self) -> bool:
+        """
+        Return if every card of the round is played.
+        """
+
+        return not self.hands[self.current_player()]
+
+    def hand_cards(self, seat: int) -> list[Card]:
+        """
+        Return the hand of a player as a list of Cards in ascending order.
+        """
+
+        return cards_from_mask(self.hands[seat])
+
+    def apply(self, card: int) -> None:
+        """
+        Takes in the ordinal of the card the current player plays,
+        which is not checked.
+        Play it and take the trick when it is complete.
+        """
+
+        trick = self.trick
+        seat = (self.leader + len(trick)) % self.player_count
+        bit = 1 << card
+        self.hands[seat] ^= bit
+        self._history.append(AppliedMove(seat, bit, self.hearts_broken,
+                                         self.winning_index,
+                                         self.trick_points))
+        if bit & HEARTS_MASK:
+            self.hearts_broken = True
+        trick.append(card)
+        self._add_to_trick(len(trick) - 1)
+
+        if len(trick) == self.player_count:
+            self._take_trick()
+
+    def _add_to_trick(self, index: int) -> None:
+        """
+        Update the winning card and the points with the card at index of
+        the current trick.
+        """
+
+        trick = self.trick
+        card = trick[index]
+        if not index:
+            self.winning_index = 0
+            self.trick_points = 0
+        elif (card // 13 == trick[0] // 13
+                and card > trick[self.winning_index]):
+            self.winning_index = index
+        bit = 1 << card
+        if bit & HEARTS_MASK:
+            self.trick_points += 1
+        elif bit & QUEEN_OF_SPADES_BIT:
+            self.trick_points += 13
+
+    def _take_trick(self) -> None:
+        """
+        Give the penalty of the complete trick to its taker,
+        who leads the next trick.
+        """
+
+        taker = (self.leader + self.winning_index) % self.player_count
+        points = self.trick_points
+        self.round_scores[taker] += points
+        # remember what the last move completed for undo()
+        move = self._history[-1]
+        move.trick = self.trick
+        move.leader = self.leader
+        move.taker = taker
+        move.points = points
+        self.leader = taker
+        self.trick = []
+        self.winning_index = 0
+        self.trick_points = 0
+        self.tricks_played += 1
+
+    def undo(self) -> None:
+        """
+        Take back the last applied card.
+        """
+
+        move = self._history.pop()
+        if move.trick is not None:
+            self.round_scores[move.taker] -= move.points
+            self.trick = move.trick
+            self.leader = move.leader
+            self.tricks_played -= 1
+        self.trick.pop()
+        self.hands[move.seat] |= move.bit
+        self.hearts_broken = move.hearts_broken
+        self.winning_index = move.winning_index
+        self.trick_points = move.trick_points
+
+    def last_move(self) -> AppliedMove:
+        """
+        Return the record of the last card applied (see AppliedMove),
+        None when no card was applied since the state was created.
+        """
+
+        return self._history[-1] if self._history else None
+
+    def play(self, card: int) -> None:
+        """
+        Takes in the ordinal of the next card played.
+        Raise ValueError if the current player can not play it.
+        Apply it otherwise.
+        """
+
+        if not 0 <= card < 52:
+            raise ValueError(f"No card has the ordinal {card} (played by"
+                             + f" player {self.current_player() + 1} in"
+                             + f" trick {self.tricks_played + 1})")
+        if not 1 << card & self.legal_moves():
+            raise ValueError(f"Illegal play of {Card.from_index(card)} by"
+                             + f" player {self.current_player() + 1} in"
+                             + f" trick {self.tricks_played + 1}")
+        self.apply(card)
+
+    def key(self) -> tuple:
+        """
+        Return the fields that make the position as a tuple, to use as a
+        dictionary key: the tuple does not change when the state does.
+        """
+
+        return (tuple(self.hands), tuple(self.trick), self.leader,
+                self.hearts_broken, tuple(self.round_scores))
+
+    def __eq__(self, other: GameState) -> bool:
+        """
+        Override the == operator.
+        Compare the positions.
+        """
+
+        return self.key() == other.key()
+
+    # a state changes as moves are applied, use key() to hash a position
+    __hash__ = None
@@ -1,11 +1,40 @@
 from __future__ import annotations
-import random
-from cards import Card, Rank, Suit
+import argparse
+import sys
+from cards import Card
 from player import Player
-from basic_ai import BasicAIPlayer
-from better_ai import BetterAIPlayer
-from human import Human
+from seeding import GameStreams
 from round import Round
+from events import ConsoleSink, EventSink, EventStream, score_lines
+from dealing import deal_hands, generate_deck, validate_card_segment
+
+
+def is_human(player: Player) -> bool:
+    """
+    Return if a player is a Human.
+    human.py is only loaded by games with a human, so a game without one
+    does not import it to check (no Human exists before it is loaded).
+    """
+
+    human = sys.modules.get("human")
+    return human is not None and isinstance(player, human.Human)
+
+
+def validate_settings(target_score: int = None,
+                      player_count: int = None) -> None:
+    """
+    Takes in a target score and a player count, None when not given.
+    Raise ValueError for a target score that is not a whole number of at
+    least 1 or a player count other than 3, 4 or 5.
+    """
+
+    if target_score is not None and (
+            not isinstance(target_score, int) or isinstance(target_score, bool)
+            or target_score <= 0):
+        raise ValueError("Target score needs to be a whole number of at"
+                         + " least 1")
+    if player_count is not None and player_count not in (3, 4, 5):
+        raise ValueError("Player count needs to be 3, 4 or 5")
 
 
 class Hearts:
@@ -13,11 +42,13 @@ class Hearts:
     DESCRIPTION:
         A hearts game.
         2 integer inputs (target_score, player_count) are being read from
-        standard input in the beginning.
+        standard input in the beginning, unless they are given
+        (see launcher.py for scripted games).
         Rounds are being executed until at least one player reaches the
         target_score and there is only one winner.
         
-        Before rounds are being executed, players are generated.
+        Before rounds are being executed, players are generated
+        (or the given players are seated in order).
 
         During the start of each round, random cards are dealt to players evenly.
         Each player's hands should contain at least one heart or queen of spades.
@@ -29,6 +60,8 @@ class Hearts:
 
         The round begins by invoking the Round class.
         Player statistics are printed at the end of each round.
+        (What happens in the game is sent as events to the sinks of
+        events, a console sink printing them by default)
 
         End of game is being checked after execution of each round.
 
@@ -37,6 +70,10 @@ class Hearts:
         player_cound: int, the number of player playing, has to be 3, 4 or 5
         players: list of Players, a ordered list of the player playing
         round_number: int, the number of round currently at. Starting from 1
+        streams: GameStreams, the random streams for seating, dealing and
+          the players, derived from (seed, game_id)
+        events: EventStream, the stream the game and its rounds send their
+          events to
 
     OPERATIONS AVAILABLE:
         the game will start execution when the object is created
@@ -47,25 +84,59 @@ class Hearts:
     player_count: int
     players: list[Player]
     round_number: int
-    human_player: Human
-
-    def __init__(self) -> None:
+    streams: GameStreams
+    events: EventStream
+    human_player: Player
+
+    def __init__(self, seed: int = None, game_id: int = 0,
+                 sinks: list[EventSink] = None, target_score: int = None,
+                 player_count: int = None,
+                 players: list[Player] = None) -> None:
         """
         Get user input, initialise attributes and execute the game.
+        The game is reproducible from (seed, game_id),
+        a random seed is used when seed is None.
+        The events go to sinks, printed with pauses when None.
+        Only the target score and player count that are not given are
+        read from standard input. Given players play in their order
+        (the first Human among them is the human player), otherwise a
+        Human and AI players are generated.
+        Raise ValueError for a target score below 1 or a player count
+        (or number of given players) other than 3 to 5.
         """
 
-        print("Welcome to ♥ HEARTS ♥")
+        if sinks is None:
+            sinks = [ConsoleSink(turn_delay=1, trick_delay=2)]
+        self.events = EventStream(sinks)
+        self.events.game_started()
 
         # toggle pretty print on
         Card.pretty_print()
 
         # initalise the attributes
-        self.human_player = Human()
-        self.get_initalize_inputs()
-        self.generate_players()
+        if players is not None:
+            player_count = len(players)
+            self.human_player = next((player for player in players
+                                      if is_human(player)), None)
+        else:
+            # local import, a game given its players may have no human
+            from human import Human
+            self.human_player = Human()
+        self.get_initalize_inputs(target_score, player_count)
+        self.streams = GameStreams(seed, game_id)
+        if players is not None:
+            self.players = list(players)
+        else:
+            self.generate_players()
+        for seat in range(self.player_count):
+            self.players[seat].rng = self.streams.player(seat)
         self.round_number = 1
+        self.events.set_players(self.players)
         # run the game
-        self.execute_rounds()
+        try:
+            self.execute_rounds()
+        finally:
+            self.events.close()
 
     def generate_players(self) -> None:
         """
@@ -75,16 +146,21 @@ class Hearts:
         The generated players are assigned to self.players.
         """
 
+        # local imports, a game given its players may not use them
+        from basic_ai import BasicAIPlayer
+        from better_ai import BetterAIPlayer
+
         ai_players_types = [BasicAIPlayer, BetterAIPlayer]
 
         # generate random position for the the 3 players
         absolute_positions = list(range(self.player_count))
-        human_position = random.randint(0, self.player_count - 1)
+        rng = self.streams.seating
+        human_position = rng.randint(0, self.player_count - 1)
         if human_position in absolute_positions:
             absolute_positions.remove(human_position)
-        basic_ai_position = random.choice(absolute_positions)
+        basic_ai_position = rng.choice(absolute_positions)
         absolute_positions.remove(basic_ai_position)
-        better_ai_position = random.choice(absolute_positions)
+        better_ai_position = rng.choice(absolute_positions)
 
         self.players = []
         # populate players
@@ -102,7 +178,7 @@ class Hearts:
                 self.players.append(BetterAIPlayer(ai_player_name))
                 continue
 
-            PlayerClass = random.choice(ai_players_types)
+            PlayerClass = rng.choice(ai_players_types)
             self.players.append(PlayerClass(ai_player_name))
 
     def generate_deck(self) -> list[Card]:
@@ -112,21 +188,7 @@ class Hearts:
         Return the list of cards unshuffled.
         """
 
-        # generate a standard deck of cards
-        deck = []
-        for suit in Suit:
-            for rank in Rank:
-                deck.append(Card(rank, suit))
-
-        # remove cards based on game settings
-        if self.player_count == 5:
-            deck.remove(Card(Rank.Two, Suit.Diamonds))
-            deck.remove(Card(Rank.Two, Suit.Spades))
-
-        if self.player_count == 3:
-            deck.remove(Card(Rank.Two, Suit.Diamonds))
-
-        return deck
+        return generate_deck(self.player_count)
 
     def validate_card_segment(self, cards: list[Card]) -> bool:
         """
@@ -134,17 +196,7 @@ class Hearts:
         Return the result as a boolean.
         """
 
-        # check all cards other then Queen of Spades
-        for card in cards:
-            if card.suit == Suit.Spades and card.rank == Rank.Queen:
-                continue
-            
-            # if encounter atleast one non-heart card, return True
-            if card.suit != Suit.Hearts:
-                return True
-
-        # if only heart cards are found, return False
-        return False
+        return validate_card_segment(cards)
 
     def dealt_card(self) -> None:
         """
@@ -153,40 +205,25 @@ class Hearts:
         No return value applicable.
         """
 
-        # repeat until a valid set of card for all player
-        while True:
-            # generate a deck of card (removed unwanted cards) and shuffle the cards
-            cards = self.generate_deck()
-            random.shuffle(cards)
-            deck_size = len(cards)
-            # get length of cards each player needs to hold
-            segment_size = deck_size / self.player_count
-            # segment the deck of card into player_count segments, and assign the cards to them
-            valid = True
-            for i in range(self.player_count):
-                seg_from = int(i*segment_size)
-                seg_to = int((i+1)*segment_size)
-                deck_segment = cards[seg_from:seg_to]
-                if not self.validate_card_segment(deck_segment):
-                    # if any segment is invalid, regenerate a card
-                    valid = False
-                    break
-                self.players[i].hand = deck_segment
-
-            if valid:
-                # only return if valid, or else regenerate cards
-                return
+        # samples a valid deal directly, no reshuffling
+        deal_hands(self.players, self.streams.deal(self.round_number))
 
-    def get_initalize_inputs(self) -> None:
+    def get_initalize_inputs(self, target_score: int = None,
+                             player_count: int = None) -> None:
         """
         Get and validate user input (targest_score, player_count) from 
-        standard input.
+        standard input, for the values not given.
         The result is directly assigned to the attributes.
         No return value applicable.
+        Raise ValueError for a given value that the prompts would refuse.
         """
 
+        validate_settings(target_score, player_count)
+        self.target_score = target_score
+        self.player_count = player_count
+
         # get target_score
-        while True:
+        while self.target_score is None:
             try:
                 input_score = int(input("Please enter a target score: "))
 
@@ -201,7 +238,7 @@ class Hearts:
                 print("Target score has to be a whole number")
 
         # get player_count
-        while True:
+        while self.player_count is None:
             try:
                 input_score = int(
                     input("Please enter a player count (3 to 5): ")
@@ -246,17 +283,17 @@ class Hearts:
             target_index = self.get_absolute_index(i + player_offset)
             source_player = self.players[i]
             target_player = self.players[target_index]
-            if source_player is self.human_player:
-                # if the player instance is self.human (same memory address if in CPython),
-                # pass name as name
+            if is_human(source_player):
+                # a human is told who receives the cards
                 cards = source_player.pass_cards(target_player.name)
             else:
                 cards = source_player.pass_cards()
+            source_player.observe_pass(target_index, cards)
             target_cards[target_index] = cards
 
         # add cards from temporary dictoray to player's hand
         for i in target_cards.keys():
-            self.players[i].hand += target_cards[i]
+            self.players[i].add_cards(target_cards[i])
 
     def calculate_points(self) -> None:
         """
@@ -273,8 +310,7 @@ class Hearts:
 
             # shoot the moon
             if player.round_score == 26:
-                print(f"{player} has shot the moon! Everyone else receives 26"
-                      + " points")
+                self.events.moon_shot(player)
                 # add 26 to other players
                 player.round_score = 0
                 for j in range(len(self.players)):
@@ -334,10 +370,12 @@ class Hearts:
     def print_player_statistics(self) -> None:
         """
         Print the total scores of all players.
+        (The scores are also shown by the sinks at the end of every round,
+        this prints the same lines on demand.)
         """
 
-        for player in self.players:
-            print(f"{player}'s total score: {player.total_score}")
+        print("\n".join(score_lines(
+            [player.total_score for player in self.players], self.players)))
 
     def execute_rounds(self) -> None:
         """
@@ -348,30 +386,55 @@ class Hearts:
         (or not depending on round number).
         Player play their round.
         After each round, player notified of moon shot if there are any.
-        Player statistics printed.
+        Player statistics sent with the end of the round.
         Winner announced if the game ends.
         """
 
+        events = self.events
         while True:
 
-            print(f"========= Starting round {self.round_number} =========")
+            events.round_started(self.round_number)
             self.dealt_card()
             self.pass_cards()
-            Round(self.players)
+            Round(self.players, events)
 
-            print(f"========= End of round {self.round_number} =========")
             self.calculate_points()
-            self.print_player_statistics()
+            events.round_scored(self.round_number, self.players)
 
             # check if game ends
             if self.end_of_game():
                 winner_index = self.determine_winner()
-                winner = self.players[winner_index]
-                print(f"{winner} is the winner!")
+                events.game_won(self.players[winner_index], self.players)
                 break
 
             self.round_number += 1
 
 
+def main(argv: list[str] = None) -> None:
+    """
+    Play a game, with the phases timed when asked on the command line.
+    """
+
+    parser = argparse.ArgumentParser(description="Play a game of hearts.")
+    parser.add_argument("--profile", default=None, metavar="PATH",
+                        help="time the phases of the game, print a summary"
+                        + " and write collapsed stacks to PATH")
+    args = parser.parse_args(argv)
+    if args.profile is None:
+        Hearts()
+        return
+
+    # only imported when profiling
+    from profiling import PhaseProfiler
+
+    profiler = PhaseProfiler(Hearts)
+    try:
+        with profiler:
+            Hearts()
+    finally:
+        print(profiler.summary())
+        profiler.write_collapsed(args.profile)
+
+
 if __name__ == "__main__":
-    Hearts()
+    main()
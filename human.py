@@ -1,6 +1,9 @@
 from __future__ import annotations
 from cards import Card
+from card_art import HandRenderer, render_cards
+from bitboard import card_bit
 from player import Player
+from input_sources import ConsoleInput, InputSource
 
 
 class Human(Player):
@@ -11,9 +14,14 @@ class Human(Player):
         When playing a card, player is prompted to choose card from hand.
         When passing card, player is prompted to choose three cards from hand.
         [Messages are printed to guide player to enter correct value(s)]
+        The answers are read from an input source: standard input by
+        default, or a script, a move file or a queue
+        (see input_sources.py).
     
     ATTRIBUTES:
         Inherit the attributes of base player.
+        hand_renderer: HandRenderer, renders the hand shown every turn
+        input_source: InputSource, where the answers are read from
 
     OPERATIONS AVAILABLE:
         str conversion will return the player name
@@ -21,16 +29,22 @@ class Human(Player):
         (Inherited from Player)
     """
 
-    def __init__(self) -> None:
+    def __init__(self, name: str = None,
+                 input_source: InputSource = None) -> None:
         """
         Override the constructor of Player,
-        Gets name from standard input.
+        Gets name from the input source when it is not given.
         Invokes the parent initialiser to initialise the object
         and sets a deliminater for multiple number input.
+        The input source is standard input when None.
         """
-        raw_name = input("Please enter your name: ")
+        self.input_source = (input_source if input_source is not None
+                             else ConsoleInput())
+        raw_name = name if name is not None else self.input_source.read(
+            "Please enter your name: ")
         super().__init__(raw_name)
         self.delimiter = ','
+        self.hand_renderer = HandRenderer()
 
     def get_single_user_input(
       self, prompt: str, range: tuple[int] = ()) -> int:
@@ -46,7 +60,7 @@ class Human(Player):
         while True:
             # loop until valid input
             try:
-                val = int(input(prompt))
+                val = int(self.input_source.read(prompt))
                 err = (f"You must enter a number in the range of {range[0]} to"
                        + f" {range[1]}")
                 assert val >= range[0], err
@@ -74,7 +88,8 @@ class Human(Player):
         while True:
             # loop until valid input
             try:
-                raw_separated = input(prompt).split(self.delimiter)
+                raw_separated = self.input_source.read(prompt).split(
+                    self.delimiter)
                 result = [int(i) for i in raw_separated]
                 # check if all value in specified range
                 all_value_in_range = all((i >= range[0])
@@ -94,21 +109,12 @@ class Human(Player):
     def get_card_art_from_list(self, cards: list[Card]):
         '''
         Takes in a list of cards.
-        Get card art from each cards by using the str() conversion.
+        Get card art from each cards (the lines of the str() conversion).
         Combine the multiline card art horizontally.
         return the combined art as a string.
         '''
 
-        # get art string from each card as a list
-        card_arts = [str(card) for card in cards]
-        # split each string into lines
-        card_lines = [art.split("\n") for art in card_arts]
-        # zip the lines together into horizontal segments
-        card_appended_lines = zip(*card_lines)
-        # join each horizontal segments into one line
-        card_appended_arts = ["".join(line) for line in card_appended_lines]
-        # join the lines into one string
-        return "\n".join(card_appended_arts)
+        return render_cards(cards)
 
     def print_hand(self) -> None:
         '''
@@ -117,15 +123,9 @@ class Human(Player):
         A number is printed below each card.
         '''
 
-        print("Cards available:")
-        print(self.get_card_art_from_list(self.hand))
-        # generate the numbering labels of the cards
-        numberings = ""
-        for i in range(len(self.hand)):
-            numberings += " " * (4 - len(str(i + 1)))
-            numberings += str(i + 1)
-            numberings += "   "
-        print(numberings)
+        # the art and the numbering labels of the cards, in one write
+        print("Cards available:\n"
+              + self.hand_renderer.render(self.hand, numbered=True))
 
     def print_trick(self, trick) -> None:
         '''
@@ -162,23 +162,23 @@ class Human(Player):
         # automatically play card when 1 card left in hand
         if len(self.hand) == 1:
             card = self.hand[0]
-            del self.hand[0]
+            self.remove_card(card)
             return card
 
+        legal = self.legal_moves(trick, broken_hearts, as_mask=True)
+
         # loop until a valid card is selected
         while True:
             card_index = self.get_single_user_input("Select a card to play: ",
                                                     (1, len(self.hand))) - 1
             card = self.hand[card_index]
 
-            validate = self.check_valid_play(card, trick, broken_hearts)
-
-            # if not valid, repeat the loop
-            if not validate[0]:
-                print(validate[1])
+            # if not valid, print the reason and repeat the loop
+            if not legal & card_bit(card):
+                print(self.check_valid_play(card, trick, broken_hearts)[1])
                 continue
 
-            del self.hand[card_index]
+            self.remove_card(card)
 
             return card
 
@@ -210,7 +210,7 @@ class Human(Player):
         
         # remove cards from hand
         for card in cards:
-            self.hand.remove(card)
+            self.remove_card(card)
 
         print(f"You have passed the following cards to {passing_to}:\n"
               + self.get_card_art_from_list(cards) + "\n")
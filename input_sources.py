@@ -0,0 +1,160 @@
+from __future__ import annotations
+import queue
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+
+
+class InputSource(ABC):
+    """
+    DESCRIPTION:
+        Where a Human reads its answers from, one line per prompt.
+        Reading from an exhausted source raises EOFError, like input() at
+        the end of standard input, so a script that runs out of moves
+        stops the game instead of looping on the prompt.
+
+    ATTRIBUTES:
+        lines_read: int, the number of lines read so far
+
+    OPERATIONS AVAILABLE:
+        read() for the answer to a prompt
+        (a source implements _next_line())
+    """
+
+    lines_read: int
+
+    def __init__(self) -> None:
+        """
+        Initialise a source without lines read.
+        """
+
+        self.lines_read = 0
+
+    def read(self, prompt: str) -> str:
+        """
+        Takes in the prompt shown to the player.
+        Return the next line, without the line break.
+        Raise EOFError when there is no line left.
+        """
+
+        line = self._next_line(prompt)
+        self.lines_read += 1
+        return line
+
+    @abstractmethod
+    def _next_line(self, prompt: str) -> str:
+        """
+        Return the next line for the prompt, raise EOFError at the end.
+        """
+
+
+class ConsoleInput(InputSource):
+    """
+    DESCRIPTION:
+        Reads the lines from standard input, showing the prompts
+        (the default source of a Human).
+    """
+
+    def _next_line(self, prompt: str) -> str:
+        """
+        Return the line typed after the prompt.
+        """
+
+        return input(prompt)
+
+
+class ScriptedInput(InputSource):
+    """
+    DESCRIPTION:
+        Reads the lines from an iterable of strings (e.g. a list of
+        moves or a generator), for running the human path of a game
+        without a terminal.
+        The prompts are not shown unless echo is set, in which case every
+        prompt is printed with its answer, like a console transcript.
+
+    ATTRIBUTES:
+        echo: bool, if the prompts and the answers are printed
+    """
+
+    echo: bool
+
+    def __init__(self, lines: Iterable[str], echo: bool = False) -> None:
+        """
+        Initialise the source reading the lines in order.
+        """
+
+        super().__init__()
+        self._lines = iter(lines)
+        self.echo = echo
+
+    def _next_line(self, prompt: str) -> str:
+        """
+        Return the next line of the script.
+        """
+
+        try:
+            line = str(next(self._lines))
+        except StopIteration:
+            raise EOFError("The script has no line left") from None
+        if self.echo:
+            print(prompt + line)
+        return line
+
+
+class FileInput(ScriptedInput):
+    """
+    DESCRIPTION:
+        Reads the lines of a move file: one answer per line, in the order
+        of the prompts (e.g. the name, then "1,2,3" to pass and "4" to
+        play the fourth card). Lines starting with '#' are comments.
+    """
+
+    def __init__(self, path: str, echo: bool = False) -> None:
+        """
+        Initialise the source with the lines of the file at path.
+        Raise OSError if the file can not be read.
+        """
+
+        with open(path) as file:
+            lines = [line.rstrip("\r\n") for line in file
+                     if not line.startswith("#")]
+        super().__init__(lines, echo)
+
+
+class QueueInput(InputSource):
+    """
+    DESCRIPTION:
+        Reads the lines from a queue.Queue filled by another thread of the
+        same process (e.g. a test driver or a user interface).
+        A None item, or no item within timeout seconds, ends the input.
+
+    ATTRIBUTES:
+        lines: queue.Queue, the lines to read
+        timeout: float or None, seconds to wait for a line, None to wait
+          as long as needed
+    """
+
+    lines: queue.Queue
+    timeout: float
+
+    def __init__(self, lines: queue.Queue = None,
+                 timeout: float = None) -> None:
+        """
+        Initialise the source reading from lines, a new queue when None.
+        """
+
+        super().__init__()
+        self.lines = lines if lines is not None else queue.Queue()
+        self.timeout = timeout
+
+    def _next_line(self, prompt: str) -> str:
+        """
+        Return the next line put in the queue.
+        """
+
+        try:
+            line = self.lines.get(timeout=self.timeout)
+        except queue.Empty:
+            raise EOFError("No line was queued in time") from None
+        if line is None:
+            raise EOFError("The input queue was closed")
+        return str(line)
@@ -0,0 +1,378 @@
+from __future__ import annotations
+import math
+from array import array
+from time import perf_counter
+from cards import Card
+from better_ai import BetterAIPlayer
+from bitboard import legal_mask, lowest_index, popcount
+from card_tracker import CardTracker
+from game_state import GameState
+from rollout import POLICIES, play_out
+
+
+class SearchTree:
+    """
+    DESCRIPTION:
+        The nodes of an information set search tree, stored in parallel
+        arrays indexed by node number instead of one object per node.
+        A node stands for a sequence of cards played from the root,
+        whoever the hidden cards belong to. Node 0 is the root.
+        Children are kept as a linked list (first_child, sibling), and
+        children_mask holds the cards of the children as a bitboard.
+
+    ATTRIBUTES:
+        move: array, the ordinal of the card leading to each node
+        seat: array, the index of the player who played that card
+        first_child, sibling: array, the child links, -1 for none
+        children_mask: array, bitboard of the cards of each node's children
+        visits: array, the number of iterations through each node
+        available: array, the number of iterations in which each node's
+          card could be played
+        rewards: array, the sum of the rewards of the node's player
+
+    OPERATIONS AVAILABLE:
+        len() to get the node count, add_child(), children(),
+        find_child(), subtree() to copy a node and its descendants
+        into a new tree
+    """
+
+    move: array
+    seat: array
+    first_child: array
+    sibling: array
+    children_mask: array
+    visits: array
+    available: array
+    rewards: array
+
+    def __init__(self) -> None:
+        """
+        Initialise a tree holding only the root.
+        """
+
+        self.move = array("b", [-1])
+        self.seat = array("b", [-1])
+        self.first_child = array("i", [-1])
+        self.sibling = array("i", [-1])
+        self.children_mask = array("Q", [0])
+        self.visits = array("l", [0])
+        self.available = array("l", [0])
+        self.rewards = array("d", [0.0])
+
+    def __len__(self) -> int:
+        """
+        Return the number of nodes.
+        """
+
+        return len(self.move)
+
+    def add_child(self, parent: int, move: int, seat: int) -> int:
+        """
+        Append a node for the card move played by seat after parent.
+        Return the number of the new node.
+        """
+
+        node = len(self.move)
+        self.move.append(move)
+        self.seat.append(seat)
+        self.first_child.append(-1)
+        self.sibling.append(self.first_child[parent])
+        self.children_mask.append(0)
+        self.visits.append(0)
+        self.available.append(0)
+        self.rewards.append(0.0)
+        self.first_child[parent] = node
+        self.children_mask[parent] |= 1 << move
+        return node
+
+    def children(self, node: int) -> list[int]:
+        """
+        Return the numbers of the children of node.
+        """
+
+        result = []
+        child = self.first_child[node]
+        while child >= 0:
+            result.append(child)
+            child = self.sibling[child]
+        return result
+
+    def find_child(self, node: int, move: int) -> int:
+        """
+        Return the child of node reached by the card move, -1 if the card
+        was never tried there.
+        """
+
+        if not self.children_mask[node] >> move & 1:
+            return -1
+        child = self.first_child[node]
+        while self.move[child] != move:
+            child = self.sibling[child]
+        return child
+
+    def subtree(self, node: int) -> SearchTree:
+        """
+        Copy node and its descendants into a new tree with node as root,
+        so the nodes of the discarded branches are freed.
+        Return the new tree.
+        """
+
+        tree = SearchTree()
+        tree.visits[0] = self.visits[node]
+        tree.available[0] = self.available[node]
+        tree.rewards[0] = self.rewards[node]
+        pending = [(node, 0)]
+        while pending:
+            old, new = pending.pop()
+            # add in reverse so the sibling order is kept
+            for child in reversed(self.children(old)):
+                copy = tree.add_child(new, self.move[child], self.seat[child])
+                tree.visits[copy] = self.visits[child]
+                tree.available[copy] = self.available[child]
+                tree.rewards[copy] = self.rewards[child]
+                pending.append((child, copy))
+        return tree
+
+
+class ISMCTSPlayer(BetterAIPlayer):
+    """
+    DESCRIPTION:
+        An AI player using information set Monte Carlo tree search
+        (single observer).
+        Every iteration samples the unseen cards (see CardTracker),
+        walks down the tree choosing among the cards valid in that sample
+        with UCB, adds one node and finishes the round with a rollout
+        policy (see rollout.POLICIES). Each node collects the rewards of
+        the player who played its card.
+        The subtree of the cards actually played is kept between this
+        player's turns, so the search continues instead of starting from
+        scratch every trick.
+        Passes cards like BetterAIPlayer.
+
+    ATTRIBUTES:
+        Inherit the attributes of base player.
+        iterations: int, the number of iterations per move
+        time_budget: float or None, the seconds a move may take,
+          no time limit when None
+        exploration: float, the UCB exploration constant
+        rollout_policy: str, the policy every player uses in the rollouts
+        max_nodes: int, the tree stops growing at this size
+        tracker: CardTracker or None, the observations of the current
+          round, None before the first round starts
+        tree: SearchTree or None, the tree rooted at this player's last
+          decision
+
+    OPERATIONS AVAILABLE:
+        str conversion will return the player name
+        repr connversion will return what str returns (the player name).
+        (Inherited from Player)
+    """
+
+    iterations: int
+    time_budget: float
+    exploration: float
+    rollout_policy: str
+    max_nodes: int
+    tracker: CardTracker
+    tree: SearchTree
+
+    def __init__(self, name: str, iterations: int = 500,
+                 time_budget: float = None, exploration: float = 0.7,
+                 rollout_policy: str = "compiled",
+                 max_nodes: int = 100000) -> None:
+        """
+        Initialise the player and the search settings.
+        Raise ValueError for an unknown rollout policy, less than one
+        iteration or a tree without room for a child of the root.
+        """
+
+        super().__init__(name)
+        if rollout_policy not in POLICIES:
+            raise ValueError(f"Unknown rollout policy '{rollout_policy}',"
+                             + " available: " + ", ".join(POLICIES))
+        if iterations < 1:
+            raise ValueError("The search needs at least 1 iteration")
+        if max_nodes < 2:
+            raise ValueError("The tree needs room for at least 2 nodes")
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.rollout_policy = rollout_policy
+        self.max_nodes = max_nodes
+        self.tracker = None
+        self.tree = None
+        self._played = []
+        self._root_depth = 0
+        # the cards passed before the round, for the next tracker
+        self._passed = None
+
+    def start_round(self, seat: int, player_count: int) -> None:
+        """
+        Start tracking a new round, the old tree is dropped.
+        """
+
+        self.tracker = CardTracker(seat, player_count)
+        if self._passed is not None:
+            self.tracker.observe_pass(*self._passed)
+            self._passed = None
+        self.tree = None
+        self._played = []
+
+    def observe_pass(self, target_index: int, cards: list[Card]) -> None:
+        """
+        Remember the cards passed, the receiver holds them in the round.
+        """
+
+        self._passed = (target_index, cards)
+
+    def observe_trick(self, trick: list[Card], leader_index: int,
+                      taker_index: int) -> None:
+        """
+        Record a complete trick.
+        """
+
+        if self.tracker is not None:
+            self.tracker.observe_trick(trick, leader_index, taker_index)
+            self._played += [card.ordinal for card in trick]
+
+    def play_card(self, trick: list[Card], broken_hearts: bool) -> Card:
+        """
+        Takes in the game context including the trick (list of Card) and if hearts broken (bool).
+        Search the valid card the most iterations went through,
+        play like BetterAIPlayer when the round is not tracked.
+        The card to play is removed from hand and returned.
+        """
+
+        if self.tracker is None:
+            return super().play_card(trick, broken_hearts)
+
+        trick = [card.ordinal for card in trick]
+        self._reuse_tree(self._played + trick)
+        legal = legal_mask(self.hand_mask, trick[0] // 13 if trick else None,
+                           broken_hearts)
+        if popcount(legal) == 1:
+            move = lowest_index(legal)
+        else:
+            move = self.search(trick, broken_hearts)
+
+        # keep the subtree of the chosen card for the next turn
+        child = self.tree.find_child(0, move)
+        self.tree = self.tree.subtree(child) if child >= 0 else None
+        self._root_depth = len(self._played) + len(trick) + 1
+
+        card = Card.from_index(move)
+        self.remove_card(card)
+        return card
+
+    def _reuse_tree(self, played: list[int]) -> None:
+        """
+        Takes in every card played in the round so far.
+        Follow the cards played since the last decision down the kept
+        tree, start a new tree when they leave it.
+        """
+
+        tree = self.tree
+        node = 0
+        if tree is not None:
+            for move in played[self._root_depth:]:
+                node = tree.find_child(node, move)
+                if node < 0:
+                    break
+        if tree is None or node < 0:
+            self.tree = SearchTree()
+        elif node:
+            self.tree = tree.subtree(node)
+
+    def search(self, trick: list[int], broken_hearts: bool) -> int:
+        """
+        Takes in the ordinals of the current trick and if hearts broken.
+        Run the iterations from the current tree.
+        Return the ordinal of the root child with the most visits
+        (the lowest card on a tie), the card of rollout.better_policy
+        when no child was added.
+        """
+
+        deadline = None
+        if self.time_budget is not None:
+            deadline = perf_counter() + self.time_budget
+        tracker = self.tracker
+        leader = (tracker.seat - len(trick)) % tracker.player_count
+
+        for _ in range(self.iterations):
+            hands = tracker.sample(self.rng, self.hand_mask, trick, leader)
+            state = GameState(hands, leader, trick, broken_hearts,
+                              tracker.round_scores, tracker.tricks_played)
+            self.iterate(state)
+            if deadline is not None and perf_counter() >= deadline:
+                break
+
+        tree = self.tree
+        best = -1
+        for child in tree.children(0):
+            if (best < 0 or tree.visits[child] > tree.visits[best]
+                    or tree.visits[child] == tree.visits[best]
+                    and tree.move[child] < tree.move[best]):
+                best = child
+        if best < 0:
+            # the budget ran out before the root got a child
+            return POLICIES["better"](self.hand_mask, trick, broken_hearts)
+        return tree.move[best]
+
+    def iterate(self, state: GameState) -> None:
+        """
+        Takes in a sampled state at the root.
+        Run one iteration: select with UCB among the cards valid in the
+        sample, expand one node, roll out and update the visited nodes.
+        """
+
+        tree = self.tree
+        rng = self.rng
+        exploration = self.exploration
+        hands = state.hands
+        node = 0
+        path = []
+
+        seat = state.current_player()
+        while hands[seat]:
+            lead_suit = state.trick[0] // 13 if state.trick else None
+            legal = legal_mask(hands[seat], lead_suit, state.hearts_broken)
+            untried = legal & ~tree.children_mask[node]
+            if untried and len(tree) < self.max_nodes:
+                moves = [i for i in range(52) if untried >> i & 1]
+                move = moves[rng.randrange(len(moves))]
+                node = tree.add_child(node, move, seat)
+                path.append(node)
+                state.apply(move)
+                break
+
+            best = -1
+            best_score = 0.0
+            child = tree.first_child[node]
+            while child >= 0:
+                if legal >> tree.move[child] & 1:
+                    tree.available[child] += 1
+                    visits = tree.visits[child]
+                    if not visits:
+                        score = math.inf
+                    else:
+                        score = (tree.rewards[child] / visits + exploration
+                                 * math.sqrt(math.log(tree.available[child])
+                                             / visits))
+                    if best < 0 or score > best_score:
+                        best = child
+                        best_score = score
+                child = tree.sibling[child]
+            if best < 0:
+                # the tree is full and no node fits this sample
+                break
+            node = best
+            path.append(node)
+            state.apply(tree.move[node])
+            seat = state.current_player()
+
+        changes = play_out(state, POLICIES[self.rollout_policy])
+        tree.visits[0] += 1
+        for node in path:
+            tree.visits[node] += 1
+            # 1 for taking no points, 0 for taking every point
+            tree.rewards[node] += 1 - changes[tree.seat[node]] / 26
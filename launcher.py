@@ -0,0 +1,336 @@
+from __future__ import annotations
+import argparse
+import importlib
+import json
+
+# strategy name -> (module, class) of the player, imported only when a seat
+# uses it, so a game loads only the players of its lineup
+STRATEGIES = {
+    "human": ("human", "Human"),
+    "basic": ("basic_ai", "BasicAIPlayer"),
+    "better": ("better_ai", "BetterAIPlayer"),
+    "pimc": ("pimc_ai", "PIMCPlayer"),
+    "ismcts": ("ismcts_ai", "ISMCTSPlayer"),
+}
+
+# pacing of the console when a human plays and when no delay is configured
+HUMAN_TURN_DELAY = 1
+HUMAN_TRICK_DELAY = 2
+
+
+def load_strategy(spec: str) -> type:
+    """
+    Takes in a strategy: a name of STRATEGIES or a custom player class as
+    "module:Class" (e.g. "my_ai:MyPlayer").
+    Import the module of the strategy.
+    Return the player class.
+    Raise ValueError for an unknown strategy.
+    """
+
+    if ":" in spec:
+        module_name, class_name = spec.split(":", 1)
+    elif spec in STRATEGIES:
+        module_name, class_name = STRATEGIES[spec]
+    else:
+        raise ValueError(f"Unknown strategy '{spec}', available: "
+                         + ", ".join(STRATEGIES) + " or module:Class")
+    try:
+        return getattr(importlib.import_module(module_name), class_name)
+    except (ImportError, AttributeError) as error:
+        raise ValueError(f"Cannot load strategy '{spec}': {error}") from None
+
+
+class GameConfig:
+    """
+    DESCRIPTION:
+        The settings of a game of hearts, read from a JSON config file
+        and/or the command line. Every setting is optional: a missing
+        target score, player count or human name is asked for on standard
+        input, like an interactive game, and a missing lineup seats a
+        human and AI players at random.
+
+        A config file holds an object with the attributes below as keys,
+        for example:
+        {"target_score": 50, "lineup": ["better", "basic", "better"],
+         "seed": 7, "sinks": ["buffered:game.log"]}
+
+    ATTRIBUTES:
+        target_score: int or None, the score ending the game
+        player_count: int or None, 3 to 5 players
+        lineup: list of str or None, the strategy of every seat
+          (see load_strategy)
+        name: str or None, the name of the human player
+        script: str or None, a move file the human seats read their
+          answers from instead of standard input (see input_sources.py)
+        seed: int or None, the seed of the game, random when None
+        game_id: int, the game of the seed
+        sinks: list of str, where the events go: "console",
+          "buffered" (standard output) or "buffered:PATH", "binary:PATH"
+          or "null"
+        turn_delay: float or None, seconds of console pause before a card
+        trick_delay: float or None, seconds of console pause after a trick
+          (both default to a pause only when a human plays)
+
+    OPERATIONS AVAILABLE:
+        from_file() to read a config file, update() to override settings,
+        validate()
+    """
+
+    FIELDS = ("target_score", "player_count", "lineup", "name", "script",
+              "seed", "game_id", "sinks", "turn_delay", "trick_delay")
+
+    target_score: int
+    player_count: int
+    lineup: list[str]
+    name: str
+    script: str
+    seed: int
+    game_id: int
+    sinks: list[str]
+    turn_delay: float
+    trick_delay: float
+
+    def __init__(self, **settings) -> None:
+        """
+        Initialise a config with the given settings, the others unset.
+        """
+
+        self.target_score = None
+        self.player_count = None
+        self.lineup = None
+        self.name = None
+        self.script = None
+        self.seed = None
+        self.game_id = 0
+        self.sinks = ["console"]
+        self.turn_delay = None
+        self.trick_delay = None
+        self.update(settings)
+
+    @classmethod
+    def from_file(cls, path: str) -> GameConfig:
+        """
+        Takes in the path of a JSON config file.
+        Return the config it holds.
+        Raise ValueError for a file that is not a valid config.
+        """
+
+        with open(path) as file:
+            try:
+                settings = json.load(file)
+            except json.JSONDecodeError as error:
+                raise ValueError(f"{path}: {error}") from None
+        if not isinstance(settings, dict):
+            raise ValueError(f"{path}: the config has to be an object")
+        return cls(**settings)
+
+    def update(self, settings: dict) -> None:
+        """
+        Takes in a dictionary of settings, None values are ignored.
+        Override the settings and validate the config.
+        Raise ValueError for an unknown or invalid setting.
+        """
+
+        for key, value in settings.items():
+            if key not in self.FIELDS:
+                raise ValueError(f"Unknown setting '{key}', available: "
+                                 + ", ".join(self.FIELDS))
+            if value is None:
+                continue
+            if key == "lineup" and isinstance(value, str):
+                value = [spec.strip() for spec in value.split(",")]
+            if key == "sinks" and isinstance(value, str):
+                value = [value]
+            setattr(self, key, value)
+        self.validate()
+
+    def validate(self) -> None:
+        """
+        Check the settings.
+        Raise ValueError for an invalid setting.
+        """
+
+        for key in ("target_score", "player_count", "seed", "game_id"):
+            value = getattr(self, key)
+            if value is not None and (not isinstance(value, int)
+                                      or isinstance(value, bool)):
+                raise ValueError(f"{key} has to be a whole number")
+        if self.target_score is not None and self.target_score <= 0:
+            raise ValueError("Target score needs to be at least 1")
+        if self.lineup is not None:
+            if not all(isinstance(spec, str) and spec
+                       for spec in self.lineup):
+                raise ValueError("The lineup has to be a list of strategies")
+            if (self.player_count is not None
+                    and len(self.lineup) != self.player_count):
+                raise ValueError(f"The lineup needs {self.player_count}"
+                                 + f" seats, got {len(self.lineup)}")
+        player_count = (len(self.lineup) if self.lineup is not None
+                        else self.player_count)
+        if player_count is not None and not 3 <= player_count <= 5:
+            raise ValueError("Need to be at least 3 players and at most 5")
+        if self.script is not None and self.lineup is None:
+            raise ValueError("A script needs a lineup with a human seat")
+        for spec in self.sinks:
+            kind, _, path = spec.partition(":")
+            if kind not in ("console", "buffered", "binary", "null"):
+                raise ValueError(f"Unknown sink '{spec}', available:"
+                                 + " console, buffered[:PATH], binary:PATH,"
+                                 + " null")
+            if kind == "binary" and not path:
+                raise ValueError("The binary sink needs a path"
+                                 + " (binary:PATH)")
+        for key in ("turn_delay", "trick_delay"):
+            value = getattr(self, key)
+            if value is not None and (not isinstance(value, (int, float))
+                                      or value < 0):
+                raise ValueError(f"{key} has to be a number of seconds")
+
+    def has_human(self) -> bool:
+        """
+        Return if a human plays: without a lineup a human is always seated.
+        """
+
+        return self.lineup is None or "human" in self.lineup
+
+
+def build_players(config: GameConfig) -> list:
+    """
+    Takes in a config.
+    Import the strategies of the lineup and seat their players in order,
+    the first human named after config.name, the humans reading the
+    config.script move file when given.
+    Return the players, None when the config has no lineup.
+    """
+
+    if config.lineup is None:
+        return None
+
+    players = []
+    name = config.name
+    script = None
+    if config.script is not None:
+        # local import, only scripted games read move files
+        from input_sources import FileInput
+        script = FileInput(config.script)
+    for seat, spec in enumerate(config.lineup):
+        player_class = load_strategy(spec)
+        if spec == "human":
+            # a human without a name is asked for it
+            players.append(player_class(name, script))
+            name = None
+        else:
+            players.append(player_class(f"Player {seat + 1}"))
+    return players
+
+
+def build_sinks(config: GameConfig) -> tuple[list, list]:
+    """
+    Takes in a config.
+    Return the event sinks of the config and the files opened for them,
+    which are closed by the caller once the game is over.
+    """
+
+    # local import, events are only needed once the game starts
+    from events import BinaryRecorder, BufferedSink, ConsoleSink, NullSink
+
+    human = config.has_human()
+    turn_delay = config.turn_delay
+    if turn_delay is None:
+        turn_delay = HUMAN_TURN_DELAY if human else 0
+    trick_delay = config.trick_delay
+    if trick_delay is None:
+        trick_delay = HUMAN_TRICK_DELAY if human else 0
+
+    sinks = []
+    files = []
+    for spec in config.sinks:
+        kind, _, path = spec.partition(":")
+        if kind == "console":
+            sinks.append(ConsoleSink(turn_delay, trick_delay))
+        elif kind == "buffered":
+            file = None
+            if path:
+                file = open(path, "w")
+                files.append(file)
+            sinks.append(BufferedSink(file))
+        elif kind == "binary":
+            sinks.append(BinaryRecorder(path))
+        else:
+            sinks.append(NullSink())
+    return sinks, files
+
+
+def run(config: GameConfig):
+    """
+    Takes in a config.
+    Play a game of hearts with it, asking on standard input for the
+    settings the config does not have.
+    Return the finished game.
+    """
+
+    # local import, after the lineup has been checked
+    from hearts import Hearts
+
+    players = build_players(config)
+    sinks, files = build_sinks(config)
+    try:
+        return Hearts(config.seed, config.game_id, sinks,
+                      target_score=config.target_score,
+                      player_count=config.player_count, players=players)
+    finally:
+        for file in files:
+            file.close()
+
+
+def main(argv: list[str] = None) -> None:
+    """
+    Read the game settings from a config file and the command line (which
+    overrides the file) and play the game.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Play a game of hearts from a config file and/or the"
+        + " command line. Missing settings are asked for interactively.")
+    parser.add_argument("--config", default=None, metavar="PATH",
+                        help="JSON config file (see GameConfig)")
+    parser.add_argument("--target-score", type=int, default=None)
+    parser.add_argument("--players", dest="player_count", type=int,
+                        default=None, choices=(3, 4, 5), help="player count")
+    parser.add_argument("--lineup", default=None,
+                        help="comma separated strategies for each seat ("
+                        + ", ".join(STRATEGIES) + " or module:Class)")
+    parser.add_argument("--name", default=None,
+                        help="name of the human player")
+    parser.add_argument("--script", default=None, metavar="PATH",
+                        help="move file the human seats read their answers"
+                        + " from, one per line (needs a lineup)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--game-id", type=int, default=None)
+    parser.add_argument("--sink", dest="sinks", action="append",
+                        default=None, metavar="SPEC",
+                        help="where the events go, repeatable: console,"
+                        + " buffered[:PATH], binary:PATH or null"
+                        + " (default: console)")
+    parser.add_argument("--turn-delay", type=float, default=None,
+                        help="console pause before each card in seconds")
+    parser.add_argument("--trick-delay", type=float, default=None,
+                        help="console pause after each trick in seconds")
+    args = parser.parse_args(argv)
+
+    settings = {key: value for key, value in vars(args).items()
+                if key != "config"}
+    try:
+        config = (GameConfig.from_file(args.config)
+                  if args.config is not None else GameConfig())
+        config.update(settings)
+        if config.lineup is not None:
+            for spec in config.lineup:
+                load_strategy(spec)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    run(config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,589 @@
+from __future__ import annotations
+import math
+from engine import GameResult, RoundObserver, RoundResult
+
+# the normal quantile of a two sided 95% interval
+Z_95 = 1.959963984540054
+
+
+def wilson_interval(successes: int, trials: int,
+                    z: float = Z_95) -> tuple[float, float]:
+    """
+    Takes in a number of successes out of trials.
+    Return the Wilson score interval of the success rate, (0, 1) when
+    there are no trials.
+    """
+
+    if trials <= 0:
+        return 0.0, 1.0
+    rate = successes / trials
+    z2 = z * z
+    centre = (rate + z2 / (2 * trials)) / (1 + z2 / trials)
+    margin = (z / (1 + z2 / trials)
+              * math.sqrt(rate * (1 - rate) / trials
+                          + z2 / (4 * trials * trials)))
+    return max(centre - margin, 0.0), min(centre + margin, 1.0)
+
+
+class RunningStats:
+    """
+    DESCRIPTION:
+        Mean and variance of a stream of numbers in constant memory
+        (Welford's algorithm), mergeable with the stats of another
+        stream (Chan et al.), e.g. from another worker process.
+
+    ATTRIBUTES:
+        count: int, the number of values
+        mean: float, the mean of the values
+        minimum, maximum: float or None, the extremes, None when empty
+
+    OPERATIONS AVAILABLE:
+        add() a value, merge() another stream, variance, stdev,
+        std_error and interval() of the mean
+    """
+
+    count: int
+    mean: float
+    minimum: float
+    maximum: float
+
+    def __init__(self) -> None:
+        """
+        Initialise the stats of an empty stream.
+        """
+
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value: float) -> None:
+        """
+        Takes in the next value of the stream.
+        """
+
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other: RunningStats) -> None:
+        """
+        Takes in the stats of another stream and add its values.
+        """
+
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self._m2 = (other.count, other.mean,
+                                               other._m2)
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += (other._m2
+                     + delta * delta * self.count * other.count / count)
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def variance(self) -> float:
+        """
+        Return the sample variance, 0 for less than 2 values.
+        """
+
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        """
+        Return the sample standard deviation.
+        """
+
+        return math.sqrt(self.variance)
+
+    @property
+    def std_error(self) -> float:
+        """
+        Return the standard error of the mean.
+        """
+
+        return self.stdev / math.sqrt(self.count) if self.count else 0.0
+
+    def interval(self, z: float = Z_95) -> tuple[float, float]:
+        """
+        Return the normal confidence interval of the mean.
+        """
+
+        margin = z * self.std_error
+        return self.mean - margin, self.mean + margin
+
+
+class Histogram:
+    """
+    DESCRIPTION:
+        Counts of values in bins of a fixed width, in memory bounded by
+        the range of the values (scores of a game are bounded by the
+        target score and the points of the last round).
+
+    ATTRIBUTES:
+        bin_width: int, the width of a bin
+        counts: dict, bin index -> number of values, bin i holding the
+          values from i * bin_width up to (i + 1) * bin_width
+        total: int, the number of values
+
+    OPERATIONS AVAILABLE:
+        add() a value, merge() another histogram with the same bin width,
+        quantile(), rows() for the bins in order
+    """
+
+    bin_width: int
+    counts: dict[int, int]
+    total: int
+
+    def __init__(self, bin_width: int = 10) -> None:
+        """
+        Initialise an empty histogram.
+        """
+
+        self.bin_width = bin_width
+        self.counts = {}
+        self.total = 0
+
+    def add(self, value: float) -> None:
+        """
+        Takes in a value and count it in its bin.
+        """
+
+        index = int(value // self.bin_width)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+
+    def merge(self, other: Histogram) -> None:
+        """
+        Takes in a histogram with the same bin width and add its counts.
+        """
+
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+
+    def quantile(self, fraction: float) -> float:
+        """
+        Takes in a fraction from 0 to 1.
+        Return the upper edge of the bin holding the quantile,
+        None when empty.
+        """
+
+        if not self.total:
+            return None
+        needed = fraction * self.total
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= needed:
+                return (index + 1) * self.bin_width
+        return (max(self.counts) + 1) * self.bin_width
+
+    def rows(self) -> list[tuple[int, int, int]]:
+        """
+        Return a list of (low, high, count) tuples of the non-empty bins,
+        lowest first.
+        """
+
+        return [(index * self.bin_width, (index + 1) * self.bin_width,
+                 self.counts[index]) for index in sorted(self.counts)]
+
+    def __str__(self) -> str:
+        """
+        Override the str() conversion.
+        Return the bins as rows of a bar chart.
+        """
+
+        if not self.total:
+            return "(empty)"
+        largest = max(self.counts.values())
+        return "\n".join(f"{low:>5} to {high:<5} {count:>8}  "
+                         + "#" * round(40 * count / largest)
+                         for low, high, count in self.rows())
+
+
+class SeatStats:
+    """
+    DESCRIPTION:
+        The streaming results of one seat (or of every seat of a strategy,
+        combined with merge()).
+
+    ATTRIBUTES:
+        strategy: str, the strategy of the seat
+        games: int, the number of games (seat games when combined)
+        wins: int, the number of games won
+        moon_shots: int, the number of times the moon was shot
+        game_scores: RunningStats, the final scores
+        round_points: RunningStats, the points added by every round
+        score_histogram: Histogram, the final scores
+    """
+
+    strategy: str
+    games: int
+    wins: int
+    moon_shots: int
+    game_scores: RunningStats
+    round_points: RunningStats
+    score_histogram: Histogram
+
+    def __init__(self, strategy: str, bin_width: int = 10) -> None:
+        """
+        Initialise the empty stats of a seat.
+        """
+
+        self.strategy = strategy
+        self.games = 0
+        self.wins = 0
+        self.moon_shots = 0
+        self.game_scores = RunningStats()
+        self.round_points = RunningStats()
+        self.score_histogram = Histogram(bin_width)
+
+    def merge(self, other: SeatStats) -> None:
+        """
+        Takes in the stats of a seat and add them to these stats.
+        """
+
+        self.games += other.games
+        self.wins += other.wins
+        self.moon_shots += other.moon_shots
+        self.game_scores.merge(other.game_scores)
+        self.round_points.merge(other.round_points)
+        self.score_histogram.merge(other.score_histogram)
+
+    def win_interval(self, z: float = Z_95) -> tuple[float, float]:
+        """
+        Return the Wilson interval of the win rate.
+        """
+
+        return wilson_interval(self.wins, self.games, z)
+
+
+class OnlineStats(RoundObserver):
+    """
+    DESCRIPTION:
+        Streaming statistics of games with a fixed seat lineup, in
+        constant memory: mean and variance of the scores, win rates with
+        Wilson intervals, score histograms and moon shot frequency, per
+        seat and per strategy.
+        Games are added with add_game(GameResult). Passed as the observer
+        of engine.play_game, the points of every round are recorded too
+        (round_ended). Stats of separate batches (e.g. from different
+        worker processes) can be merged into one.
+
+    ATTRIBUTES:
+        lineup: list of str, the strategy name of each seat
+        games: int, the number of games
+        rounds: int, the number of rounds over all games
+        game_rounds: RunningStats, the rounds of every game
+        seats: list of SeatStats, the stats of each seat
+
+    OPERATIONS AVAILABLE:
+        add_game(), merge(), strategy() for the combined seats of a
+        strategy, moon_shot_rate(), str conversion for a table
+    """
+
+    lineup: list[str]
+    games: int
+    rounds: int
+    game_rounds: RunningStats
+    seats: list[SeatStats]
+
+    def __init__(self, lineup: list[str], bin_width: int = 10) -> None:
+        """
+        Initialise empty stats for a lineup, the score histograms with
+        bins of bin_width points.
+        """
+
+        self.lineup = list(lineup)
+        self.games = 0
+        self.rounds = 0
+        self.game_rounds = RunningStats()
+        self.seats = [SeatStats(strategy, bin_width) for strategy in lineup]
+
+    def round_ended(self, result: RoundResult) -> None:
+        """
+        Record the points each seat received in a round.
+        """
+
+        for seat in range(len(self.seats)):
+            self.seats[seat].round_points.add(result.score_changes[seat])
+
+    def add_game(self, result: GameResult) -> None:
+        """
+        Takes in a GameResult and add it to the stats.
+        """
+
+        self.games += 1
+        self.rounds += result.rounds
+        self.game_rounds.add(result.rounds)
+        for seat in range(len(self.seats)):
+            stats = self.seats[seat]
+            score = result.total_scores[seat]
+            stats.games += 1
+            stats.wins += seat == result.winner
+            stats.moon_shots += result.moon_shots[seat]
+            stats.game_scores.add(score)
+            stats.score_histogram.add(score)
+
+    def merge(self, other: OnlineStats) -> None:
+        """
+        Takes in stats of the same lineup and add them to these stats.
+        """
+
+        self.games += other.games
+        self.rounds += other.rounds
+        self.game_rounds.merge(other.game_rounds)
+        for seat in range(len(self.seats)):
+            self.seats[seat].merge(other.seats[seat])
+
+    def strategy(self, name: str) -> SeatStats:
+        """
+        Takes in a strategy name.
+        Return the stats of its seats combined (one game per seat played).
+        """
+
+        combined = SeatStats(name, self.seats[0].score_histogram.bin_width)
+        for stats in self.seats:
+            if stats.strategy == name:
+                combined.merge(stats)
+        return combined
+
+    def moon_shot_rate(self, z: float = Z_95) -> tuple[float, float, float]:
+        """
+        Return the share of rounds in which the moon was shot and its
+        Wilson interval, as (rate, low, high).
+        """
+
+        moons = sum(stats.moon_shots for stats in self.seats)
+        rate = moons / self.rounds if self.rounds else 0.0
+        return (rate,) + wilson_interval(moons, self.rounds, z)
+
+    def __str__(self) -> str:
+        """
+        Override the str() conversion.
+        Return the means and win rates with their 95% intervals as tables.
+        """
+
+        rate, low, high = self.moon_shot_rate()
+        lines = [f"games: {self.games}, rounds per game:"
+                 + f" {self.game_rounds.mean:.2f}"
+                 + f" (sd {self.game_rounds.stdev:.2f}),"
+                 + f" moon shots per round: {rate:.2%}"
+                 + f" [{low:.2%}, {high:.2%}]", "",
+                 "name      win rate [95% interval]    mean score"
+                 + " [95% interval]    sd    round points"]
+        rows = [(stats.strategy, stats) for stats in
+                map(self.strategy, dict.fromkeys(self.lineup))]
+        rows += [(f"seat {seat + 1}", self.seats[seat])
+                 for seat in range(len(self.seats))]
+        for name, stats in rows:
+            win_low, win_high = stats.win_interval()
+            score_low, score_high = stats.game_scores.interval()
+            win_rate = stats.wins / stats.games if stats.games else 0.0
+            lines.append(f"{name:<8}  {win_rate:>7.2%}"
+                         + f" [{win_low:>6.2%}, {win_high:>6.2%}]"
+                         + f"  {stats.game_scores.mean:>8.2f}"
+                         + f" [{score_low:>6.2f}, {score_high:>6.2f}]"
+                         + f"  {stats.game_scores.stdev:>5.2f}"
+                         + f"  {stats.round_points.mean:>12.2f}")
+        return "\n".join(lines)
+
+
+class SequentialTest:
+    """
+    DESCRIPTION:
+        A sequential test of the difference between two strategies of a
+        lineup that can be checked after every game (or batch of games)
+        without inflating the false positive rate: the mixture sequential
+        probability ratio test (mSPRT) on the per-game difference between
+        the strategies, with a normal mixture over the effect size.
+        Each game gives one paired difference: the mean of a metric over
+        the seats of first minus its mean over the seats of second, the
+        metric being the final score ("score", lower is better) or
+        winning the game ("win", higher is better).
+        The variance of the differences is estimated from the games so
+        far, and no decision is made before min_games games.
+
+    ATTRIBUTES:
+        lineup: list of str, the strategy name of each seat
+        first, second: str, the compared strategies
+        metric: str, "score" or "win"
+        alpha: float, the false positive rate of the test
+        tau: float or None, the standard deviation of the mixture over
+          the effect, the standard deviation of the differences when None
+        min_games: int, the games needed before a decision
+        differences: RunningStats, the per-game differences
+
+    OPERATIONS AVAILABLE:
+        add_game(), merge() the games of a batch, decided(), p_value(),
+        spawn() an empty test with the same settings for a worker,
+        str conversion for the outcome
+    """
+
+    METRICS = ("score", "win")
+
+    lineup: list[str]
+    first: str
+    second: str
+    metric: str
+    alpha: float
+    tau: float
+    min_games: int
+    differences: RunningStats
+
+    def __init__(self, lineup: list[str], first: str, second: str,
+                 metric: str = "score", alpha: float = 0.05,
+                 tau: float = None, min_games: int = 30) -> None:
+        """
+        Initialise the test of first against second in lineup.
+        Raise ValueError if a strategy is not in the lineup or the
+        metric is unknown.
+        """
+
+        for strategy in (first, second):
+            if strategy not in lineup:
+                raise ValueError(f"'{strategy}' does not play in the lineup")
+        if first == second:
+            raise ValueError("The test needs two different strategies")
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown metric '{metric}', available: "
+                             + ", ".join(self.METRICS))
+        if not 0 < alpha < 1:
+            raise ValueError("alpha has to be between 0 and 1")
+
+        self.lineup = list(lineup)
+        self.first = first
+        self.second = second
+        self.metric = metric
+        self.alpha = alpha
+        self.tau = tau
+        self.min_games = min_games
+        self.differences = RunningStats()
+        self._first_seats = [seat for seat in range(len(lineup))
+                             if lineup[seat] == first]
+        self._second_seats = [seat for seat in range(len(lineup))
+                              if lineup[seat] == second]
+        # the largest log likelihood ratio of the checks so far
+        self._max_log_ratio = 0.0
+
+    def spawn(self) -> SequentialTest:
+        """
+        Return an empty test with the same settings, whose games can be
+        merged into this test.
+        """
+
+        return SequentialTest(self.lineup, self.first, self.second,
+                              self.metric, self.alpha, self.tau,
+                              self.min_games)
+
+    def _value(self, result: GameResult, seat: int) -> float:
+        """
+        Return the metric of a seat in a game.
+        """
+
+        if self.metric == "win":
+            return float(seat == result.winner)
+        return float(result.total_scores[seat])
+
+    def add_game(self, result: GameResult) -> None:
+        """
+        Takes in a GameResult and add its difference to the test.
+        """
+
+        first = sum(self._value(result, seat) for seat in self._first_seats)
+        second = sum(self._value(result, seat)
+                     for seat in self._second_seats)
+        self.differences.add(first / len(self._first_seats)
+                             - second / len(self._second_seats))
+        self._check()
+
+    def merge(self, other: SequentialTest) -> None:
+        """
+        Takes in a test of the following games (e.g. a batch played by a
+        worker, see spawn()) and add its differences to the test.
+        """
+
+        self.differences.merge(other.differences)
+        self._check()
+
+    def log_ratio(self) -> float:
+        """
+        Return the log of the mixture likelihood ratio of the games so
+        far, 0 before two games or when every difference is the same.
+        """
+
+        count = self.differences.count
+        variance = self.differences.variance
+        if count < 2 or variance <= 0:
+            return 0.0
+        tau2 = self.tau * self.tau if self.tau is not None else variance
+        spread = variance + count * tau2
+        mean = self.differences.mean
+        return (0.5 * math.log(variance / spread)
+                + count * count * tau2 * mean * mean
+                / (2 * variance * spread))
+
+    def _check(self) -> None:
+        """
+        Update the largest likelihood ratio with the games so far.
+        """
+
+        if self.differences.count >= self.min_games:
+            self._max_log_ratio = max(self._max_log_ratio, self.log_ratio())
+
+    def p_value(self) -> float:
+        """
+        Return the always valid p-value of the checks so far.
+        """
+
+        return min(1.0, math.exp(-self._max_log_ratio))
+
+    def decided(self) -> bool:
+        """
+        Return if the difference is significant at alpha.
+        """
+
+        return self._max_log_ratio >= math.log(1 / self.alpha)
+
+    def leader(self) -> str:
+        """
+        Return the strategy doing better so far, None on a tie.
+        """
+
+        mean = self.differences.mean
+        if self.metric == "score":
+            mean = -mean
+        if mean > 0:
+            return self.first
+        if mean < 0:
+            return self.second
+        return None
+
+    def __str__(self) -> str:
+        """
+        Override the str() conversion.
+        Return the outcome of the test so far.
+        """
+
+        low, high = self.differences.interval()
+        outcome = (f"{self.leader()} is better" if self.decided()
+                   else "no significant difference")
+        return (f"{self.first} - {self.second} {self.metric}:"
+                + f" {self.differences.mean:+.3f}"
+                + f" [{low:+.3f}, {high:+.3f}] over"
+                + f" {self.differences.count} games, p <= {self.p_value():.4f}"
+                + f" (alpha {self.alpha}): {outcome}")
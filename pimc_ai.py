@@ -0,0 +1,164 @@
+from __future__ import annotations
+from time import perf_counter
+from cards import Card
+from better_ai import BetterAIPlayer
+from bitboard import popcount
+from card_tracker import CardTracker
+from endgame import EndgameCache
+from game_state import GameState
+from rollout import POLICIES, play_out
+
+
+class PIMCPlayer(BetterAIPlayer):
+    """
+    DESCRIPTION:
+        An AI player using perfect information Monte Carlo search.
+        For every sample it deals the unseen cards to the other players
+        so that they fit everything observed in the round
+        (see CardTracker), plays each valid card and finishes the round
+        with a fast rollout policy (see rollout.POLICIES).
+        The card with the lowest mean penalty over the samples is played.
+        The search stops at the time budget, so a move never takes much
+        longer than time_budget whatever the hand size.
+        With an endgame cache, samples small enough for it are valued
+        exactly by the cache instead of by a rollout.
+        Passes cards like BetterAIPlayer.
+
+    ATTRIBUTES:
+        Inherit the attributes of base player.
+        time_budget: float, the seconds a move may take
+        max_samples: int, the number of samples after which the search
+          stops early
+        rollout_policy: str, the policy every player uses in the rollouts
+        endgame: EndgameCache or None, the cache of exact endgame values
+        tracker: CardTracker or None, the observations of the current
+          round, None before the first round starts
+
+    OPERATIONS AVAILABLE:
+        str conversion will return the player name
+        repr connversion will return what str returns (the player name).
+        (Inherited from Player)
+    """
+
+    time_budget: float
+    max_samples: int
+    rollout_policy: str
+    endgame: EndgameCache
+    tracker: CardTracker
+
+    def __init__(self, name: str, time_budget: float = 0.2,
+                 max_samples: int = 100, rollout_policy: str = "compiled",
+                 endgame: EndgameCache = None) -> None:
+        """
+        Initialise the player and the search settings.
+        """
+
+        super().__init__(name)
+        if rollout_policy not in POLICIES:
+            raise ValueError(f"Unknown rollout policy '{rollout_policy}',"
+                             + " available: " + ", ".join(POLICIES))
+        self.time_budget = time_budget
+        self.max_samples = max_samples
+        self.rollout_policy = rollout_policy
+        self.endgame = endgame
+        self.tracker = None
+        # the cards passed before the round, for the next tracker
+        self._passed = None
+
+    def start_round(self, seat: int, player_count: int) -> None:
+        """
+        Start tracking a new round.
+        """
+
+        self.tracker = CardTracker(seat, player_count)
+        if self._passed is not None:
+            self.tracker.observe_pass(*self._passed)
+            self._passed = None
+
+    def observe_pass(self, target_index: int, cards: list[Card]) -> None:
+        """
+        Remember the cards passed, the receiver holds them in the round.
+        """
+
+        self._passed = (target_index, cards)
+
+    def observe_trick(self, trick: list[Card], leader_index: int,
+                      taker_index: int) -> None:
+        """
+        Record a complete trick.
+        """
+
+        if self.tracker is not None:
+            self.tracker.observe_trick(trick, leader_index, taker_index)
+
+    def play_card(self, trick: list[Card], broken_hearts: bool) -> Card:
+        """
+        Takes in the game context including the trick (list of Card) and if hearts broken (bool).
+        Search the valid card with the lowest expected penalty,
+        play like BetterAIPlayer when the round is not tracked.
+        The card to play is removed from hand and returned.
+        """
+
+        if self.tracker is None:
+            return super().play_card(trick, broken_hearts)
+
+        legal = self.legal_moves(trick, broken_hearts, as_mask=True)
+        moves = [i for i in range(52) if legal >> i & 1]
+        if len(moves) == 1:
+            card = Card.from_index(moves[0])
+        else:
+            card = Card.from_index(self.search(moves, trick, broken_hearts))
+        self.remove_card(card)
+        return card
+
+    def search(self, moves: list[int], trick: list[Card],
+               broken_hearts: bool) -> int:
+        """
+        Takes in the ordinals of the valid cards and the game context.
+        Evaluate every move on the same samples until the time budget or
+        max_samples is reached.
+        Return the ordinal of the move with the lowest mean penalty
+        (the lowest card on a tie).
+        """
+
+        deadline = perf_counter() + self.time_budget
+        tracker = self.tracker
+        seat = tracker.seat
+        policy = POLICIES[self.rollout_policy]
+        trick = [card.ordinal for card in trick]
+        leader = (seat - len(trick)) % tracker.player_count
+        endgame = self.endgame
+        if endgame is not None and not endgame.covers(popcount(
+                self.hand_mask)):
+            endgame = None
+        totals = [0] * len(moves)
+        runs = [0] * len(moves)
+
+        samples = 0
+        while samples < self.max_samples and perf_counter() < deadline:
+            hands = tracker.sample(self.rng, self.hand_mask, trick, leader)
+            root = GameState(hands, leader, trick, broken_hearts,
+                             tracker.round_scores, tracker.tricks_played)
+            for i in range(len(moves)):
+                state = root.clone()
+                state.apply(moves[i])
+                if endgame is not None:
+                    totals[i] += endgame.value(
+                        seat, state.hands, state.leader, state.trick,
+                        state.hearts_broken, state.round_scores)
+                else:
+                    totals[i] += play_out(state, policy)[seat]
+                runs[i] += 1
+                if perf_counter() >= deadline:
+                    break
+            samples += 1
+
+        best = None
+        for i in range(len(moves)):
+            if runs[i] and (best is None
+                            or totals[i] * runs[best] < totals[best] * runs[i]):
+                best = i
+        if best is None:
+            # no rollout fit in the budget
+            return POLICIES["better"](self.hand_mask, trick, broken_hearts)
+        return moves[best]
@@ -1,5 +1,148 @@
 from __future__ import annotations
-from cards import Card, Rank, Suit
+import random
+from cards import Card, Suit
+from bitboard import (SUIT_MASKS, NON_HEARTS_MASK, TWO_OF_CLUBS_BIT,
+                      card_bit, cards_from_mask, highest_index, legal_mask,
+                      lowest_index, mask_from_cards, popcount)
+
+
+class Hand(list):
+    """
+    DESCRIPTION:
+        The list of cards of Player.hand, in the order they were dealt
+        or received.
+        Changing the list in place (append, remove, +=, del, ...) updates
+        the hand_mask of its player, so the list and the mask always hold
+        the same cards. Assigning Player.hand replaces the list: the old
+        list is no longer the hand of the player, and changing it does
+        not affect the player.
+
+    ATTRIBUTES:
+        Inherit the attributes of list.
+    """
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, cards: list[Card] = (), owner: Player = None) -> None:
+        """
+        Initialise the list with cards, the hand of owner.
+        """
+
+        super().__init__(cards)
+        self._owner = owner
+
+    def _sync(self) -> None:
+        """
+        Rebuild the hand_mask of the player from the cards of the list.
+        Raise ValueError if the list holds a card twice, the player then
+        keeps the first of each card.
+        """
+
+        owner = self._owner
+        if owner is None or owner._hand is not self:
+            return
+        owner.hand_mask = mask_from_cards(self)
+        if popcount(owner.hand_mask) != len(self):
+            seen = 0
+            cards = []
+            for card in self:
+                if not seen & card_bit(card):
+                    seen |= card_bit(card)
+                    cards.append(card)
+            super().__setitem__(slice(None), cards)
+            raise ValueError(f"The hand of {owner} can not hold a card twice")
+
+    def append(self, card: Card) -> None:
+        """
+        Add a card at the end and to the mask.
+        """
+
+        super().append(card)
+        self._sync()
+
+    def extend(self, cards: list[Card]) -> None:
+        """
+        Add cards at the end and to the mask.
+        """
+
+        super().extend(cards)
+        self._sync()
+
+    def insert(self, index: int, card: Card) -> None:
+        """
+        Add a card before index and to the mask.
+        """
+
+        super().insert(index, card)
+        self._sync()
+
+    def remove(self, card: Card) -> None:
+        """
+        Remove a card from the list and the mask.
+        """
+
+        super().remove(card)
+        self._sync()
+
+    def pop(self, index: int = -1) -> Card:
+        """
+        Remove a card from the list and the mask.
+        Return the card.
+        """
+
+        card = super().pop(index)
+        self._sync()
+        return card
+
+    def clear(self) -> None:
+        """
+        Remove every card from the list and the mask.
+        """
+
+        super().clear()
+        self._sync()
+
+    def __setitem__(self, index, value) -> None:
+        """
+        Replace cards of the list and the mask.
+        """
+
+        super().__setitem__(index, value)
+        self._sync()
+
+    def __delitem__(self, index) -> None:
+        """
+        Remove cards from the list and the mask.
+        """
+
+        super().__delitem__(index)
+        self._sync()
+
+    def __iadd__(self, cards: list[Card]) -> Hand:
+        """
+        Add cards at the end and to the mask (the += operator).
+        """
+
+        super().__iadd__(cards)
+        self._sync()
+        return self
+
+    def __imul__(self, count: int) -> Hand:
+        """
+        Repeat the cards (the *= operator), only valid to empty the hand.
+        """
+
+        super().__imul__(count)
+        self._sync()
+        return self
+
+    def __reduce__(self) -> tuple:
+        """
+        Pickle the cards and the player, who is set once the list exists
+        (the player holds the list).
+        """
+
+        return Hand, (list(self),), (None, {"_owner": self._owner})
 
 
 class Player:
@@ -10,29 +153,43 @@ class Player:
         Provide functionality to validate if a card is valid to player.
     ATTRIBUTES:
         name: str, the name of the player
-        hand: list of Cards, the list of cards this player holds
+        hand: Hand (list of Cards), the cards this player holds in the
+          order they were dealt or received, changing it in place updates
+          hand_mask
+        hand_mask: int, bitboard of the cards in hand (see bitboard.py),
+          the 13 bits of a suit are its cards in rank order, so adding,
+          removing and finding the lowest/highest card of a suit are a
+          few integer operations
         round_score: int, the score for a current round
         total_score: int, the score for the entire game
+        rng: random.Random, the source of randomness for stochastic
+          players, games assign one from GameStreams.player(seat)
 
     OPERATIONS AVAILABLE:
         str/repr conversion to get the string of a player name
+        lowest_in_suit(), highest_in_suit(), highest_below() and
+        lowest_legal() to find cards without sorting the hand
     '''
     
     name: str
     hand: list[Card]
+    hand_mask: int
     round_score: int
     total_score: int
+    rng: random.Random
 
     def __init__(self, name: str) -> None:
         '''
         Assign name attribute.
         Initialise hand, round_score and total_score to default value.
+        Use the global random module until a game assigns an rng.
         '''
         
         self.name = name
         self.hand = []
         self.round_score = 0
         self.total_score = 0
+        self.rng = random
 
     def __str__(self) -> None:
         """
@@ -51,6 +208,119 @@ class Player:
         """
         return self.__str__()
 
+    @property
+    def hand(self) -> list[Card]:
+        """
+        The list of cards this player holds (see Hand).
+        """
+
+        return self._hand
+
+    @hand.setter
+    def hand(self, cards: list[Card]) -> None:
+        """
+        Replace the cards in hand.
+        Raise ValueError if a card is given twice.
+        """
+
+        self._hand = Hand(cards, self)
+        self._hand._sync()
+
+    def add_cards(self, cards: list[Card]) -> None:
+        """
+        Takes in a list of cards and add them to hand.
+        """
+
+        self._hand.extend(cards)
+
+    def remove_card(self, card: Card) -> None:
+        """
+        Takes in a card and remove it from hand.
+        Raise ValueError if the card is not in hand.
+        """
+
+        bit = card_bit(card)
+        if not self.hand_mask & bit:
+            raise ValueError(f"{card!r} is not in the hand of {self}")
+        self.hand_mask ^= bit
+        list.remove(self._hand, card)
+
+    def lowest_in_suit(self, suit: Suit) -> Card:
+        """
+        Return the lowest card of a suit in hand, None if there is none.
+        """
+
+        cards = self.hand_mask & SUIT_MASKS[suit.value]
+        return Card.from_index(lowest_index(cards)) if cards else None
+
+    def highest_in_suit(self, suit: Suit) -> Card:
+        """
+        Return the highest card of a suit in hand, None if there is none.
+        """
+
+        cards = self.hand_mask & SUIT_MASKS[suit.value]
+        return Card.from_index(highest_index(cards)) if cards else None
+
+    def highest_below(self, card: Card) -> Card:
+        """
+        Return the highest card in hand of the same suit as card that is
+        lower than card, None if there is none.
+        """
+
+        ordinal = card.ordinal
+        cards = (self.hand_mask & SUIT_MASKS[ordinal // 13]
+                 & ((1 << ordinal) - 1))
+        return Card.from_index(highest_index(cards)) if cards else None
+
+    def lowest_legal(self, trick: list[Card], broken_hearts: bool) -> Card:
+        """
+        Takes in the game context including the trick (list of Card) and if hearts broken (bool).
+        Return the lowest card in hand that is valid to play.
+        """
+
+        return Card.from_index(lowest_index(
+            self.legal_moves(trick, broken_hearts, as_mask=True)))
+
+    def legal_moves(self, trick: list[Card], broken_hearts: bool,
+                    as_mask: bool = False) -> list[Card]:
+        '''
+        Takes in the game context including the trick (list of Card) and if hearts broken (bool).
+        Determine every card in hand that is valid to play in one pass,
+        with the same rules as check_valid_play.
+        Return the valid cards as a list in ascending order,
+        or as a bitboard (int) if as_mask is True.
+        '''
+
+        lead_suit = trick[0].ordinal // 13 if trick else None
+        legal = legal_mask(self.hand_mask, lead_suit, broken_hearts)
+        if as_mask:
+            return legal
+        return cards_from_mask(legal)
+
+    def start_round(self, seat: int, player_count: int) -> None:
+        """
+        Takes in the index of this player and the number of players.
+        Called before the first trick of every round.
+        Does nothing, players who keep track of the round override it.
+        """
+
+    def observe_pass(self, target_index: int, cards: list[Card]) -> None:
+        """
+        Takes in the index of the player this player passed cards to and
+        the cards passed.
+        Called after this player passed cards, before the round starts.
+        Does nothing, players who keep track of the round override it.
+        """
+
+    def observe_trick(self, trick: list[Card], leader_index: int,
+                      taker_index: int) -> None:
+        """
+        Takes in a complete trick, the index of the player who led it and
+        of the player who took it.
+        Called after every trick for every player.
+        Does nothing, players who keep track of the round override it.
+        """
+
     def check_valid_play(self, card: Card, trick: list[Card], broken_hearts: bool) -> tuple(bool, str):
         '''
         Takes in the game context including the trick (list of Card) and if hearts broken (bool).
@@ -63,15 +333,8 @@ class Player:
         if trick:
             leading_suit = trick[0].suit
 
-            # check if user has leading Suit
-            has_leading_suit = False
-            for i in self.hand:
-                if i.suit == leading_suit:
-                    has_leading_suit = True
-                    break
-
             # if player has leading suit
-            if has_leading_suit:
+            if self.hand_mask & SUIT_MASKS[leading_suit.value]:
                 # player must play same suit
                 if card.suit == leading_suit:
                     return True, ""
@@ -85,8 +348,8 @@ class Player:
         # player is leading
         else:
             # If Two of clubs exist, player must not play any other
-            if Card(Rank.Two, Suit.Clubs) in self.hand:
-                if card == Card(Rank.Two, Suit.Clubs):
+            if self.hand_mask & TWO_OF_CLUBS_BIT:
+                if card_bit(card) == TWO_OF_CLUBS_BIT:
                     return True, ""
 
                 return False, "Player must play Two of Clubs"
@@ -95,15 +358,8 @@ class Player:
             if broken_hearts:
                 return True, ""
 
-            # Check if non heart card exist
-            has_none_heart_card = False
-            for i in self.hand:
-                if i.suit != Suit.Hearts:
-                    has_none_heart_card = True
-                    break
-
             # if only has heart, play any card
-            if not has_none_heart_card:
+            if not self.hand_mask & NON_HEARTS_MASK:
                 return True, ""
 
             # if hearts not broken, play non heart card
@@ -111,4 +367,3 @@ class Player:
                 return False, "You have to play non-heart card"
             else:
                 return True, ""
-
@@ -0,0 +1,235 @@
+from __future__ import annotations
+import functools
+from time import perf_counter
+import engine
+from engine import RoundEngine
+from player import Player
+
+# the frame every other phase is under in the collapsed stacks
+ROOT_FRAME = "hearts"
+
+
+class PhaseProfiler:
+    """
+    DESCRIPTION:
+        Opt-in timers for the phases of a game: dealing, passing, each
+        player class's play_card, determine_taker_index,
+        determine_penalty and calculate_points, of Hearts and of the
+        headless engine (play_game) alike.
+        Nothing is timed until enable(): it wraps the timed functions in
+        place and disable() puts the originals back, so a game run
+        without a profiler costs nothing more.
+        Time is recorded per stack of phases (e.g. play_card inside
+        pass_cards would be its own entry), with the time of the phases
+        inside a phase subtracted as self time.
+
+    ATTRIBUTES:
+        game_class: class or None, the interactive game class whose
+          dealt_card, pass_cards and calculate_points are timed
+          (e.g. Hearts), None to only time the headless engine
+        stats: dict, (phase, ...) stack -> [calls, total seconds,
+          self seconds]
+        wall_time: float, the seconds the profiler was enabled
+
+    OPERATIONS AVAILABLE:
+        enable(), disable(), with statement to enable for a block,
+        summary() for a table, collapsed() and write_collapsed() for
+        flamegraph collapsed stacks
+    """
+
+    game_class: type
+    stats: dict[tuple, list]
+    wall_time: float
+
+    _active = None
+
+    def __init__(self, game_class: type = None) -> None:
+        """
+        Initialise a disabled profiler without records.
+        """
+
+        self.game_class = game_class
+        self.stats = {}
+        self.wall_time = 0.0
+        self._stack = []
+        self._patches = []
+        self._enabled_at = None
+
+    def _targets(self) -> list[tuple]:
+        """
+        Return the (owner, attribute name, phase) of every timed function,
+        phase None for play_card which is named after the player class.
+        """
+
+        targets = [(engine, "deal_hands", "dealt_card"),
+                   (engine, "pass_hands", "pass_cards"),
+                   (engine, "calculate_points", "calculate_points"),
+                   (RoundEngine, "determine_taker_index",
+                    "determine_taker_index"),
+                   (RoundEngine, "determine_penalty", "determine_penalty")]
+        if self.game_class is not None:
+            targets += [(self.game_class, name, name)
+                        for name in ("dealt_card", "pass_cards",
+                                     "calculate_points")]
+
+        # every player class defining play_card, including subclasses
+        pending = [Player]
+        while pending:
+            player_class = pending.pop()
+            if "play_card" in vars(player_class):
+                targets.append((player_class, "play_card", None))
+            pending += player_class.__subclasses__()
+        return targets
+
+    def enable(self) -> None:
+        """
+        Start timing the phases.
+        Raise RuntimeError if a profiler is already enabled.
+        """
+
+        if PhaseProfiler._active is not None:
+            raise RuntimeError("A profiler is already enabled")
+        PhaseProfiler._active = self
+
+        for owner, name, phase in self._targets():
+            function = vars(owner)[name]
+            self._patches.append((owner, name, function))
+            setattr(owner, name, self._wrap(function, phase))
+        self._enabled_at = perf_counter()
+
+    def disable(self) -> None:
+        """
+        Stop timing and restore the timed functions.
+        """
+
+        if PhaseProfiler._active is not self:
+            return
+        self.wall_time += perf_counter() - self._enabled_at
+        for owner, name, function in reversed(self._patches):
+            setattr(owner, name, function)
+        self._patches = []
+        self._stack = []
+        PhaseProfiler._active = None
+
+    def __enter__(self) -> PhaseProfiler:
+        """
+        Enable the profiler for a with statement.
+        """
+
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Disable the profiler at the end of a with statement.
+        """
+
+        self.disable()
+
+    def _wrap(self, function, phase: str):
+        """
+        Return function timed as phase, as the phase named after the
+        class of the player when phase is None.
+        """
+
+        stack = self._stack
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            name = phase or f"play_card[{type(args[0]).__name__}]"
+            if stack and stack[-1][0] == name:
+                # a subclass calling the play_card it overrides
+                return function(*args, **kwargs)
+            stack.append([name, perf_counter(), 0.0])
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._record(perf_counter())
+
+        return timed
+
+    def _record(self, end: float) -> None:
+        """
+        Record the phase on top of the stack, which ends at end.
+        """
+
+        path = tuple(frame[0] for frame in self._stack)
+        _, start, inner = self._stack.pop()
+        elapsed = end - start
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        entry = self.stats.get(path)
+        if entry is None:
+            entry = self.stats[path] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += elapsed - inner
+
+    def phases(self) -> list[tuple[str, int, float, float]]:
+        """
+        Combine the stacks ending with the same phase.
+        Return a list of (phase, calls, total seconds, self seconds)
+        tuples, the longest total first.
+        """
+
+        phases = {}
+        for path, (calls, total, own) in self.stats.items():
+            entry = phases.setdefault(path[-1], [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += total
+            entry[2] += own
+        return sorted(((phase,) + tuple(entry)
+                       for phase, entry in phases.items()),
+                      key=lambda row: -row[2])
+
+    def _wall_time(self) -> float:
+        """
+        Return the seconds enabled so far.
+        """
+
+        if PhaseProfiler._active is self:
+            return self.wall_time + perf_counter() - self._enabled_at
+        return self.wall_time
+
+    def summary(self) -> str:
+        """
+        Return the phases (see phases()) as a table with the mean time
+        per call and the share of the time enabled.
+        """
+
+        wall_time = self._wall_time()
+        lines = [f"{'phase':<30}  {'calls':>7}  {'total s':>10}"
+                 + f"  {'self s':>10}  {'mean us':>10}  {'% wall':>6}"]
+        for phase, calls, total, own in self.phases():
+            share = total / wall_time if wall_time else 0.0
+            lines.append(f"{phase:<30}  {calls:>7}  {total:>10.3f}"
+                         + f"  {own:>10.3f}  {total / calls * 1e6:>10.1f}"
+                         + f"  {share:>6.1%}")
+        lines.append(f"enabled for {wall_time:.3f}s")
+        return "\n".join(lines)
+
+    def collapsed(self) -> list[str]:
+        """
+        Return the self time of every stack in microseconds as collapsed
+        stack lines ("hearts;pass_cards 1234"), the format read by
+        flamegraph.pl and speedscope. The time outside every phase is
+        the self time of the root frame.
+        """
+
+        outside = self._wall_time()
+        lines = []
+        for path, (_, total, own) in sorted(self.stats.items()):
+            if len(path) == 1:
+                outside -= total
+            lines.append(";".join((ROOT_FRAME,) + path)
+                         + f" {round(own * 1e6)}")
+        lines.insert(0, f"{ROOT_FRAME} {max(round(outside * 1e6), 0)}")
+        return lines
+
+    def write_collapsed(self, path: str) -> None:
+        """
+        Write the collapsed stacks (see collapsed()) to a file.
+        """
+
+        with open(path, "w") as file:
+            file.write("\n".join(self.collapsed()) + "\n")
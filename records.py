@@ -0,0 +1,471 @@
+from __future__ import annotations
+import struct
+from cards import Card
+from player import Player
+from dealing import generate_deck
+from engine import RoundObserver
+
+# the version byte at the start of every encoded game
+RECORD_VERSION = 1
+# strategy name <-> code of a seat, only append to keep old records valid
+STRATEGY_CODES = ["human", "basic", "better", "custom", "pimc",
+                  "ismcts"]
+# every frame of a record file starts with the payload length
+FRAME_HEADER = struct.Struct("<I")
+CARD_BITS = 6
+
+
+class RoundRecord:
+    """
+    DESCRIPTION:
+        Everything that happened in one round, as card ordinals.
+
+    ATTRIBUTES:
+        deal: list of list of int, the cards each player was dealt
+          (ascending)
+        passes: list of list of int, the 3 cards each player passed,
+          empty lists when the round has no passing
+        plays: list of int, every card in the order played
+    """
+
+    deal: list[list[int]]
+    passes: list[list[int]]
+    plays: list[int]
+
+    def __init__(self, deal: list[list[int]], passes: list[list[int]],
+                 plays: list[int]) -> None:
+        """
+        Initialise the round record.
+        """
+
+        self.deal = deal
+        self.passes = passes
+        self.plays = plays
+
+    def __eq__(self, other: RoundRecord) -> bool:
+        """
+        Override the == operator.
+        Compare deal, passes and plays.
+        """
+
+        return (self.deal == other.deal and self.passes == other.passes
+                and self.plays == other.plays)
+
+
+class GameRecord:
+    """
+    DESCRIPTION:
+        A full game: who sat where, the seeds it was played with and
+        every round.
+
+    ATTRIBUTES:
+        lineup: list of str, the strategy name of each seat
+          (see STRATEGY_CODES)
+        master_seed: int, the master seed of the game's streams
+        game_id: int, the game id of the game's streams
+        rounds: list of RoundRecord, every round in order
+
+    OPERATIONS AVAILABLE:
+        encode() to pack the game, GameRecord.decode() to unpack it
+    """
+
+    lineup: list[str]
+    master_seed: int
+    game_id: int
+    rounds: list[RoundRecord]
+
+    def __init__(self, lineup: list[str], master_seed: int, game_id: int,
+                 rounds: list[RoundRecord] = None) -> None:
+        """
+        Initialise the game record.
+        """
+
+        self.lineup = list(lineup)
+        self.master_seed = master_seed
+        self.game_id = game_id
+        self.rounds = rounds if rounds is not None else []
+
+    def __eq__(self, other: GameRecord) -> bool:
+        """
+        Override the == operator.
+        Compare every field.
+        """
+
+        return (self.lineup == other.lineup
+                and self.master_seed == other.master_seed
+                and self.game_id == other.game_id
+                and self.rounds == other.rounds)
+
+    def encode(self) -> bytes:
+        """
+        Pack the game into bytes:
+        version, player count, one code byte per seat, master seed and
+        game id as zigzag varints (both may be negative), round count as
+        varint, then a bit stream with
+        for every round the seat holding each card of the deck
+        (2 bits, 3 for 5 players), the passed cards and the played cards
+        (6 bits per card).
+        Return the packed bytes.
+        """
+
+        player_count = len(self.lineup)
+        out = bytearray([RECORD_VERSION, player_count])
+        out += bytes(STRATEGY_CODES.index(name) for name in self.lineup)
+        _write_varint(out, _zigzag(self.master_seed))
+        _write_varint(out, _zigzag(self.game_id))
+        _write_varint(out, len(self.rounds))
+
+        deck = _deck_ordinals(player_count)
+        seat_bits = (player_count - 1).bit_length()
+        bits = _BitWriter()
+        for round_number in range(1, len(self.rounds) + 1):
+            round_record = self.rounds[round_number - 1]
+            seat_of = {}
+            for seat in range(player_count):
+                for card in round_record.deal[seat]:
+                    seat_of[card] = seat
+            for card in deck:
+                bits.write(seat_of[card], seat_bits)
+
+            if round_number % player_count:
+                for seat in range(player_count):
+                    for card in round_record.passes[seat]:
+                        bits.write(card, CARD_BITS)
+
+            for card in round_record.plays:
+                bits.write(card, CARD_BITS)
+
+        out += bits.to_bytes()
+        return bytes(out)
+
+    @staticmethod
+    def decode(data: bytes) -> GameRecord:
+        """
+        Takes in bytes packed by encode().
+        Return the unpacked GameRecord.
+        Raise ValueError if the data is not a valid record.
+        """
+
+        if len(data) < 2 or data[0] != RECORD_VERSION:
+            raise ValueError("Unsupported game record version")
+
+        player_count = data[1]
+        if not 3 <= player_count <= 5:
+            raise ValueError("Corrupt game record player count")
+        position = 2 + player_count
+        if len(data) < position:
+            raise ValueError("Truncated game record header")
+        lineup = []
+        for code in data[2:position]:
+            if code >= len(STRATEGY_CODES):
+                raise ValueError(f"Unknown strategy code {code} in game"
+                                 + " record")
+            lineup.append(STRATEGY_CODES[code])
+        try:
+            master_seed, position = _read_varint(data, position)
+            game_id, position = _read_varint(data, position)
+            round_count, position = _read_varint(data, position)
+        except IndexError:
+            raise ValueError("Truncated game record header")
+        master_seed = _unzigzag(master_seed)
+        game_id = _unzigzag(game_id)
+
+        deck = _deck_ordinals(player_count)
+        seat_bits = (player_count - 1).bit_length()
+        bits = _BitReader(data[position:])
+        rounds = []
+        for round_number in range(1, round_count + 1):
+            deal = [[] for _ in range(player_count)]
+            for card in deck:
+                seat = bits.read(seat_bits)
+                if seat >= player_count:
+                    raise ValueError("corrupt deal")
+                deal[seat].append(card)
+
+            passes = [[] for _ in range(player_count)]
+            if round_number % player_count:
+                for seat in range(player_count):
+                    passes[seat] = [bits.read(CARD_BITS) for _ in range(3)]
+
+            plays = [bits.read(CARD_BITS) for _ in range(len(deck))]
+            rounds.append(RoundRecord(deal, passes, plays))
+
+        return GameRecord(lineup, master_seed, game_id, rounds)
+
+
+class GameRecorder(RoundObserver):
+    """
+    DESCRIPTION:
+        An observer that builds a GameRecord while a game is played,
+        pass it as the observer of engine.play_game.
+
+    ATTRIBUTES:
+        record: GameRecord, the game recorded so far
+    """
+
+    record: GameRecord
+
+    def __init__(self, lineup: list[str], master_seed: int,
+                 game_id: int) -> None:
+        """
+        Initialise an empty record.
+        """
+
+        self.record = GameRecord(lineup, master_seed, game_id)
+        self._seats = {}
+
+    def cards_dealt(self, players: list[Player]) -> None:
+        """
+        Start a new round with the dealt hands.
+        """
+
+        self._seats = {id(players[seat]): seat
+                       for seat in range(len(players))}
+        deal = [sorted(card.ordinal for card in player.hand)
+                for player in players]
+        passes = [[] for _ in players]
+        self.record.rounds.append(RoundRecord(deal, passes, []))
+
+    def cards_passed(
+      self, source: Player, target: Player, cards: list[Card]) -> None:
+        """
+        Record the cards passed by source.
+        """
+
+        self.record.rounds[-1].passes[self._seats[id(source)]] = [
+            card.ordinal for card in cards]
+
+    def card_played(self, player: Player, card: Card, leading: bool) -> None:
+        """
+        Record the card played.
+        """
+
+        self.record.rounds[-1].plays.append(card.ordinal)
+
+
+class RecordWriter:
+    """
+    DESCRIPTION:
+        Appends encoded games to a record file as length-prefixed frames
+        (a 4 byte little-endian length, then the payload).
+        Frames are collected in memory and written in bulk once the
+        buffer reaches buffer_size bytes, and when flushed or closed.
+
+    ATTRIBUTES:
+        path: str, the record file
+        buffer_size: int, the number of buffered bytes that triggers a write
+        offset: int, the file offset where the next frame will start
+
+    OPERATIONS AVAILABLE:
+        append() and append_bytes() to add a game, flush(), close(),
+        and use in a with statement to close automatically
+    """
+
+    path: str
+    buffer_size: int
+    offset: int
+
+    def __init__(self, path: str, buffer_size: int = 1 << 20) -> None:
+        """
+        Open the record file for appending.
+        """
+
+        self.path = path
+        self.buffer_size = buffer_size
+        self._file = open(path, "ab")
+        self._file.seek(0, 2)
+        self.offset = self._file.tell()
+        self._buffer = bytearray()
+
+    def append(self, record: GameRecord) -> int:
+        """
+        Encode and append a game.
+        Return the file offset of its frame.
+        """
+
+        return self.append_bytes(record.encode())
+
+    def append_bytes(self, payload: bytes) -> int:
+        """
+        Append an already encoded game.
+        Return the file offset of its frame.
+        """
+
+        frame_offset = self.offset
+        self._buffer += FRAME_HEADER.pack(len(payload))
+        self._buffer += payload
+        self.offset += FRAME_HEADER.size + len(payload)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+        return frame_offset
+
+    def flush(self) -> None:
+        """
+        Write the buffered frames to the file.
+        """
+
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self) -> None:
+        """
+        Flush and close the file.
+        """
+
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> RecordWriter:
+        """
+        Return the writer itself for use in a with statement.
+        """
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Close the writer at the end of a with statement.
+        """
+
+        self.close()
+
+
+def read_frames(path: str):
+    """
+    Takes in the path of a record file.
+    Yield the payload of every frame in order.
+    Raise ValueError if the last frame is cut short.
+    """
+
+    with open(path, "rb") as file:
+        while True:
+            header = file.read(FRAME_HEADER.size)
+            if not header:
+                return
+            if len(header) < FRAME_HEADER.size:
+                raise ValueError("Truncated frame header")
+            (length,) = FRAME_HEADER.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length:
+                raise ValueError("Truncated frame")
+            yield payload
+
+
+def read_records(path: str):
+    """
+    Takes in the path of a record file.
+    Yield every GameRecord in order.
+    """
+
+    for payload in read_frames(path):
+        yield GameRecord.decode(payload)
+
+
+def _deck_ordinals(player_count: int) -> list[int]:
+    """
+    Return the ordinals of the deck used for player_count players.
+    """
+
+    return [card.ordinal for card in generate_deck(player_count)]
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    """
+    Append a non-negative integer as LEB128 (7 bits per byte).
+    """
+
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value: int) -> int:
+    """
+    Map a signed integer to a non-negative one for _write_varint:
+    0, -1, 1, -2, 2... become 0, 1, 2, 3, 4...
+    """
+
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    """
+    Return the signed integer mapped to value by _zigzag.
+    """
+
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def _read_varint(data: bytes, position: int) -> tuple[int, int]:
+    """
+    Read a LEB128 integer starting at position.
+    Return the value and the position after it.
+    """
+
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class _BitWriter:
+    """
+    Packs fixed width values, least significant bit first.
+    """
+
+    def __init__(self) -> None:
+        """
+        Start with no bits written.
+        """
+
+        self.value = 0
+        self.length = 0
+
+    def write(self, value: int, width: int) -> None:
+        """
+        Append value using width bits.
+        """
+
+        self.value |= value << self.length
+        self.length += width
+
+    def to_bytes(self) -> bytes:
+        """
+        Return the written bits padded to whole bytes.
+        """
+
+        return self.value.to_bytes((self.length + 7) // 8, "little")
+
+
+class _BitReader:
+    """
+    Unpacks fixed width values written by _BitWriter.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        """
+        Start reading at the first bit of data.
+        """
+
+        self.value = int.from_bytes(data, "little")
+        self.position = 0
+        self.length = len(data) * 8
+
+    def read(self, width: int) -> int:
+        """
+        Return the next width bits as integer.
+        """
+
+        if self.position + width > self.length:
+            raise ValueError("Truncated game record")
+        value = (self.value >> self.position) & ((1 << width) - 1)
+        self.position += width
+        return value
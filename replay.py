@@ -0,0 +1,293 @@
+from __future__ import annotations
+import argparse
+import mmap
+import os
+import struct
+from array import array
+from hashlib import blake2b
+from bitboard import popcount
+from cards import Card
+from game_state import GameState
+from records import FRAME_HEADER, GameRecord, RoundRecord
+from dealing import is_penalty_card
+
+# index file layout: magic, the size of the record file it covers and a
+# digest of the covered records (see RecordFile._digest), then the offsets
+INDEX_MAGIC = b"HRI1"
+INDEX_HEADER = struct.Struct("<4sQ16s")
+# the first bytes of the record file that go into the digest
+DIGEST_HEAD = 1 << 16
+
+
+def start_round(round_record: RoundRecord, round_number: int) -> GameState:
+    """
+    Check the deal and apply the passes of a round record.
+    Raise ValueError if the deal or the passes are not valid.
+    Return the GameState before the first card.
+    """
+
+    player_count = len(round_record.deal)
+    hand_size = len(round_record.deal[0])
+    hands = []
+    for seat in range(player_count):
+        cards = round_record.deal[seat]
+        if len(cards) != hand_size:
+            raise ValueError(f"Player {seat + 1} was dealt {len(cards)}"
+                             + f" cards instead of {hand_size}")
+        if all(is_penalty_card(Card.from_index(card)) for card in cards):
+            raise ValueError(f"Player {seat + 1} was dealt an invalid hand")
+        hands.append(sum(1 << card for card in cards))
+
+    offset = round_number % player_count
+    if offset:
+        received = [0] * player_count
+        for seat in range(player_count):
+            passed = 0
+            for card in round_record.passes[seat]:
+                passed |= 1 << card
+            if popcount(passed) != 3 or passed & ~hands[seat]:
+                raise ValueError(f"Player {seat + 1} passed cards they do"
+                                 + " not hold")
+            hands[seat] ^= passed
+            received[(seat + offset) % player_count] |= passed
+        for seat in range(player_count):
+            hands[seat] |= received[seat]
+
+    return GameState(hands)
+
+
+def replay_round(round_record: RoundRecord, round_number: int,
+                 tricks: int = None) -> GameState:
+    """
+    Replay a round from its record, stopping after the given number of
+    tricks (the whole round when tricks is None).
+    Raise ValueError if any move of the record is not legal.
+    Return the GameState at that point.
+    """
+
+    state = start_round(round_record, round_number)
+    plays = round_record.plays
+    stop = len(plays) if tricks is None else tricks * state.player_count
+    for card in plays[:stop]:
+        state.play(card)
+    return state
+
+
+def score_changes(round_scores: list[int]) -> list[int]:
+    """
+    Apply the shoot the moon rule (see Hearts.calculate_points).
+    Return the points added to each player's total score.
+    """
+
+    for seat in range(len(round_scores)):
+        if round_scores[seat] == 26:
+            return [0 if i == seat else 26 for i in range(len(round_scores))]
+    return list(round_scores)
+
+
+def replay_game(record: GameRecord, round_index: int = None,
+                tricks: int = None) -> tuple[list[int], GameState]:
+    """
+    Replay a game up to round round_index (0 based, the last round when
+    None) after the given number of tricks (the whole round when None).
+    Earlier rounds are replayed in full to get the total scores.
+    Raise ValueError if the record holds an illegal move.
+    Return the total scores before that round and its GameState.
+    """
+
+    if round_index is None:
+        round_index = len(record.rounds) - 1
+
+    totals = [0] * len(record.lineup)
+    for index in range(round_index):
+        state = replay_round(record.rounds[index], index + 1)
+        changes = score_changes(state.round_scores)
+        totals = [totals[i] + changes[i] for i in range(len(totals))]
+
+    state = replay_round(record.rounds[round_index], round_index + 1, tricks)
+    return totals, state
+
+
+class RecordFile:
+    """
+    DESCRIPTION:
+        Random access to the games of a record file (see RecordWriter).
+        The file is memory mapped, so opening a multi-gigabyte file does
+        not read it. The frame offsets are kept in an index file next to
+        the records (path + ".idx", 8 bytes per game), built on first
+        open and extended when the record file has grown.
+        The index holds the size of the record file it covers and a
+        digest of its first bytes and its last frame: when the record
+        file is smaller or does not start with the same records (it was
+        replaced), the index is rebuilt.
+
+    ATTRIBUTES:
+        path: str, the record file
+        offsets: array of int, the file offset of every frame
+
+    OPERATIONS AVAILABLE:
+        len() to get the number of games, indexing to get a GameRecord,
+        frame() to get the encoded bytes of a game, close()
+    """
+
+    path: str
+    offsets: array
+
+    def __init__(self, path: str) -> None:
+        """
+        Open and memory map the record file, load or build its index.
+        """
+
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = b""
+        try:
+            if size:
+                self._map = mmap.mmap(self._file.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+            self.offsets = self._load_index(size)
+        except BaseException:
+            # do not leak the file and the map of a file that can not be read
+            self.close()
+            raise
+
+    def _load_index(self, size: int) -> array:
+        """
+        Load the saved offsets, then scan the frame headers after the
+        last known frame and save the index if it grew.
+        Return the offsets.
+        """
+
+        offsets = array("Q")
+        index_path = self.path + ".idx"
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as index_file:
+                data = index_file.read()
+            if len(data) >= INDEX_HEADER.size:
+                magic, covered, digest = INDEX_HEADER.unpack_from(data)
+                offsets.frombytes(data[INDEX_HEADER.size:])
+                # an index of another (e.g. replaced) record file, rebuild
+                if (magic != INDEX_MAGIC or covered > size
+                        or not offsets
+                        or offsets[-1] + FRAME_HEADER.size > covered
+                        or self._frame_end(offsets[-1]) != covered
+                        or self._digest(offsets) != digest):
+                    offsets = array("Q")
+
+        known = len(offsets)
+        position = 0
+        if offsets:
+            position = self._frame_end(offsets[-1])
+        while position + FRAME_HEADER.size <= size:
+            offsets.append(position)
+            position = self._frame_end(position)
+
+        if position > size:
+            raise ValueError("The last frame of the record file is cut"
+                             + " short")
+        if len(offsets) > known:
+            with open(index_path, "wb") as index_file:
+                index_file.write(INDEX_HEADER.pack(INDEX_MAGIC, position,
+                                                   self._digest(offsets)))
+                index_file.write(offsets.tobytes())
+        return offsets
+
+    def _frame_end(self, offset: int) -> int:
+        """
+        Return the offset after the frame starting at offset.
+        """
+
+        return offset + FRAME_HEADER.size + self._length_at(offset)
+
+    def _digest(self, offsets: array) -> bytes:
+        """
+        Takes in the offsets of the frames an index covers.
+        Return a digest of the first DIGEST_HEAD bytes and the last frame
+        they cover, which tells a record file that grew by appending
+        from one that was replaced without reading all of it.
+        """
+
+        digest = blake2b(digest_size=16)
+        if offsets:
+            end = self._frame_end(offsets[-1])
+            digest.update(self._map[:min(end, DIGEST_HEAD)])
+            digest.update(self._map[offsets[-1]:end])
+        return digest.digest()
+
+    def _length_at(self, offset: int) -> int:
+        """
+        Return the payload length of the frame starting at offset.
+        """
+
+        return FRAME_HEADER.unpack_from(self._map, offset)[0]
+
+    def __len__(self) -> int:
+        """
+        Return the number of games in the file.
+        """
+
+        return len(self.offsets)
+
+    def frame(self, index: int) -> bytes:
+        """
+        Return the encoded bytes of the game at index.
+        """
+
+        start = self.offsets[index] + FRAME_HEADER.size
+        return self._map[start:start + self._length_at(self.offsets[index])]
+
+    def __getitem__(self, index: int) -> GameRecord:
+        """
+        Return the decoded GameRecord at index.
+        """
+
+        return GameRecord.decode(self.frame(index))
+
+    def close(self) -> None:
+        """
+        Unmap and close the record file.
+        """
+
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+
+def main(argv: list[str] = None) -> None:
+    """
+    Print the state of a recorded game after a given trick.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Rebuild the state of a recorded game.")
+    parser.add_argument("path", help="record file")
+    parser.add_argument("game", type=int, help="game index in the file")
+    parser.add_argument("--round", type=int, default=None,
+                        help="round index (default: last round)")
+    parser.add_argument("--tricks", type=int, default=None,
+                        help="tricks played (default: whole round)")
+    args = parser.parse_args(argv)
+
+    records = RecordFile(args.path)
+    try:
+        record = records[args.game]
+        totals, state = replay_game(record, args.round, args.tricks)
+    except (IndexError, ValueError) as err:
+        parser.error(str(err))
+    finally:
+        records.close()
+
+    print(f"seed ({record.master_seed}, {record.game_id}),"
+          + f" lineup {record.lineup}")
+    print(f"total scores before the round: {totals}")
+    print(f"tricks played: {state.tricks_played},"
+          + f" hearts broken: {state.hearts_broken},"
+          + f" round scores: {state.round_scores}")
+    print("current trick:", [Card.from_index(card) for card in state.trick])
+    for seat in range(state.player_count):
+        print(f"Player {seat + 1}: {state.hand_cards(seat)}")
+
+
+if __name__ == "__main__":
+    main()
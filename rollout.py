@@ -0,0 +1,74 @@
+from __future__ import annotations
+from bitboard import (HEARTS_MASK, SUIT_MASKS, highest_index, legal_mask,
+                      lowest_index)
+from decision_table import compiled_policy
+from game_state import GameState
+from replay import score_changes
+
+
+def basic_policy(hand: int, trick: list[int], hearts_broken: bool) -> int:
+    """
+    Takes in a hand (bitboard), the ordinals of the current trick and if
+    hearts broken (bool).
+    Play like BasicAIPlayer.play_card: the lowest valid card.
+    Return the ordinal of the card.
+    """
+
+    lead_suit = trick[0] // 13 if trick else None
+    return lowest_index(legal_mask(hand, lead_suit, hearts_broken))
+
+
+def better_policy(hand: int, trick: list[int], hearts_broken: bool) -> int:
+    """
+    Takes in a hand (bitboard), the ordinals of the current trick and if
+    hearts broken (bool).
+    Play like BetterAIPlayer.play_card:
+    - lead the lowest valid card
+    - follow with every card below the highest card of the leading suit:
+      the lowest one, otherwise the highest one below it
+    - otherwise the highest heart, or the lowest valid card
+    Return the ordinal of the card.
+    """
+
+    if not trick:
+        return lowest_index(legal_mask(hand, None, hearts_broken))
+
+    lead_suit = trick[0] // 13
+    legal = legal_mask(hand, lead_suit, hearts_broken)
+    following = legal & SUIT_MASKS[lead_suit]
+    if following:
+        largest = max(card for card in trick if card // 13 == lead_suit)
+        below = following & ((1 << largest) - 1)
+        if below == following:
+            return lowest_index(following)
+        if below:
+            return highest_index(below)
+
+    hearts = legal & HEARTS_MASK
+    if hearts:
+        return highest_index(hearts)
+    return lowest_index(legal)
+
+
+# policy name -> policy, used by the searching players
+POLICIES = {
+    "basic": basic_policy,
+    "better": better_policy,
+    "compiled": compiled_policy,
+}
+
+
+def play_out(state: GameState, policy) -> list[int]:
+    """
+    Play the rest of the round on state with every player using policy
+    (see POLICIES).
+    Return the points added to each player's total score
+    (after the shoot the moon rule).
+    """
+
+    hands = state.hands
+    seat = state.current_player()
+    while hands[seat]:
+        state.apply(policy(hands[seat], state.trick, state.hearts_broken))
+        seat = state.current_player()
+    return score_changes(state.round_scores)
@@ -1,10 +1,26 @@
 from __future__ import annotations
-from cards import Card, Rank, Suit
-from time import sleep
-from player import Player
+from engine import RoundEngine, RoundObserver, RoundResult
+from events import ConsoleSink, EventStream
 
 
-class Round:
+class ConsoleObserver(EventStream):
+    """
+    DESCRIPTION:
+        An event stream printing the actions of a round to the console
+        (see events.ConsoleSink).
+        Optionally pauses after each card and each trick so a human player
+        can follow the game.
+    """
+
+    def __init__(self, turn_delay: float = 0, trick_delay: float = 0) -> None:
+        """
+        Initialise the stream with a console sink and the pacing delays.
+        """
+
+        super().__init__([ConsoleSink(turn_delay, trick_delay)])
+
+
+class Round(RoundEngine):
     """
     DESCRIPTION:
         The execution of a round
@@ -20,7 +36,11 @@ class Round:
         leads.
         When an action happened, including player plays a card, hearts being
         broken and
-        player takes the trick, the respecitve messages are being printed.
+        player takes the trick, an event is sent to the observer, which
+        prints the respecitve messages by default.
+        (The rules are run by the headless RoundEngine, the messages and
+        pauses come from a ConsoleObserver unless another observer such
+        as an events.EventStream is given)
 
     ATTRIBUTES:
         players: list of Players, a ordered list of the player playing
@@ -30,165 +50,22 @@ class Round:
         current_trick: list of Cards, the trick of the current iteration
         current_starting_player_index: the index of leading player of the
         current iteration
+        result: RoundResult, the outcome of the round
 
     OPERATIONS AVAILABLE:
         the round will start execution when the object is created (when
         __init__ is called)
     """
 
-    players: list[Player]
-    hearts_broken: bool
-    starting_player_index: int
-    current_trick: list[Card]
-    current_starting_player_index: int
+    result: RoundResult
 
-    def __init__(self, players: list) -> None:
+    def __init__(self, players: list, observer: RoundObserver = None) -> None:
         """
         Initialise the round, and execute the round.
         """
 
-        # initalise the class attributes
-        self.players = players
-        self.hearts_broken = False
-        self.starting_player_index = self.determine_first_player()
-        self.current_trick = []
-        self.current_starting_player_index = self.starting_player_index
+        if observer is None:
+            observer = ConsoleObserver(turn_delay=1, trick_delay=2)
+        super().__init__(players, observer)
         # start the round
-        self.execute_round()
-
-    def determine_first_player(self) -> int:
-        """
-        Determine the index of the player holding Two of Clubs.
-        Return the index as integer.
-        """
-
-        # initalise a player_index as counter
-        player_index = 0
-        for player in self.players:
-            # if player holds Two of Clubs, return that player's index
-            if Card(Rank.Two, Suit.Clubs) in player.hand:
-                return player_index
-            player_index += 1
-
-    def get_absolute_player_index(self, index: int) -> int:
-        """
-        Absolute player index refers to the actual index of player in 
-        players list.
-        Take in an integer and get the remainder dividing the length of player.
-        Return absolute player index as integer.
-        
-        Example:
-            With a player count of 4, index 4 -> becomes 0 (self.players[0])
-            With a player count of 5, index 11 -> becomes 1 (self.players[1])
-            because the index wraps around the player list.
-            When an index is out of range, it wraps back to the beginning.
-        """
-
-        return index % len(self.players)
-
-    def determine_taker_index(self) -> int:
-        """
-        Determine player index of the taker (player who takes the trick).
-        Return taker index as integer.
-        """
-
-        # assume the first card is the largest card in leading suit
-        max_card_index = 0
-        max_card = self.current_trick[0]
-        for card_index in range(len(self.current_trick)):
-            card = self.current_trick[card_index]
-            # if any card has the same suit that is larger
-            # replace the index
-            if card > max_card and card.suit == max_card.suit:
-                max_card = card
-                max_card_index = card_index
-
-        taker_index = self.current_starting_player_index + max_card_index
-        return self.get_absolute_player_index(taker_index)
-
-    def determine_penalty(self) -> int:
-        """
-        Determine the points the taker gets.
-        Return penalty score as integer.
-        """
-
-        points = 0
-        for card in self.current_trick:
-            if card.suit == Suit.Hearts:
-                points += 1
-            if card.suit == Suit.Spades and card.rank == Rank.Queen:
-                points += 13
-        return points
-
-    def prepare_new_iteration(self, new_player_starting_index: int) -> None:
-        """
-        Takes in the player index (int) who leads the next trick.
-        Prepare a new iteration by clearing up the trick and assigning the
-        new_player_index.
-        """
-
-        self.current_starting_player_index = new_player_starting_index
-        self.current_trick = []
-
-    def execute_player_turn(self, player_index: int) -> Card:
-        """
-        Execute a player turn in an iteration.
-        Take in the index of a player (int).
-        Messages are printed for action done by player.
-        Return card played by player.
-        """
-
-        player = self.players[player_index]
-        
-        print(f"It is {player}'s turn")
-        
-        card_played = player.play_card(self.current_trick, self.hearts_broken)
-
-        # sleep 1 second before announcing the card played
-        sleep(1)
-
-        if self.current_trick:
-            print(f"{player} plays \n{card_played}")
-        else:
-            print(f"{player} leads the trick with \n{card_played}")
-
-        if card_played.suit == Suit.Hearts and not self.hearts_broken:
-            print("Hearts have been broken!")
-            self.hearts_broken = True
-        self.current_trick.append(card_played)
-
-        return card_played
-
-    def execute_iteration(self) -> None:
-        """
-        Execute an iteration. 
-        Players execute their turns in ascending index order.
-        Execute until all player has played their card in this trick.
-        """
-
-        starting_index = self.current_starting_player_index
-        player_length = len(self.players)
-        # each player play their cards
-        for i in range(starting_index, starting_index + player_length):
-            player_index = self.get_absolute_player_index(i)
-            self.execute_player_turn(player_index)
-
-    def execute_round(self) -> None:
-        """
-        Execute a round, controls the flow of game including determining the
-        leading player of each iteration.
-        Executes until players finish playing all of their cards.
-        """
-
-        # execute round until player has no cards
-        while len(self.players[0].hand) > 0:
-            self.execute_iteration()
-            penalty = self.determine_penalty()
-            taker_index = self.get_absolute_player_index(
-                self.determine_taker_index()
-            )
-            taker = self.players[taker_index]
-            taker.round_score += penalty
-            print(f"{taker} takes the trick. Points received: {penalty}")
-            sleep(2)
-            self.prepare_new_iteration(taker_index)
+        self.result = self.execute_round()
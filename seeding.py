@@ -0,0 +1,78 @@
+from __future__ import annotations
+import random
+from hashlib import blake2b
+
+
+def derive_seed(master_seed: int, *path) -> int:
+    """
+    Takes in a master seed and a path of names/numbers identifying a
+    stream, e.g. derive_seed(7, 1234, "deal", 3).
+    Hash them into an independent 64-bit seed.
+    Return the seed as integer.
+    """
+
+    digest = blake2b(repr((master_seed,) + path).encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), "little")
+
+
+class GameStreams:
+    """
+    DESCRIPTION:
+        The random number streams of one game, all derived from a
+        (master seed, game id) pair.
+        Every stream is seeded on its own, so any game of a batch (and any
+        round of a game) can be regenerated without replaying the games or
+        rounds before it, and streams do not affect each other
+        (e.g. a player drawing more numbers does not change the deals).
+
+    ATTRIBUTES:
+        master_seed: int, the seed of the whole batch
+        game_id: int, the number of the game in the batch
+        seating: random.Random, the stream for choosing seats
+
+    OPERATIONS AVAILABLE:
+        deal(round_number) to get the stream for dealing a round,
+        player(seat) to get the stream of a player's own choices
+    """
+
+    master_seed: int
+    game_id: int
+    seating: random.Random
+
+    def __init__(self, master_seed: int = None, game_id: int = 0) -> None:
+        """
+        Initialise the streams, a random master seed is picked when
+        master_seed is None.
+        """
+
+        if master_seed is None:
+            master_seed = random.getrandbits(64)
+
+        self.master_seed = master_seed
+        self.game_id = game_id
+        self.seating = random.Random(
+            derive_seed(master_seed, game_id, "seating"))
+
+    def deal(self, round_number: int) -> random.Random:
+        """
+        Return a new stream for dealing the given round.
+        """
+
+        return random.Random(
+            derive_seed(self.master_seed, self.game_id, "deal", round_number))
+
+    def player(self, seat: int) -> random.Random:
+        """
+        Return a new stream for the choices of the player at seat.
+        """
+
+        return random.Random(
+            derive_seed(self.master_seed, self.game_id, "player", seat))
+
+    def __repr__(self) -> str:
+        """
+        Override the repr() conversion.
+        Return the seed pair needed to regenerate the game.
+        """
+
+        return f"GameStreams({self.master_seed}, {self.game_id})"
@@ -1,8 +1,11 @@
 from __future__ import annotations
-import random
-from cards import Card, Rank, Suit
+from cards import Card
 from basic_ai import BasicAIPlayer
-from round import Round
+from round import ConsoleObserver
+from engine import RoundEngine
+from seeding import GameStreams
+from dealing import deal_hands, generate_deck, validate_card_segment
+from hearts import validate_settings
 
 
 class Hearts:
@@ -10,7 +13,7 @@ class Hearts:
     DESCRIPTION:
         A hearts game.
         2 integer inputs (target_score, player_count) are being read from
-        standard input in the begninning.
+        standard input in the begninning, unless they are given.
         Rounds are being executed until atleast one player reached the
         target_score and there is only one winner.
         Before each round is executed, players are generated,
@@ -21,7 +24,8 @@ class Hearts:
         the right (in incrementing order).
         When the offset (round_number % len(players)) is 0, player do not pass
         cards
-        The round begins by invoking the Round class
+        The round is played by the headless RoundEngine, printing through
+        a ConsoleObserver without pauses
         Player statistics are printed at the end of each round.
         End of game is being checked after execution of each round.
 
@@ -30,6 +34,8 @@ class Hearts:
         player_cound: int, the number of player playing, has to be 3, 4 or 5
         players: list of Players, a ordered list of the player playing
         round_number: int, the number of round currently at. Starting from 1
+        streams: GameStreams, the random streams for seating, dealing and
+          the players, derived from (seed, game_id)
 
     OPERATIONS AVAILABLE:
         the game will start execution when the object is created
@@ -40,15 +46,26 @@ class Hearts:
     player_count: int
     players: list
     round_number: int
+    streams: GameStreams
 
-    def __init__(self) -> None:
+    def __init__(self, seed: int = None, game_id: int = 0,
+                 target_score: int = None, player_count: int = None) -> None:
         """
         Get user input, initialise attributes and execute the game.
+        The game is reproducible from (seed, game_id),
+        a random seed is used when seed is None.
+        A target_score or player_count that is not given is read from
+        standard input.
+        Raise ValueError for a target score below 1 or a player count
+        other than 3 to 5.
         """
 
         # initalise the arributes
-        self.get_initalize_inputs()
+        self.get_initalize_inputs(target_score, player_count)
+        self.streams = GameStreams(seed, game_id)
         self.generate_players()
+        for seat in range(self.player_count):
+            self.players[seat].rng = self.streams.player(seat)
         self.round_number = 1
         # run the game
         self.execute_rounds()
@@ -71,21 +88,7 @@ class Hearts:
         Return the list of cards unshuffled.
         """
 
-        # generate a standard deck of cards
-        deck = []
-        for suit in Suit:
-            for rank in Rank:
-                deck.append(Card(rank, suit))
-
-        # remove cards based on game settings
-        if self.player_count == 5:
-            deck.remove(Card(Rank.Two, Suit.Diamonds))
-            deck.remove(Card(Rank.Two, Suit.Spades))
-
-        if self.player_count == 3:
-            deck.remove(Card(Rank.Two, Suit.Diamonds))
-
-        return deck
+        return generate_deck(self.player_count)
 
     def validate_card_segment(self, cards: list[Card]) -> bool:
         """
@@ -93,17 +96,7 @@ class Hearts:
         Return the result as a boolean.
         """
 
-        # check all cards other then Queen of Spades
-        for card in cards:
-            if card.suit == Suit.Spades and card.rank == Rank.Queen:
-                continue
-
-            # if encounter atleast one non-heart card, return True
-            if card.suit != Suit.Hearts:
-                return True
-
-        # if only heart cards are found, return False
-        return False
+        return validate_card_segment(cards)
 
     def dealt_card(self) -> None:
         """
@@ -112,39 +105,24 @@ class Hearts:
         No return value applicable.
         """
 
-        # repeat until a valid set of card for all player
-        while True:
-            # generate a deck of card (removed unwanted cards) and shuffle the cards
-            cards = self.generate_deck()
-            random.shuffle(cards)
-            deck_size = len(cards)
-            # get length of cards each player needs to hold
-            segment_size = deck_size / self.player_count
-            # segment the deck of card into player_count segments, and assign the cards to them
-            valid = True
-            for i in range(self.player_count):
-                seg_from = int(i*segment_size)
-                seg_to = int((i+1)*segment_size)
-                deck_segment = cards[seg_from:seg_to]
-                if not self.validate_card_segment(deck_segment):
-                    # if any segment is invalid, regenerate a card
-                    valid = False
-                    break
-                self.players[i].hand = deck_segment
-
-            if valid:
-                # only return if valid, or else regenerate cards
-                return
+        # samples a valid deal directly, no reshuffling
+        deal_hands(self.players, self.streams.deal(self.round_number))
 
-    def get_initalize_inputs(self) -> None:
+    def get_initalize_inputs(self, target_score: int = None,
+                             player_count: int = None) -> None:
         """
         Get and validate user input (targest_score, player_count) from 
-        standard input.
+        standard input, for the values not given.
         The result is directly assigned to the attributes.
+        Raise ValueError for a given value that the prompts would refuse.
         """
 
+        validate_settings(target_score, player_count)
+        self.target_score = target_score
+        self.player_count = player_count
+
         # get target_score
-        while True:
+        while self.target_score is None:
             try:
                 input_score = int(input("Please enter a target score: "))
 
@@ -159,7 +137,7 @@ class Hearts:
                 print("Target score has to be a whole number")
 
         # get player_count
-        while True:
+        while self.player_count is None:
             try:
                 input_score = int(
                     input("Please enter a player count (3 to 5): ")
@@ -212,7 +190,7 @@ class Hearts:
 
         # add cards from temporary dictoray to player's hand
         for i in target_cards.keys():
-            self.players[i].hand += target_cards[i]
+            self.players[i].add_cards(target_cards[i])
 
     def calculate_points(self) -> None:
         """
@@ -312,7 +290,7 @@ class Hearts:
                 print(f"{player} was dealt {player.hand}")
 
             self.pass_cards()
-            Round(self.players)
+            RoundEngine(self.players, ConsoleObserver()).execute_round()
 
             print(f"========= End of round {self.round_number} =========")
             self.calculate_points()
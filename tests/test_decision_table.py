@@ -0,0 +1,9 @@
+import random
+
+from decision_table import find_mismatches, random_state
+
+
+def test_compiled_policy_matches_better_ai():
+    rng = random.Random(0)
+    states = [random_state(rng) for _ in range(20000)]
+    assert find_mismatches(states) == []
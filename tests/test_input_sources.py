@@ -0,0 +1,90 @@
+import itertools
+import queue
+
+import pytest
+
+from basic_ai import BasicAIPlayer
+from cards import Card, Rank, Suit
+from events import NullSink
+from hearts import Hearts
+from human import Human
+from input_sources import FileInput, InputSource, QueueInput, ScriptedInput
+
+
+def test_scripted_input_reads_in_order_then_ends():
+    source = ScriptedInput(["Ann", 3])
+    assert source.read("name: ") == "Ann"
+    assert source.read("card: ") == "3"
+    assert source.lines_read == 2
+    with pytest.raises(EOFError):
+        source.read("card: ")
+
+
+def test_file_input_skips_comments(tmp_path):
+    path = tmp_path / "moves.txt"
+    path.write_text("# a game\nAnn\n1,2,3\n# trick 1\n4\n")
+    source = FileInput(str(path))
+    assert [source.read(""), source.read(""), source.read("")] == [
+        "Ann", "1,2,3", "4"]
+    with pytest.raises(EOFError):
+        source.read("")
+
+
+def test_queue_input_ends_on_none():
+    lines = queue.Queue()
+    lines.put("2")
+    lines.put(None)
+    source = QueueInput(lines)
+    assert source.read("") == "2"
+    with pytest.raises(EOFError):
+        source.read("")
+
+
+def test_input_source_needs_next_line():
+    with pytest.raises(TypeError):
+        InputSource()
+
+
+def test_human_passes_and_plays_scripted_answers(capsys):
+    hand = [Card(Rank.Ten, Suit.Spades), Card(Rank.Two, Suit.Clubs),
+            Card(Rank.Ace, Suit.Hearts), Card(Rank.Five, Suit.Diamonds),
+            Card(Rank.King, Suit.Clubs)]
+    # a name, then answers the prompts refuse before the valid ones
+    source = ScriptedInput(["Ann", "x", "1,1,2", "1,2,9", "5,1,4",
+                            "0", "2", "1"])
+    human = Human(input_source=source)
+    human.hand = list(hand)
+    assert human.name == "Ann"
+
+    # the numbers are the positions in the order the cards were dealt
+    passed = human.pass_cards("Bob")
+    assert passed == [hand[4], hand[0], hand[3]]
+    assert human.hand == [hand[1], hand[2]]
+
+    # Ace of Hearts can not follow a club lead
+    lead = [Card(Rank.Three, Suit.Clubs)]
+    assert human.play_card(lead, False) == hand[1]
+    assert source.lines_read == 8
+    capsys.readouterr()
+
+
+def test_scripted_humans_play_a_whole_game(capsys):
+    def answers():
+        # a pass, then every card number until one is valid
+        while True:
+            yield "1,2,3"
+            yield from (str(number) for number in range(1, 14))
+
+    def game():
+        players = [Human("Ann", ScriptedInput(answers())),
+                   Human("Bob", ScriptedInput(answers())),
+                   BasicAIPlayer("Player 3")]
+        game = Hearts(5, sinks=[NullSink()], target_score=30,
+                      players=players)
+        return [player.total_score for player in game.players]
+
+    scores = game()
+    assert max(scores) >= 30
+    # the same seed and answers replay the same game
+    assert game() == scores
+    capsys.readouterr()
@@ -0,0 +1,14 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from vector_sim import cross_check, simulate_batch
+
+
+@pytest.mark.parametrize("player_count", [3, 4, 5])
+def test_batch_matches_round_engine(player_count):
+    # every passing offset, including the rounds without passing
+    for round_number in range(1, player_count + 1):
+        rng = np.random.default_rng(player_count * 10 + round_number)
+        result = simulate_batch(200, player_count, round_number, rng)
+        assert cross_check(result, 200, rng) == []
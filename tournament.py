@@ -0,0 +1,404 @@
+from __future__ import annotations
+import argparse
+from multiprocessing import Pool
+from time import perf_counter
+from basic_ai import BasicAIPlayer
+from better_ai import BetterAIPlayer
+from pimc_ai import PIMCPlayer
+from ismcts_ai import ISMCTSPlayer
+from engine import GameResult, ObserverGroup, RoundObserver, play_game
+from seeding import GameStreams
+from records import GameRecorder, RecordWriter
+from endgame import open_shared
+from profiling import PhaseProfiler
+from online_stats import OnlineStats, SequentialTest
+
+# the largest automatic chunk of games with a stop rule
+STOP_RULE_CHUNK_SIZE = 50
+
+# strategy name -> player class, used by the lineup option
+STRATEGIES = {
+    "basic": BasicAIPlayer,
+    "better": BetterAIPlayer,
+    "pimc": PIMCPlayer,
+    "ismcts": ISMCTSPlayer,
+}
+
+
+class TournamentStats:
+    """
+    DESCRIPTION:
+        Aggregated results of many AI-only games with a fixed seat lineup.
+        The games are counted by an OnlineStats, the summaries below are
+        read from it. Stats of separate batches (e.g. from different
+        worker processes) can be merged into one.
+
+    ATTRIBUTES:
+        lineup: list of str, the strategy name of each seat
+        online: OnlineStats, the streaming stats with wins, scores,
+          moon shots, intervals, histograms and round points
+        games: int, the number of games played (read from online)
+        rounds: int, the number of rounds played over all games
+          (read from online)
+
+    OPERATIONS AVAILABLE:
+        add_game() to record a GameResult, merge() to add another stats
+        object, strategy_summary() and seat_summary() for the averages,
+        str conversion to get a printable table
+    """
+
+    lineup: list[str]
+    online: OnlineStats
+
+    def __init__(self, lineup: list[str]) -> None:
+        """
+        Initialise empty stats for a lineup.
+        """
+
+        self.lineup = list(lineup)
+        self.online = OnlineStats(lineup)
+
+    @property
+    def games(self) -> int:
+        """
+        Return the number of games played.
+        """
+
+        return self.online.games
+
+    @property
+    def rounds(self) -> int:
+        """
+        Return the number of rounds played over all games.
+        """
+
+        return self.online.rounds
+
+    def add_game(self, result) -> None:
+        """
+        Takes in a GameResult and add it to the totals.
+        """
+
+        self.online.add_game(result)
+
+    def merge(self, other: TournamentStats) -> None:
+        """
+        Takes in stats of the same lineup and add them to these stats.
+        """
+
+        self.online.merge(other.online)
+
+    def seat_summary(self) -> list[tuple]:
+        """
+        Return a list of (seat, strategy, win rate, mean score, moon shots)
+        tuples, one for each seat.
+        """
+
+        games = max(self.games, 1)
+        return [(seat, self.lineup[seat], stats.wins / games,
+                 stats.game_scores.mean, stats.moon_shots)
+                for seat, stats in enumerate(self.online.seats)]
+
+    def strategy_summary(self) -> list[tuple]:
+        """
+        Combine the seats playing the same strategy.
+        Win rate and mean score are per seat played by the strategy.
+        Return a list of (strategy, seats, win rate, mean score, moon shots)
+        tuples in lineup order.
+        """
+
+        summary = []
+        for strategy in dict.fromkeys(self.lineup):
+            stats = self.online.strategy(strategy)
+            seat_games = max(stats.games, 1)
+            summary.append((strategy, self.lineup.count(strategy),
+                            stats.wins / seat_games, stats.game_scores.mean,
+                            stats.moon_shots))
+        return summary
+
+    def __str__(self) -> str:
+        """
+        Override the str() conversion.
+        Return the summaries formatted as tables.
+        """
+
+        lines = [f"games: {self.games}, rounds: {self.rounds}", "",
+                 "strategy  seats  win rate  mean score  moon shots"]
+        for strategy, seats, win_rate, mean, moons in self.strategy_summary():
+            lines.append(f"{strategy:<8}  {seats:>5}  {win_rate:>8.2%}"
+                         + f"  {mean:>10.2f}  {moons:>10}")
+
+        lines += ["", "seat  strategy  win rate  mean score  moon shots"]
+        for seat, strategy, win_rate, mean, moons in self.seat_summary():
+            lines.append(f"{seat + 1:>4}  {strategy:<8}  {win_rate:>8.2%}"
+                         + f"  {mean:>10.2f}  {moons:>10}")
+        lines += ["", str(self.online)]
+        return "\n".join(lines)
+
+
+def run_games(lineup: list[str], target_score: int, seed: int,
+              game_ids: range, record: bool = False,
+              endgame_path: str = None, stop_rule: SequentialTest = None
+              ) -> tuple[TournamentStats, list[bytes], SequentialTest]:
+    """
+    Play the given games.
+    Every game gets its own streams derived from (seed, game id), so the
+    result of a game does not depend on which worker played it or in
+    what order.
+    The games are also added to stop_rule (an empty test, see
+    SequentialTest.spawn) when given.
+    Return the stats, the encoded GameRecords if record is True and
+    stop_rule.
+    """
+
+    stats = TournamentStats(lineup)
+    records = []
+    for game_id in game_ids:
+        if record:
+            recorder = GameRecorder(lineup, seed, game_id)
+            observer = ObserverGroup([recorder, stats.online])
+        else:
+            observer = stats.online
+        result = play_single_game(lineup, target_score, seed, game_id,
+                                  observer, endgame_path)
+        stats.add_game(result)
+        if stop_rule is not None:
+            stop_rule.add_game(result)
+        if record:
+            records.append(recorder.record.encode())
+    return stats, records, stop_rule
+
+
+def play_single_game(lineup: list[str], target_score: int, seed: int,
+                     game_id: int, observer: RoundObserver = None,
+                     endgame_path: str = None) -> GameResult:
+    """
+    Play (or regenerate) one game of a tournament from its seed pair,
+    notifying observer (e.g. a GameRecorder).
+    Players with an endgame attribute get the cache of endgame_path
+    (opened read-only once per process).
+    Return the GameResult.
+    """
+
+    players = [STRATEGIES[lineup[seat]](f"Player {seat + 1}")
+               for seat in range(len(lineup))]
+    if endgame_path is not None:
+        cache = open_shared(endgame_path)
+        for player in players:
+            if hasattr(player, "endgame"):
+                player.endgame = cache
+    return play_game(players, target_score, GameStreams(seed, game_id),
+                     observer)
+
+
+def _run_games_task(
+  task: tuple) -> tuple[TournamentStats, list[bytes], SequentialTest]:
+    """
+    Unpack the arguments of a pool task and run the games.
+    """
+
+    return run_games(*task)
+
+
+def run_tournament(lineup: list[str], target_score: int, games: int,
+                   workers: int = 1, seed: int = 0,
+                   chunk_size: int = 0, record_path: str = None,
+                   endgame_path: str = None,
+                   stop_rule: SequentialTest = None) -> TournamentStats:
+    """
+    Play a number of AI-only games with the given lineup, spread over
+    worker processes in chunks of game ids.
+    Only the per-chunk stats (and encoded records when record_path is
+    given) are sent back to the main process, which appends the records
+    to record_path.
+    With a stop_rule, games is the most games played: the chunks are
+    merged in game order and the tournament stops after the chunk that
+    makes the test significant (see SequentialTest).
+    Return the merged TournamentStats.
+    """
+
+    for strategy in lineup:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', available: "
+                             + ", ".join(STRATEGIES))
+
+    # a few chunks per worker keeps the workers evenly loaded
+    if chunk_size <= 0:
+        chunk_size = max(1, games // (workers * 8))
+        if stop_rule is not None:
+            # small chunks, the test is only checked between chunks
+            chunk_size = min(chunk_size, STOP_RULE_CHUNK_SIZE)
+    tasks = [(lineup, target_score, seed,
+              range(start, min(start + chunk_size, games)),
+              record_path is not None, endgame_path,
+              stop_rule.spawn() if stop_rule is not None else None)
+             for start in range(0, games, chunk_size)]
+
+    stats = TournamentStats(lineup)
+    writer = RecordWriter(record_path) if record_path is not None else None
+    try:
+        if workers <= 1:
+            results = map(_run_games_task, tasks)
+            _merge_results(results, stats, writer, stop_rule)
+        elif stop_rule is not None:
+            # in game order, so the stopping point does not depend on
+            # which worker is faster; leaving the pool stops the workers
+            with Pool(workers) as pool:
+                results = pool.imap(_run_games_task, tasks)
+                _merge_results(results, stats, writer, stop_rule)
+        else:
+            with Pool(workers) as pool:
+                results = pool.imap_unordered(_run_games_task, tasks)
+                _merge_results(results, stats, writer)
+    finally:
+        if writer is not None:
+            writer.close()
+    return stats
+
+
+def _merge_results(results, stats: TournamentStats, writer: RecordWriter,
+                   stop_rule: SequentialTest = None) -> None:
+    """
+    Merge the chunk results into stats and stop_rule and write their
+    records, until stop_rule is decided.
+    """
+
+    for chunk_stats, records, chunk_test in results:
+        stats.merge(chunk_stats)
+        if writer is not None:
+            for payload in records:
+                writer.append_bytes(payload)
+        if stop_rule is not None:
+            stop_rule.merge(chunk_test)
+            if stop_rule.decided():
+                return
+
+
+def parse_lineup(value: str, player_count: int) -> list[str]:
+    """
+    Takes in a comma separated lineup, e.g. "basic,better,basic".
+    An empty lineup alternates basic and better seats.
+    Return the lineup as a list of strategy names.
+    Raise ValueError for a wrong seat count or an unknown strategy.
+    """
+
+    if not value:
+        return [("basic", "better")[seat % 2] for seat in range(player_count)]
+
+    lineup = [name.strip().lower() for name in value.split(",")]
+    if len(lineup) != player_count:
+        raise ValueError(f"The lineup needs {player_count} seats,"
+                         + f" got {len(lineup)}")
+    for strategy in lineup:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', available: "
+                             + ", ".join(STRATEGIES))
+    return lineup
+
+
+def main(argv: list[str] = None) -> None:
+    """
+    Read the tournament settings from the command line,
+    play the games and print the merged stats.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Play AI-only hearts games over a pool of processes.")
+    parser.add_argument("--players", type=int, default=4,
+                        choices=(3, 4, 5), help="player count")
+    parser.add_argument("--target-score", type=int, default=100)
+    parser.add_argument("--lineup", default="",
+                        help="comma separated strategies for each seat ("
+                        + ", ".join(STRATEGIES) + ")")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=0,
+                        help="games per pool task (default: automatic)")
+    parser.add_argument("--record", default=None, metavar="PATH",
+                        help="append every game to a record file")
+    parser.add_argument("--game-id", type=int, default=None,
+                        help="only regenerate this game of the batch")
+    parser.add_argument("--endgame", default=None, metavar="PATH",
+                        help="endgame cache file for the players using one"
+                        + " (see endgame.py)")
+    parser.add_argument("--profile", default=None, metavar="PATH",
+                        help="time the phases of the games, print a summary"
+                        + " and write collapsed stacks to PATH"
+                        + " (needs --workers 1)")
+    parser.add_argument("--stop-when-significant", default=None,
+                        metavar="A,B",
+                        help="stop once strategies A and B of the lineup"
+                        + " differ significantly (--games is then the"
+                        + " most games played)")
+    parser.add_argument("--metric", default="score",
+                        choices=SequentialTest.METRICS,
+                        help="what the stop rule compares")
+    parser.add_argument("--alpha", type=float, default=0.05,
+                        help="false positive rate of the stop rule")
+    parser.add_argument("--min-games", type=int, default=30,
+                        help="games before the stop rule can stop")
+    parser.add_argument("--histogram", action="store_true",
+                        help="print the final score histogram of every"
+                        + " strategy")
+    args = parser.parse_args(argv)
+    if args.profile is not None and args.workers > 1:
+        parser.error("--profile needs --workers 1, the phases are timed"
+                     + " in this process")
+    profiler = PhaseProfiler() if args.profile is not None else None
+
+    # only the settings are usage errors, errors of a game keep their
+    # traceback
+    try:
+        lineup = parse_lineup(args.lineup, args.players)
+        stop_rule = None
+        if args.stop_when_significant is not None:
+            compared = [name.strip().lower()
+                        for name in args.stop_when_significant.split(",")]
+            if len(compared) != 2:
+                raise ValueError("--stop-when-significant needs two"
+                                 + " strategies (A,B)")
+            stop_rule = SequentialTest(lineup, compared[0], compared[1],
+                                       args.metric, args.alpha,
+                                       min_games=args.min_games)
+    except ValueError as err:
+        parser.error(str(err))
+
+    if args.game_id is not None:
+        result = play_single_game(lineup, args.target_score, args.seed,
+                                  args.game_id, None, args.endgame)
+        print(f"game {args.game_id}: {result.rounds} rounds,"
+              + f" total scores {result.total_scores},"
+              + f" winner Player {result.winner + 1},"
+              + f" moon shots {result.moon_shots}")
+        return
+
+    start = perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        stats = run_tournament(lineup, args.target_score, args.games,
+                               args.workers, args.seed, args.chunk_size,
+                               args.record, args.endgame, stop_rule)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+
+    elapsed = perf_counter() - start
+    print(stats)
+    if args.histogram:
+        for strategy in dict.fromkeys(lineup):
+            print(f"\nfinal scores of {strategy}:\n"
+                  + str(stats.online.strategy(strategy).score_histogram))
+    if stop_rule is not None:
+        print("\n" + str(stop_rule))
+    print(f"\n{stats.games} games in {elapsed:.2f}s"
+          + f" ({stats.games / elapsed:.1f} games/s)")
+    if profiler is not None:
+        print("\n" + profiler.summary())
+        profiler.write_collapsed(args.profile)
+        print(f"collapsed stacks written to {args.profile}")
+
+
+if __name__ == "__main__":
+    main()
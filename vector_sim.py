@@ -0,0 +1,256 @@
+from __future__ import annotations
+import argparse
+from time import perf_counter
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("vector_sim.py needs numpy, an optional dependency:"
+                      + " pip install -r requirements-optional.txt"
+                      ) from None
+from basic_ai import BasicAIPlayer
+from bitboard import cards_from_mask
+from dealing import generate_deck
+from engine import RoundEngine, pass_hands
+
+# card arrays are indexed by Card.ordinal (suit * 13 + rank - 2)
+DECK_SIZE = 52
+SUIT_OF = np.arange(DECK_SIZE) // 13
+SUIT_MASKS = np.stack([SUIT_OF == suit for suit in range(4)])
+CARD_POINTS = np.where(SUIT_OF == 3, 1, 0)
+CARD_POINTS[2 * 13 + 10] = 13  # Queen of Spades
+# cards that can not make a hand valid on their own (hearts and Queen of
+# Spades), see dealing.validate_card_segment
+PENALTY_CARDS = CARD_POINTS > 0
+
+
+class BatchResult:
+    """
+    DESCRIPTION:
+        The outcome of a batch of rounds played by BasicAIPlayers only,
+        returned by simulate_batch.
+
+    ATTRIBUTES:
+        dealt: bool array (games, players, 52), the hands before passing
+        round_number: int, decides the passing offset of the rounds
+        penalties: int array (games, players), points taken in each round
+        moon_shooters: int array (games,), the index of the player who
+          took all 26 points, -1 when nobody did
+    """
+
+    dealt: np.ndarray
+    round_number: int
+    penalties: np.ndarray
+    moon_shooters: np.ndarray
+
+    def __init__(self, dealt: np.ndarray, round_number: int,
+                 penalties: np.ndarray) -> None:
+        """
+        Initialise the result and find the moon shooters.
+        """
+
+        self.dealt = dealt
+        self.round_number = round_number
+        self.penalties = penalties
+        shot = penalties == 26
+        self.moon_shooters = np.where(shot.any(axis=1),
+                                      shot.argmax(axis=1), -1)
+
+    def score_changes(self) -> np.ndarray:
+        """
+        Apply the shoot the moon rule.
+        Return the points added to each player's total score as an int
+        array (games, players).
+        """
+
+        changes = self.penalties.copy()
+        shot_games = self.moon_shooters >= 0
+        changes[shot_games] = 26
+        changes[shot_games, self.moon_shooters[shot_games]] = 0
+        return changes
+
+
+def deal_batch(games: int, player_count: int,
+               rng: np.random.Generator) -> np.ndarray:
+    """
+    Deal games shuffled decks evenly to player_count players.
+    Games where a player holds only hearts and Queen of Spades are dealt
+    again, like reshuffling until valid (dealing.legacy_deal).
+    Return the hands as a bool array (games, players, 52).
+    """
+
+    deck = np.array([card.ordinal for card in generate_deck(player_count)])
+    hand_size = len(deck) // player_count
+    seats = np.arange(len(deck)) // hand_size
+    hands = np.zeros((games, player_count, DECK_SIZE), dtype=bool)
+
+    redeal = np.arange(games)
+    while len(redeal):
+        # a random permutation of the deck for every game being dealt
+        order = np.argsort(rng.random((len(redeal), len(deck))), axis=1)
+        dealt = np.zeros((len(redeal), player_count, DECK_SIZE), dtype=bool)
+        dealt[np.arange(len(redeal))[:, None], seats, deck[order]] = True
+        hands[redeal] = dealt
+
+        valid = (hands[redeal] & ~PENALTY_CARDS).any(axis=2).all(axis=1)
+        redeal = redeal[~valid]
+
+    return hands
+
+
+def pass_batch(hands: np.ndarray, round_number: int) -> np.ndarray:
+    """
+    Every player passes their 3 highest cards (BasicAIPlayer.pass_cards)
+    to the (round_number % player count)-th player to the right.
+    Return the hands after passing as a new array.
+    """
+
+    offset = round_number % hands.shape[1]
+    if not offset:
+        return hands.copy()
+
+    # number of cards at or above each card, the 3 highest have 1 to 3
+    above = np.cumsum(hands[:, :, ::-1], axis=2)[:, :, ::-1]
+    passed = hands & (above <= 3)
+    return (hands & ~passed) | np.roll(passed, offset, axis=1)
+
+
+def play_batch(hands: np.ndarray) -> np.ndarray:
+    """
+    Play every trick of a batch of rounds in lockstep, every player
+    playing their lowest valid card (BasicAIPlayer.play_card).
+    The leader plays the lowest card in hand (Two of Clubs first, hearts
+    are the highest suit so they are only led when nothing else is left),
+    the others play the lowest card of the leading suit or their lowest
+    card when they have none.
+    Return the penalties as an int array (games, players).
+    """
+
+    hands = hands.copy()
+    games, player_count, _ = hands.shape
+    rows = np.arange(games)
+    penalties = np.zeros((games, player_count), dtype=np.int64)
+    leader = hands[:, :, 0].argmax(axis=1)
+    tricks = int(hands[0, 0].sum())
+
+    for _ in range(tricks):
+        card = hands[rows, leader].argmax(axis=1)
+        hands[rows, leader, card] = False
+        lead_suit = SUIT_OF[card]
+        best_card = card
+        best_seat = leader
+        points = CARD_POINTS[card]
+
+        for offset in range(1, player_count):
+            seat = (leader + offset) % player_count
+            hand = hands[rows, seat]
+            following = hand & SUIT_MASKS[lead_suit]
+            card = np.where(following.any(axis=1),
+                            following.argmax(axis=1), hand.argmax(axis=1))
+            hands[rows, seat, card] = False
+
+            # the highest card of the leading suit takes the trick
+            wins = (SUIT_OF[card] == lead_suit) & (card > best_card)
+            best_card = np.where(wins, card, best_card)
+            best_seat = np.where(wins, seat, best_seat)
+            points = points + CARD_POINTS[card]
+
+        penalties[rows, best_seat] += points
+        leader = best_seat
+
+    return penalties
+
+
+def simulate_batch(games: int, player_count: int = 4, round_number: int = 1,
+                   rng: np.random.Generator = None) -> BatchResult:
+    """
+    Deal, pass and play games rounds of BasicAIPlayers in lockstep.
+    Return the outcome as a BatchResult.
+    """
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    dealt = deal_batch(games, player_count, rng)
+    penalties = play_batch(pass_batch(dealt, round_number))
+    return BatchResult(dealt, round_number, penalties)
+
+
+def cross_check(result: BatchResult, samples: int,
+                rng: np.random.Generator = None) -> list[int]:
+    """
+    Replay sampled games of a batch with BasicAIPlayer objects on the
+    RoundEngine, starting from the same dealt hands.
+    Return the list of game indices where the penalties differ.
+    """
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    games, player_count, _ = result.dealt.shape
+    sampled = rng.choice(games, size=min(samples, games), replace=False)
+    mismatches = []
+    for game in sampled:
+        players = []
+        for seat in range(player_count):
+            player = BasicAIPlayer(f"Player {seat + 1}")
+            mask = sum(1 << int(i)
+                       for i in np.flatnonzero(result.dealt[game, seat]))
+            player.hand = cards_from_mask(mask)
+            players.append(player)
+
+        pass_hands(players, result.round_number)
+        round_result = RoundEngine(players).execute_round()
+        if round_result.penalties != result.penalties[game].tolist():
+            mismatches.append(int(game))
+
+    return mismatches
+
+
+def main(argv: list[str] = None) -> None:
+    """
+    Read the settings from the command line, simulate the rounds in
+    batches and print the penalty distribution.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Simulate BasicAIPlayer-only rounds in lockstep.")
+    parser.add_argument("--rounds", type=int, default=100000)
+    parser.add_argument("--players", type=int, default=4, choices=(3, 4, 5))
+    parser.add_argument("--round-number", type=int, default=1,
+                        help="decides the passing offset")
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--check", type=int, default=0,
+                        help="games per batch to cross-check against the "
+                        + "object engine")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    penalty_sums = np.zeros(args.players, dtype=np.int64)
+    histogram = np.zeros(27, dtype=np.int64)
+    moon_shots = 0
+    mismatches = 0
+    start = perf_counter()
+
+    for done in range(0, args.rounds, args.batch_size):
+        games = min(args.batch_size, args.rounds - done)
+        result = simulate_batch(games, args.players, args.round_number, rng)
+        penalty_sums += result.penalties.sum(axis=0)
+        histogram += np.bincount(result.penalties.ravel(), minlength=27)
+        moon_shots += int((result.moon_shooters >= 0).sum())
+        if args.check:
+            mismatches += len(cross_check(result, args.check, rng))
+
+    elapsed = perf_counter() - start
+    print(f"{args.rounds} rounds in {elapsed:.2f}s"
+          + f" ({args.rounds / elapsed:.0f} rounds/s)")
+    print("mean penalty per seat:",
+          " ".join(f"{total / args.rounds:.3f}" for total in penalty_sums))
+    print(f"moon shot rate: {moon_shots / args.rounds:.4%}")
+    print("penalty histogram:", histogram.tolist())
+    if args.check:
+        print(f"cross-check mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()